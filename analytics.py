@@ -0,0 +1,371 @@
+"""
+Personal Habit Tracker - Columnar Analytics
+Snapshots Logs (hot and archived), Habit, Customer and Goal into compact
+typed columns - int32 habit IDs and day numbers, uint8 status codes - and
+runs every report on them with vectorized NumPy group-bys. Each column is a
+raw binary file that load_snapshot() memory-maps, so loading is near-instant
+and reports never touch the database. A snapshot is a point-in-time copy:
+create a new one to see later writes.
+
+Environment:
+    HABIT_TRACKER_SNAPSHOT_DIR=analytics_snapshot    where the snapshot is written
+"""
+
+import json
+import os
+import shutil
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cached_property
+
+import numpy as np
+
+import db_backend
+import log_archive
+import report_cache
+import streaks
+
+SNAPSHOT_DIR = os.environ.get('HABIT_TRACKER_SNAPSHOT_DIR', 'analytics_snapshot')
+META_NAME = 'meta.json'
+FORMAT_VERSION = 1
+
+# Column name -> dtype. Columns with the same prefix are aligned: one entry
+# per log, habit, user or goal. Days are day numbers (days since 1970-01-01)
+# and log_status uses the status codes of the log archive.
+COLUMNS = {
+    'log_habit': 'int32',
+    'log_day': 'int32',
+    'log_status': 'uint8',
+    'habit_id': 'int32',
+    'habit_user': 'int32',
+    'habit_freq': 'uint8',
+    'user_id': 'int32',
+    'goal_id': 'int32',
+    'goal_habit': 'int32',
+    'goal_deadline': 'int32',
+    'goal_achieved': 'uint8',
+}
+
+STATUSES = log_archive.STATUSES
+COMPLETED = log_archive.STATUS_CODES['Completed']
+FREQUENCIES = tuple(sorted(streaks.FREQUENCY_CODES, key=streaks.FREQUENCY_CODES.get))
+
+
+def _dates(days):
+    """Day numbers to a list of dates; negative days (no date) become None"""
+    days = np.asarray(days, dtype=np.int64)
+    dates = days.astype('datetime64[D]').astype(object)
+    dates[days < 0] = None
+    return dates.tolist()
+
+
+def average_rates(totals, completed):
+    """habit_queries.average_rate for whole arrays, in hundredths of a percent (int64)"""
+    totals = np.asarray(totals, dtype=np.int64)
+    completed = np.asarray(completed, dtype=np.int64)
+    safe = np.maximum(totals, 1)
+    # Half-up rounding to 4 places, then to 2, as in average_rate
+    four_places = (2 * completed * 1000000 + safe) // (2 * safe)
+    return np.where(totals > 0, (four_places + 50) // 100, 0)
+
+
+def _ranked(rates):
+    """Indices ordering rates best first; ties keep their original order"""
+    return np.argsort(-rates, kind='stable')
+
+
+def _percent(hundredths):
+    return Decimal(hundredths).scaleb(-2)
+
+
+class Snapshot:
+    """Memory-mapped columns of one snapshot plus its text columns and metadata"""
+
+    def __init__(self, columns, meta):
+        self.columns = columns
+        self.meta = meta
+        self.user_names = meta['user_names']
+        self.habit_names = meta['habit_names']
+        self.goal_descriptions = meta['goal_descriptions']
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def created_at(self):
+        return self.meta['created_at']
+
+    @cached_property
+    def status_counts(self):
+        """(habits x statuses) log counts, rows aligned with habit_id"""
+        index = np.searchsorted(self.habit_id, self.log_habit).astype(np.int64)
+        cells = np.bincount(index * len(STATUSES) + self.log_status, minlength=len(self.habit_id) * len(STATUSES))
+        return cells.reshape(len(self.habit_id), len(STATUSES))
+
+    @cached_property
+    def habit_user_index(self):
+        """Position in user_id of each habit's owner"""
+        return np.searchsorted(self.user_id, self.habit_user)
+
+
+# --- Creating and loading ---
+
+def _fetch_all(connection, query):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query)
+        return list(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _write_logs(connection, habit_ids, handles, batch_size):
+    """Stream hot then archived logs into the log column files; returns the row count"""
+    def write(habits, days, statuses):
+        known = np.isin(habits, habit_ids)
+        habits[known].astype(COLUMNS['log_habit']).tofile(handles['log_habit'])
+        days[known].astype(COLUMNS['log_day']).tofile(handles['log_day'])
+        statuses[known].astype(COLUMNS['log_status']).tofile(handles['log_status'])
+        return int(known.sum())
+
+    codes = " ".join(f"WHEN '{status}' THEN {code}" for code, status in enumerate(STATUSES))
+    cursor = db_backend.streaming_cursor(connection)
+    count = 0
+    try:
+        cursor.execute(
+            f"SELECT habit_id, DATEDIFF(log_date, '1970-01-01'), CASE status {codes} END FROM Logs"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            count += write(chunk[:, 0], chunk[:, 1], chunk[:, 2])
+    finally:
+        cursor.close()
+    for segment in log_archive.segments(connection):
+        columns = log_archive.read_segment(segment)
+        count += write(np.array(columns['habit_id'], dtype=np.int64),
+                       np.array(columns['day'], dtype=np.int64),
+                       np.array(columns['status'], dtype=np.int64))
+    return count
+
+
+def create_snapshot(connection, directory=None, batch_size=100000):
+    """Write a new snapshot of the database to `directory`, replacing any previous one.
+
+    The snapshot is built in a temporary directory and swapped in at the end,
+    so readers never see a partial snapshot. Returns the snapshot metadata.
+    """
+    directory = directory or SNAPSHOT_DIR
+    users = _fetch_all(connection, "SELECT user_id, name FROM Customer ORDER BY user_id")
+    habits = _fetch_all(connection, "SELECT habit_id, user_id, name, frequency FROM Habit ORDER BY habit_id")
+    goals = _fetch_all(connection, """
+    SELECT goal_id, habit_id, DATEDIFF(deadline, '1970-01-01'), is_achieved, description
+    FROM Goal
+    ORDER BY goal_id
+    """)
+
+    arrays = {
+        'habit_id': [habit[0] for habit in habits],
+        'habit_user': [habit[1] for habit in habits],
+        'habit_freq': [streaks.FREQUENCY_CODES.get(habit[3], 0) for habit in habits],
+        'user_id': [user[0] for user in users],
+        'goal_id': [goal[0] for goal in goals],
+        'goal_habit': [goal[1] for goal in goals],
+        'goal_deadline': [goal[2] for goal in goals],
+        'goal_achieved': [1 if goal[3] else 0 for goal in goals],
+    }
+
+    temp = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+    handles = {name: open(os.path.join(temp, f"{name}.bin"), 'wb') for name in COLUMNS}
+    try:
+        for name, values in arrays.items():
+            np.array(values, dtype=COLUMNS[name]).tofile(handles[name])
+        log_count = _write_logs(connection, np.array(arrays['habit_id'], dtype=np.int64), handles, batch_size)
+    except BaseException:
+        for handle in handles.values():
+            handle.close()
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+    for handle in handles.values():
+        handle.close()
+
+    lengths = {name: len(values) for name, values in arrays.items()}
+    lengths.update(log_habit=log_count, log_day=log_count, log_status=log_count)
+    meta = {
+        'format': FORMAT_VERSION,
+        'database': report_cache.database_key(connection),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'lengths': lengths,
+        'user_names': [user[1] for user in users],
+        'habit_names': [habit[2] for habit in habits],
+        'goal_descriptions': [goal[4] for goal in goals],
+    }
+    with open(os.path.join(temp, META_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle)
+
+    old = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.replace(directory, old)
+    os.replace(temp, directory)
+    # Readers that still map the old files keep them until they close
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+def load_snapshot(directory=None):
+    """Memory-map a snapshot written by create_snapshot()"""
+    directory = directory or SNAPSHOT_DIR
+    with open(os.path.join(directory, META_NAME), encoding='utf-8') as handle:
+        meta = json.load(handle)
+    if meta.get('format') != FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot format {meta.get('format')!r} in {directory}")
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        length = meta['lengths'][name]
+        if length:
+            columns[name] = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode='r', shape=(length,))
+        else:
+            # mmap cannot map an empty file
+            columns[name] = np.zeros(0, dtype=dtype)
+    return Snapshot(columns, meta)
+
+
+# --- Reports ---
+# Each returns the same rows as the habit_queries / streaks function it mirrors.
+
+def completion_counts(snapshot):
+    """Map habit_id -> (total_logs, completed_logs), like habit_queries.get_completion_counts"""
+    counts = snapshot.status_counts
+    totals = counts.sum(axis=1)
+    return {
+        int(habit_id): (int(total), int(completed))
+        for habit_id, total, completed in zip(snapshot.habit_id, totals, counts[:, COMPLETED])
+    }
+
+
+def user_performance(snapshot):
+    """Rows of habit_queries.fetch_user_performance"""
+    counts = snapshot.status_counts
+    totals = counts.sum(axis=1)
+    owner = snapshot.habit_user_index
+    n = len(snapshot.user_id)
+    habits = np.bincount(owner, minlength=n)
+    user_totals = np.bincount(owner, weights=totals, minlength=n).astype(np.int64)
+    user_completed = np.bincount(owner, weights=counts[:, COMPLETED], minlength=n).astype(np.int64)
+    # Same quirk as the SQL report: every habit without logs adds a 0% row to the average
+    empty_habits = np.bincount(owner, weights=totals == 0, minlength=n).astype(np.int64)
+    users = np.flatnonzero(user_totals > 0)
+    rates = average_rates(user_totals[users] + empty_habits[users], user_completed[users])
+    users, rates = users[_ranked(rates)], np.sort(rates)[::-1]
+    names = snapshot.user_names
+    return [
+        (user_id, names[i], count, total, completed, _percent(rate))
+        for i, user_id, count, total, completed, rate in zip(
+            users.tolist(), snapshot.user_id[users].tolist(), habits[users].tolist(),
+            user_totals[users].tolist(), user_completed[users].tolist(), rates.tolist())
+    ]
+
+
+def habit_performance(snapshot):
+    """Rows of habit_queries.fetch_habit_performance"""
+    counts = snapshot.status_counts
+    totals = counts.sum(axis=1)
+    codes = log_archive.STATUS_CODES
+    habits = np.flatnonzero(totals > 0)
+    rates = average_rates(totals[habits], counts[habits, COMPLETED])
+    habits, rates = habits[_ranked(rates)], np.sort(rates)[::-1]
+    names = snapshot.habit_names
+    return [
+        (names[i], total, completed, skipped, pending, _percent(rate))
+        for i, total, completed, skipped, pending, rate in zip(
+            habits.tolist(), totals[habits].tolist(), counts[habits, codes['Completed']].tolist(),
+            counts[habits, codes['Skipped']].tolist(), counts[habits, codes['Pending']].tolist(), rates.tolist())
+    ]
+
+
+def users_above_average(snapshot):
+    """Rows of habit_queries.fetch_users_above_average"""
+    counts = snapshot.status_counts
+    has_logs = counts.sum(axis=1) > 0
+    completed = counts[:, COMPLETED]
+    habits_with_logs = int(has_logs.sum())
+    completed_sum = int(completed[has_logs].sum())
+    n = len(snapshot.user_id)
+    owner = snapshot.habit_user_index[has_logs]
+    user_completed = np.bincount(owner, weights=completed[has_logs], minlength=n).astype(np.int64)
+    user_has_logs = np.bincount(owner, minlength=n) > 0
+    # completed > completed_sum / habits_with_logs, without rounding
+    above = np.flatnonzero(user_has_logs & (user_completed * habits_with_logs > completed_sum))
+    above = above[np.argsort(-user_completed[above], kind='stable')]
+    return [(int(snapshot.user_id[i]), snapshot.user_names[i], int(user_completed[i])) for i in above]
+
+
+def habits_with_goals(snapshot):
+    """Rows of habit_queries.fetch_habits_with_goals"""
+    goal_habit = np.searchsorted(snapshot.habit_id, snapshot.goal_habit)
+    # One row per goal plus one row for every habit without goals (the LEFT JOIN)
+    no_goals = np.flatnonzero(np.bincount(goal_habit, minlength=len(snapshot.habit_id)) == 0)
+    habits = np.concatenate([goal_habit, no_goals])
+    users = snapshot.habit_user_index[habits]
+    padding = [None] * len(no_goals)
+    user_names, habit_names = snapshot.user_names, snapshot.habit_names
+    descriptions = snapshot.goal_descriptions + padding
+    deadlines = _dates(snapshot.goal_deadline) + padding
+    achieved = snapshot.goal_achieved.tolist() + padding
+    rows = [
+        (user_names[user], habit_names[habit], FREQUENCIES[freq], descriptions[i], deadlines[i], achieved[i])
+        for i, (user, habit, freq) in enumerate(zip(users.tolist(), habits.tolist(),
+                                                    snapshot.habit_freq[habits].tolist()))
+    ]
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return rows
+
+
+def overdue_goals(snapshot, today=None):
+    """Rows of habit_queries.fetch_overdue_goals"""
+    today_day = streaks.day_number(today or date.today())
+    overdue = np.flatnonzero((snapshot.goal_deadline < today_day) & (snapshot.goal_achieved == 0))
+    days_overdue = today_day - snapshot.goal_deadline[overdue].astype(np.int64)
+    overdue, days_overdue = overdue[np.argsort(-days_overdue, kind='stable')], np.sort(days_overdue)[::-1]
+    users = snapshot.habit_user_index[np.searchsorted(snapshot.habit_id, snapshot.goal_habit[overdue])]
+    user_names, descriptions = snapshot.user_names, snapshot.goal_descriptions
+    return [
+        (user_id, user_names[user], goal_id, descriptions[goal], deadline, days)
+        for user, user_id, goal, goal_id, deadline, days in zip(
+            users.tolist(), snapshot.user_id[users].tolist(), overdue.tolist(),
+            snapshot.goal_id[overdue].tolist(), _dates(snapshot.goal_deadline[overdue]), days_overdue.tolist())
+    ]
+
+
+def habit_streaks(snapshot, today=None):
+    """Streak tuples of streaks.all_streaks"""
+    completed = snapshot.log_status == COMPLETED
+    current, longest, current_breaks, longest_broke = streaks.compute_streaks(
+        snapshot.log_habit[completed], snapshot.log_day[completed],
+        snapshot.habit_id, snapshot.habit_freq, today,
+    )
+    return [
+        streaks.Streak(habit_id, user_id, name, FREQUENCIES[freq], now, best, breaks, broke)
+        for habit_id, user_id, name, freq, now, best, breaks, broke in zip(
+            snapshot.habit_id.tolist(), snapshot.habit_user.tolist(), snapshot.habit_names,
+            snapshot.habit_freq.tolist(), current.tolist(), longest.tolist(),
+            _dates(current_breaks), _dates(longest_broke))
+    ]
+
+
+# Report name (as in habit_cli.REPORTS) -> function of a Snapshot
+REPORTS = {
+    'users': user_performance,
+    'habits': habit_performance,
+    'above-average': users_above_average,
+    'goals': habits_with_goals,
+    'overdue': overdue_goals,
+    'streaks': habit_streaks,
+}
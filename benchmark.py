@@ -0,0 +1,427 @@
+"""
+Personal Habit Tracker - Benchmark Suite
+Generates synthetic data at each scale factor (see data_generator.py), then
+times every report and write path and records p50 / p95 latency and peak
+Python memory per operation. Results are written as JSON so runs from
+different versions can be compared.
+
+Usage:
+    python benchmark.py --scales 1,10,100 --repeat 7
+    python benchmark.py --compare benchmark_results/old.json benchmark_results/new.json
+    python benchmark.py --startup
+
+With the SQLite backend every scale gets a fresh database file. With MySQL
+the generated rows are added to the configured database, so later scales
+include the earlier data; the recorded row counts show the actual sizes.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import db_backend
+import data_generator
+import habit_queries
+import habit_summary
+
+RESULTS_DIR = 'benchmark_results'
+# Days per habit in the batch write operations
+BATCH_DAYS = 30
+
+# Cold start of one scripted report (new interpreter, connect, query, JSON output)
+STARTUP_BUDGET_MS = 150
+STARTUP_COMMAND = ['habit_cli.py', 'report', 'habits', '--format', 'json']
+# Modules a scripted run must not load
+STARTUP_FORBIDDEN_MODULES = ('tkinter', 'tabulate')
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class BenchContext:
+    """Row IDs and counters shared by the write-path operations"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT h.habit_id, h.start_date FROM Habit h "
+            "JOIN HabitSummary hs ON hs.habit_id = h.habit_id "
+            "ORDER BY hs.total_logs DESC LIMIT 1"
+        )
+        row = cursor.fetchone()
+        self.habit_id, self.habit_start = row if row else (None, None)
+        cursor.execute("SELECT MAX(log_id) FROM Logs WHERE habit_id = %s", (self.habit_id,))
+        self.log_id = cursor.fetchone()[0]
+        cursor.execute("SELECT MAX(goal_id) FROM Goal")
+        self.goal_id = cursor.fetchone()[0]
+        # (habit_id, day) of the last BATCH_DAYS days of the busiest habits, for the batch writes
+        cursor.execute(
+            "SELECT h.habit_id, h.start_date FROM Habit h "
+            "JOIN HabitSummary hs ON hs.habit_id = h.habit_id "
+            "ORDER BY hs.total_logs DESC, h.habit_id"
+        )
+        today = date.today()
+        self.batch_slots = []
+        for habit_id, start_date in cursor.fetchall():
+            start_date = date.fromisoformat(str(start_date)[:10])
+            self.batch_slots += [(habit_id, day) for day in
+                                 (today - timedelta(days=i) for i in range(BATCH_DAYS)) if day >= start_date]
+            if len(self.batch_slots) >= 1000:
+                break
+        cursor.close()
+        self.toggle = False
+        self.snapshot_dir = os.path.join(tempfile.gettempdir(), f"habit_bench_snapshot_{os.getpid()}")
+        self.wal_dir = os.path.join(tempfile.gettempdir(), f"habit_bench_wal_{os.getpid()}")
+        self.log_writer = None
+
+
+def _consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def _op_upsert_log(ctx):
+    ctx.toggle = not ctx.toggle
+    habit_queries.upsert_log(ctx.connection, ctx.habit_id, date.today(), 'Pending' if ctx.toggle else 'Completed',
+                             'bench')
+
+
+def _op_update_log_status(ctx):
+    ctx.toggle = not ctx.toggle
+    habit_queries.set_log_status(ctx.connection, ctx.log_id, 'Skipped' if ctx.toggle else 'Completed')
+
+
+def _op_mark_goal_achieved(ctx):
+    cursor = ctx.connection.cursor()
+    cursor.callproc('MarkGoalAchieved', [ctx.goal_id])
+    cursor.fetchall()
+    ctx.connection.commit()
+    cursor.close()
+
+
+def _op_leaderboard(ctx):
+    import leaderboard
+    board = leaderboard.get(ctx.connection)
+    return board.top('users', 'rate', 10), board.rank('habits', ctx.habit_id, 'completed')
+
+
+def _op_heatmap(ctx):
+    import day_bitmaps
+    bitmaps = day_bitmaps.get(ctx.connection)
+    today = date.today()
+    year_ago = today - timedelta(days=364)
+    return bitmaps.heatmap(ctx.habit_id, year_ago, today), bitmaps.count(ctx.habit_id, year_ago, today)
+
+
+def _op_evaluate_goals(ctx):
+    import goal_evaluation
+    return goal_evaluation.evaluate_goals(ctx.connection, dry_run=True)
+
+
+def _op_batch_upsert_logs(ctx, size=1000):
+    ctx.toggle = not ctx.toggle
+    status = 'Skipped' if ctx.toggle else 'Completed'
+    habit_queries.upsert_logs(ctx.connection, [(habit_id, day, status, 'bench')
+                                               for habit_id, day in ctx.batch_slots[:size]])
+
+
+def _op_buffered_upsert_logs(ctx, size=1000):
+    """1000 log appends through the write-behind WAL and one group commit"""
+    import log_writer
+    if ctx.log_writer is None:
+        ctx.log_writer = log_writer.LogWriter(lambda: ctx.connection, ctx.wal_dir, batch_size=size + 1)
+    ctx.toggle = not ctx.toggle
+    for habit_id, day in ctx.batch_slots[:size]:
+        ctx.log_writer.append(habit_id, day, 'Skipped' if ctx.toggle else 'Completed', 'bench')
+    ctx.log_writer.flush()
+
+
+def _op_streaks(ctx):
+    import streaks
+    return streaks.all_streaks(ctx.connection)
+
+
+def _op_snapshot_create(ctx):
+    import analytics
+    analytics.create_snapshot(ctx.connection, ctx.snapshot_dir)
+
+
+def _op_snapshot_reports(ctx):
+    """Load the snapshot and run every report on it"""
+    import analytics
+    if not os.path.exists(ctx.snapshot_dir):
+        analytics.create_snapshot(ctx.connection, ctx.snapshot_dir)
+    snapshot = analytics.load_snapshot(ctx.snapshot_dir)
+    for report in analytics.REPORTS.values():
+        report(snapshot)
+
+
+# (name, kind, callable taking the BenchContext)
+OPERATIONS = [
+    # Report timings bypass the report cache so they measure the database work
+    ('user_performance_summary', 'report', lambda ctx: habit_queries.fetch_user_performance.__wrapped__(ctx.connection)),
+    ('habit_performance_report', 'report', lambda ctx: habit_queries.fetch_habit_performance.__wrapped__(ctx.connection)),
+    ('users_above_average', 'report', lambda ctx: habit_queries.fetch_users_above_average.__wrapped__(ctx.connection)),
+    ('habits_with_goals', 'report', lambda ctx: habit_queries.fetch_habits_with_goals.__wrapped__(ctx.connection)),
+    ('overdue_goals', 'report', lambda ctx: habit_queries.fetch_overdue_goals.__wrapped__(ctx.connection)),
+    ('user_performance_cached', 'report', lambda ctx: habit_queries.fetch_user_performance(ctx.connection)),
+    ('habits_with_goals_cached', 'report', lambda ctx: habit_queries.fetch_habits_with_goals(ctx.connection)),
+    ('view_all_logs', 'report', lambda ctx: habit_queries.fetch_recent_logs(ctx.connection, 50)),
+    ('completion_rates_all', 'report', lambda ctx: habit_queries.get_completion_rates(ctx.connection)),
+    ('log_page_busiest_habit', 'report', lambda ctx: habit_queries.fetch_log_page(ctx.connection, ctx.habit_id)),
+    ('stream_logs_busiest_habit', 'report', lambda ctx: _consume(habit_queries.iter_logs(ctx.connection, ctx.habit_id))),
+    ('habit_streaks', 'report', _op_streaks),
+    ('check_summaries', 'report', lambda ctx: habit_summary.check_summaries(ctx.connection)),
+    ('evaluate_goal_targets', 'report', _op_evaluate_goals),
+    ('leaderboard_top10_and_rank', 'report', _op_leaderboard),
+    ('habit_heatmap_year', 'report', _op_heatmap),
+    ('snapshot_create', 'report', _op_snapshot_create),
+    ('snapshot_all_reports', 'report', _op_snapshot_reports),
+    ('add_log', 'write', _op_upsert_log),
+    ('update_log_status', 'write', _op_update_log_status),
+    ('mark_goal_achieved', 'write', _op_mark_goal_achieved),
+    ('batch_upsert_1000_logs', 'write', _op_batch_upsert_logs),
+    ('buffered_upsert_1000_logs', 'write', _op_buffered_upsert_logs),
+]
+
+
+def time_operation(func, ctx, repeat, warmup=1):
+    """Latency percentiles over `repeat` runs plus peak memory of one traced run"""
+    for _ in range(warmup):
+        func(ctx)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(ctx)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        func(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': repeat,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'mean_ms': round(sum(samples) / len(samples), 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def table_counts(connection):
+    cursor = connection.cursor()
+    counts = {}
+    for table in ('Customer', 'Habit', 'Goal', 'Logs'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    cursor.close()
+    return counts
+
+
+def run_scale(connection, scale, options, log=print):
+    """Generate data for one scale factor and time every operation"""
+    log(f"[scale {scale}] generating data...")
+    started = time.perf_counter()
+    inserted = data_generator.generate(connection, scale, options.seed, options.history_days)
+    generate_seconds = time.perf_counter() - started
+    counts = table_counts(connection)
+    log(f"[scale {scale}] inserted {inserted} in {generate_seconds:.1f}s; tables now {counts}")
+
+    ctx = BenchContext(connection)
+    operations = {}
+    for name, kind, func in OPERATIONS:
+        if options.only and name not in options.only:
+            continue
+        try:
+            result = time_operation(func, ctx, options.repeat)
+        except ImportError as e:
+            log(f"[scale {scale}] skipping {name}: {e}")
+            continue
+        result['kind'] = kind
+        operations[name] = result
+        log(f"[scale {scale}] {name:<28} p50 {result['p50_ms']:>10.3f} ms  "
+            f"p95 {result['p95_ms']:>10.3f} ms  peak {result['peak_kib']:>10.1f} KiB")
+    shutil.rmtree(ctx.snapshot_dir, ignore_errors=True)
+    shutil.rmtree(ctx.wal_dir, ignore_errors=True)
+
+    return {
+        'scale': scale,
+        'rows': counts,
+        'generated_rows': inserted,
+        'generate_seconds': round(generate_seconds, 3),
+        'generate_rows_per_second': round(sum(inserted.values()) / generate_seconds, 1) if generate_seconds else None,
+        'operations': operations,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(options):
+    backend = options.backend or db_backend.BACKEND
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'backend': backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': options.seed,
+        'history_days': options.history_days,
+        'repeat': options.repeat,
+        'scales': [],
+    }
+
+    for scale in options.scales:
+        if backend == 'sqlite':
+            workdir = options.workdir or tempfile.gettempdir()
+            os.makedirs(workdir, exist_ok=True)
+            path = os.path.join(workdir, f"habit_bench_scale_{scale}.db")
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            db_backend.SQLITE_PATH = path
+        connection = db_backend.connect(backend)
+        try:
+            results['scales'].append(run_scale(connection, scale, options))
+        finally:
+            connection.close()
+        if backend == 'sqlite' and not options.keep:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    output = options.output or os.path.join(
+        RESULTS_DIR, f"bench-{backend}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"Results written to {output}")
+    return results
+
+
+def compare_results(old_path, new_path, threshold=1.2):
+    """Print p50/p95 ratios between two result files; returns the regressions"""
+    from tabulate import tabulate
+
+    with open(old_path, encoding='utf-8') as handle:
+        old = {entry['scale']: entry for entry in json.load(handle)['scales']}
+    with open(new_path, encoding='utf-8') as handle:
+        new = {entry['scale']: entry for entry in json.load(handle)['scales']}
+
+    rows, regressions = [], []
+    for scale in sorted(old.keys() & new.keys()):
+        old_ops, new_ops = old[scale]['operations'], new[scale]['operations']
+        for name in old_ops.keys() & new_ops.keys():
+            ratio = new_ops[name]['p50_ms'] / old_ops[name]['p50_ms'] if old_ops[name]['p50_ms'] else float('inf')
+            flag = 'REGRESSION' if ratio > threshold else ('faster' if ratio < 1 / threshold else '')
+            row = (scale, name, old_ops[name]['p50_ms'], new_ops[name]['p50_ms'], round(ratio, 2),
+                   old_ops[name]['p95_ms'], new_ops[name]['p95_ms'], flag)
+            rows.append(row)
+            if flag == 'REGRESSION':
+                regressions.append(row)
+    rows.sort(key=lambda row: (row[0], row[1]))
+    print(tabulate(rows, headers=["Scale", "Operation", "Old p50", "New p50", "Ratio",
+                                  "Old p95", "New p95", ""], tablefmt="grid"))
+    return regressions
+
+
+def measure_startup(repeat=10, budget_ms=STARTUP_BUDGET_MS, backend=None):
+    """Time STARTUP_COMMAND in fresh interpreters; returns True if within budget"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, HABIT_TRACKER_BACKEND=backend or db_backend.BACKEND)
+    if env['HABIT_TRACKER_BACKEND'] == 'sqlite':
+        env['HABIT_TRACKER_SQLITE_PATH'] = os.path.join(tempfile.gettempdir(), 'habit_bench_startup.db')
+
+    check = ("import sys, personal_habit_tracker, habit_cli; "
+             f"print(','.join(m for m in {STARTUP_FORBIDDEN_MODULES!r} if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=here, env=env,
+                            capture_output=True, text=True, check=True).stdout.strip()
+
+    command = [sys.executable] + STARTUP_COMMAND
+    # The first run creates the SQLite schema and warms the OS file cache
+    subprocess.run(command, cwd=here, env=env, stdout=subprocess.DEVNULL, check=True)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=here, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    p50, p95 = percentile(samples, 50), percentile(samples, 95)
+    print(f"startup: {' '.join(STARTUP_COMMAND)}")
+    print(f"p50 {p50:.1f} ms  p95 {p95:.1f} ms  budget {budget_ms:.0f} ms (p50)")
+    if loaded:
+        print(f"FAIL: importing the application loads {loaded}")
+    if p50 > budget_ms:
+        print("FAIL: cold start is over budget")
+    return not loaded and p50 <= budget_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Personal Habit Tracker benchmark suite")
+    parser.add_argument('--scales', default='1,10', help="comma-separated scale factors (1 = 100 users)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per operation")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="defaults to HABIT_TRACKER_BACKEND")
+    parser.add_argument('--only', help="comma-separated operation names to run")
+    parser.add_argument('--workdir', help="directory for SQLite benchmark databases")
+    parser.add_argument('--keep', action='store_true', help="keep the SQLite benchmark databases")
+    parser.add_argument('--output', help="result file (default benchmark_results/bench-<backend>-<time>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two result files")
+    parser.add_argument('--threshold', type=float, default=1.2, help="p50 ratio reported as a regression")
+    parser.add_argument('--startup', action='store_true', help="measure CLI cold start against the budget")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS, help="cold-start budget in ms")
+    options = parser.parse_args(argv)
+
+    if options.startup:
+        try:
+            within_budget = measure_startup(options.repeat, options.startup_budget, options.backend)
+        except subprocess.CalledProcessError as e:
+            print(f"Startup check failed: {e}", file=sys.stderr)
+            return 1
+        return 0 if within_budget else 1
+
+    if options.compare:
+        regressions = compare_results(*options.compare, threshold=options.threshold)
+        return 1 if regressions else 0
+
+    options.scales = [float(value) if '.' in value else int(value) for value in options.scales.split(',')]
+    options.only = set(options.only.split(',')) if options.only else None
+    try:
+        run_benchmarks(options)
+    except db_backend.Error as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
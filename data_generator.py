@@ -0,0 +1,171 @@
+"""
+Personal Habit Tracker - Synthetic Data Generator
+Produces realistic Customer / Habit / Goal / Logs data at a configurable
+scale factor. The same seed always produces the same data.
+
+Scale factor 1 is 100 users with 1-5 habits each and up to `history_days`
+of logs per habit: Daily habits are logged on most days, Weekly habits once
+a week and Monthly habits once a month. Each user has an adherence level
+that drives how many logs are Completed rather than Skipped or Pending.
+Every goal targets completing its habit in half of the periods up to the
+deadline.
+"""
+
+import random
+from datetime import date, timedelta
+
+import day_bitmaps
+import goal_scheduler
+import leaderboard
+import report_cache
+
+USERS_PER_SCALE = 100
+
+FIRST_NAMES = ['Aarav', 'Emma', 'Liam', 'Priya', 'Noah', 'Olivia', 'Kavya', 'Mateo',
+               'Sofia', 'Arjun', 'Mia', 'Lucas', 'Ananya', 'Ethan', 'Zara', 'Rohan']
+LAST_NAMES = ['Sharma', 'Smith', 'Patel', 'Garcia', 'Brown', 'Iyer', 'Wilson',
+              'Khan', 'Lopez', 'Joshi', 'Martin', 'Reddy', 'Clark', 'Jain']
+HABIT_NAMES = ['Morning Workout', 'Drink Water', 'Read Books', 'Meditation',
+               'Code Practice', 'Language Learning', 'Dancing', 'Journaling',
+               'Evening Walk', 'Sleep by 11', 'No Sugar', 'Stretching',
+               'Weekly Review', 'Budget Check', 'Call Family', 'Deep Clean']
+GOAL_TEMPLATES = ['Keep up {habit} every day for a month',
+                  'Complete {habit} 50 times before the deadline',
+                  'Build a {habit} streak of two weeks',
+                  'Make {habit} a routine for the whole quarter']
+NOTES = ['', '', '', 'Felt great', 'Short session today', 'Hard but done',
+         'Missed the morning slot', 'Did it with a friend', 'Travelling']
+
+FREQUENCIES = ['Daily', 'Weekly', 'Monthly']
+FREQUENCY_WEIGHTS = [0.6, 0.3, 0.1]
+PERIOD_DAYS = {'Daily': 1, 'Weekly': 7, 'Monthly': 30}
+
+_INSERTS = {
+    'Customer': "INSERT INTO Customer (user_id, email, name, password, phone_no) VALUES (%s, %s, %s, %s, %s)",
+    'Habit': "INSERT INTO Habit (habit_id, user_id, name, start_date, frequency, is_active) VALUES (%s, %s, %s, %s, %s, %s)",
+    'Goal': "INSERT INTO Goal (goal_id, habit_id, deadline, description, is_achieved, target_count) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+    'Logs': "INSERT INTO Logs (log_id, habit_id, log_date, notes, status) VALUES (%s, %s, %s, %s, %s)",
+}
+# Parents before children so foreign keys and the log trigger are satisfied
+_TABLE_ORDER = ('Customer', 'Habit', 'Goal', 'Logs')
+
+
+def _next_ids(connection):
+    """First free ID in each table so generated rows never collide"""
+    cursor = connection.cursor()
+    ids = {}
+    try:
+        for table, column in (('Customer', 'user_id'), ('Habit', 'habit_id'),
+                              ('Goal', 'goal_id'), ('Logs', 'log_id')):
+            cursor.execute(f"SELECT MAX({column}) FROM {table}")
+            ids[table] = (cursor.fetchone()[0] or 0) + 1
+    finally:
+        cursor.close()
+    return ids
+
+
+def _log_days(rng, frequency, start, end):
+    """Dates on which a habit of this frequency gets a log"""
+    day = start
+    if frequency == 'Daily':
+        while day <= end:
+            if rng.random() < 0.85:
+                yield day
+            day += timedelta(days=1)
+    elif frequency == 'Weekly':
+        while day <= end:
+            logged = day + timedelta(days=rng.randint(0, 6))
+            if logged <= end and rng.random() < 0.9:
+                yield logged
+            day += timedelta(days=7)
+    else:
+        while day <= end:
+            next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+            # Stay inside this month: one log per (habit, day) at most
+            logged = day + timedelta(days=rng.randint(0, min(27, (next_month - day).days - 1)))
+            if logged <= end and rng.random() < 0.9:
+                yield logged
+            day = next_month
+
+
+def generate_rows(scale=1.0, seed=42, history_days=365, end_date=None, first_ids=None):
+    """Yield (table, row) pairs, parents before their children"""
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    ids = dict(first_ids or {'Customer': 1, 'Habit': 1, 'Goal': 1, 'Logs': 1})
+
+    for _ in range(max(1, int(USERS_PER_SCALE * scale))):
+        user_id = ids['Customer']
+        ids['Customer'] += 1
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield 'Customer', (user_id, f"{first.lower()}.{last.lower()}.{user_id}@example.com",
+                           f"{first} {last}", f"hashed_{rng.getrandbits(48):012x}",
+                           f"9{rng.randint(0, 999999999):09d}")
+        adherence = rng.betavariate(4, 2)
+
+        for habit_name in rng.sample(HABIT_NAMES, rng.randint(1, 5)):
+            habit_id = ids['Habit']
+            ids['Habit'] += 1
+            frequency = rng.choices(FREQUENCIES, FREQUENCY_WEIGHTS)[0]
+            start = end_date - timedelta(days=rng.randint(14, history_days))
+            yield 'Habit', (habit_id, user_id, habit_name, start, frequency, rng.random() < 0.9)
+
+            for _ in range(rng.choices([0, 1, 2], [0.3, 0.5, 0.2])[0]):
+                deadline = start + timedelta(days=rng.randint(30, 365))
+                achieved = deadline < end_date and rng.random() < adherence * 0.8
+                target = max(1, (deadline - start).days // PERIOD_DAYS[frequency] // 2)
+                yield 'Goal', (ids['Goal'], habit_id, deadline,
+                               rng.choice(GOAL_TEMPLATES).format(habit=habit_name.lower()), achieved, target)
+                ids['Goal'] += 1
+
+            for log_date in _log_days(rng, frequency, start, end_date):
+                roll = rng.random()
+                if (end_date - log_date).days < 3 and roll > adherence:
+                    status = 'Pending'
+                elif roll < adherence:
+                    status = 'Completed'
+                else:
+                    status = 'Skipped' if rng.random() < 0.7 else 'Pending'
+                yield 'Logs', (ids['Logs'], habit_id, log_date, rng.choice(NOTES), status)
+                ids['Logs'] += 1
+
+
+def generate(connection, scale=1.0, seed=42, history_days=365, end_date=None,
+             batch_size=5000, progress=None):
+    """Insert generated data through the normal tables (and triggers).
+
+    Rows are buffered per table and flushed parents-first with executemany,
+    committing once per flush. Returns the number of rows inserted per table.
+    """
+    counts = dict.fromkeys(_TABLE_ORDER, 0)
+    buffers = {table: [] for table in _TABLE_ORDER}
+    cursor = connection.cursor()
+
+    def flush():
+        for table in _TABLE_ORDER:
+            if buffers[table]:
+                cursor.executemany(_INSERTS[table], buffers[table])
+                counts[table] += len(buffers[table])
+                buffers[table].clear()
+        connection.commit()
+        report_cache.invalidate()
+        goal_scheduler.goals_changed(connection)
+        leaderboard.leaderboards_changed(connection)
+        day_bitmaps.bitmaps_changed(connection)
+        if progress:
+            progress(counts)
+
+    try:
+        rows = generate_rows(scale, seed, history_days, end_date, _next_ids(connection))
+        for table, row in rows:
+            buffers[table].append(row)
+            if len(buffers[table]) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return counts
@@ -0,0 +1,415 @@
+"""
+Personal Habit Tracker - Day Bitmaps
+Keeps two bitmaps per habit, one bit per day from its start date: one for
+days with a Completed log and one for days with a Skipped log (Logs holds at
+most one log per habit and day). Calendar heatmaps, "done on day X?" lookups
+and counts over a date range then read a few bytes instead of scanning Logs;
+a year of one habit takes 92 bytes. Bit i of a bitmap is day first_day + i
+(day numbers count days since 1970-01-01), least significant bit first.
+
+One index per database is loaded on first use (get()) from a gzip snapshot
+file, checked against HabitSummary and the log archive: a habit whose set
+bits no longer match its completed and skipped log counts is rebuilt from
+Logs, and the snapshot is rewritten. Write paths keep a loaded index current
+by setting the bits of the days they wrote; deletes and bulk loads mark it
+stale so the next get() reloads. A change made by another process that
+leaves a habit's counts unchanged (one day un-completed, another completed)
+is only picked up by rebuild().
+
+Environment:
+    HABIT_TRACKER_BITMAP_DIR=day_bitmaps    where snapshots are written
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import namedtuple
+from datetime import date, timedelta
+
+import db_backend
+import log_archive
+import report_cache
+
+BITMAP_DIR = os.environ.get('HABIT_TRACKER_BITMAP_DIR', 'day_bitmaps')
+FORMAT_VERSION = 1
+
+EPOCH = date(1970, 1, 1)
+# Statuses with a bitmap; a Pending log leaves both bits clear
+STATUSES = ('Completed', 'Skipped')
+STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+
+# Rebuilding more habits than this scans Logs instead of one IN (...) query
+IN_CHUNK_SIZE = 1000
+FETCH_SIZE = 100000
+
+# rows[weekday][week] (Monday = 0) is the number of habits with the status
+# that day, or None outside first_day..last_day; week 0 starts on week_start
+Heatmap = namedtuple('Heatmap', ['first_day', 'last_day', 'week_start', 'rows'])
+
+_HABIT_QUERY = """
+SELECT h.habit_id, DATEDIFF(h.start_date, '1970-01-01'),
+       COALESCE(hs.completed_logs, 0), COALESCE(hs.skipped_logs, 0)
+FROM Habit h
+LEFT JOIN HabitSummary hs ON hs.habit_id = h.habit_id
+"""
+
+_LOG_DAYS_QUERY = """
+SELECT l.habit_id, DATEDIFF(l.log_date, '1970-01-01'), l.status
+FROM Logs l
+WHERE l.status <> 'Pending'
+"""
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def day_number(value):
+    """Days since 1970-01-01 for a date or an ISO date string"""
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return (value - EPOCH).days
+
+
+def _popcount(data):
+    return bin(int.from_bytes(data, 'little')).count('1')
+
+
+class HabitDays:
+    """The Completed and Skipped bitmaps of one habit"""
+
+    __slots__ = ('first_day', 'bitmaps')
+
+    def __init__(self, first_day, bitmaps=None):
+        self.first_day = first_day
+        self.bitmaps = bitmaps or [bytearray() for _ in STATUSES]
+
+    def _grow(self, day):
+        """Extend both bitmaps to cover `day`"""
+        if day < self.first_day:
+            # Whole bytes at the front keep the existing bits in place
+            extra = (self.first_day - day + 7) // 8
+            for bitmap in self.bitmaps:
+                bitmap[:0] = bytes(extra)
+            self.first_day -= extra * 8
+        size = (day - self.first_day) // 8 + 1
+        for bitmap in self.bitmaps:
+            if len(bitmap) < size:
+                bitmap.extend(bytes(size - len(bitmap)))
+
+    def set(self, day, status):
+        """Record the status of the habit's log on a day; Pending clears both bits"""
+        index = STATUS_INDEX.get(status)
+        if index is None and self.status_on(day) is None:
+            return
+        self._grow(day)
+        offset = day - self.first_day
+        position, mask = offset >> 3, 1 << (offset & 7)
+        for i, bitmap in enumerate(self.bitmaps):
+            if i == index:
+                bitmap[position] |= mask
+            else:
+                bitmap[position] &= ~mask & 0xFF
+
+    def status_on(self, day):
+        """'Completed', 'Skipped' or None"""
+        offset = day - self.first_day
+        if offset < 0 or offset >> 3 >= len(self.bitmaps[0]):
+            return None
+        mask = 1 << (offset & 7)
+        for status, bitmap in zip(STATUSES, self.bitmaps):
+            if bitmap[offset >> 3] & mask:
+                return status
+        return None
+
+    def window(self, status, first, last):
+        """Bits of days first..last (inclusive) as an int; bit 0 is day `first`"""
+        bitmap = self.bitmaps[STATUS_INDEX[status]]
+        low = max(first - self.first_day, 0)
+        high = min(last - self.first_day + 1, len(bitmap) * 8)
+        if low >= high:
+            return 0
+        bits = int.from_bytes(bitmap[low >> 3:(high + 7) >> 3], 'little') >> (low & 7)
+        bits &= (1 << (high - low)) - 1
+        return bits << (self.first_day + low - first)
+
+    def counts(self):
+        """(completed days, skipped days)"""
+        return tuple(_popcount(bitmap) for bitmap in self.bitmaps)
+
+    @property
+    def nbytes(self):
+        return sum(len(bitmap) for bitmap in self.bitmaps)
+
+
+class DayBitmaps:
+    """Completed and Skipped days of every habit of one database"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or BITMAP_DIR
+        self._lock = threading.RLock()
+        # habit_id -> HabitDays
+        self._habits = {}
+        self._stale = True
+        self._generation = 0
+        self.updates = 0
+        self.reloads = 0
+        self.rebuilt = 0
+
+    @property
+    def stale(self):
+        return self._stale
+
+    # --- Loading, persistence and updates ---
+
+    def load(self, connection, rebuild=False):
+        """Load the snapshot and rebuild the habits whose counts no longer match it"""
+        with self._lock:
+            generation = self._generation
+        path = _snapshot_path(self.directory, connection)
+        saved = {} if rebuild else _read_snapshot(path, _database_id(connection))
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_HABIT_QUERY)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        archived = log_archive.habit_totals(connection)
+        habits, changed = {}, []
+        for habit_id, start_day, completed, skipped in rows:
+            archived_counts = archived.get(habit_id, (0, 0, 0, 0))
+            expected = (int(completed) + archived_counts[1], int(skipped) + archived_counts[2])
+            days = saved.get(habit_id)
+            if days is None or days.counts() != expected:
+                days = HabitDays(int(start_day))
+                changed.append(habit_id)
+            habits[habit_id] = days
+        if changed:
+            _fill(connection, habits, changed)
+        with self._lock:
+            self._habits = habits
+            self._stale = self._generation != generation
+            self.reloads += 1
+            self.rebuilt += len(changed)
+        if changed or len(saved) != len(habits):
+            self.save(connection)
+
+    def save(self, connection):
+        """Write the snapshot, replacing the previous one atomically"""
+        with self._lock:
+            habits = [(habit_id, days.first_day, [bytes(bitmap) for bitmap in days.bitmaps])
+                      for habit_id, days in self._habits.items()]
+        header = {
+            'version': FORMAT_VERSION,
+            'database': _database_id(connection),
+            'habits': [[habit_id, first_day, len(bitmaps[0])] for habit_id, first_day, bitmaps in habits],
+        }
+        path = _snapshot_path(self.directory, connection)
+        os.makedirs(self.directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp, 'wb') as handle:
+            handle.write(json.dumps(header).encode('utf-8') + b'\n')
+            for _, _, bitmaps in habits:
+                for bitmap in bitmaps:
+                    handle.write(bitmap)
+        os.replace(temp, path)
+        return path
+
+    def set_days(self, logs):
+        """Apply (habit_id, log_date, status) of committed log writes"""
+        with self._lock:
+            self._generation += 1
+            for habit_id, log_date, status in logs:
+                day = day_number(log_date)
+                days = self._habits.get(habit_id)
+                if days is None:
+                    days = self._habits[habit_id] = HabitDays(day)
+                days.set(day, status)
+                self.updates += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    # --- Queries (dates are datetime.date) ---
+
+    def __contains__(self, habit_id):
+        return habit_id in self._habits
+
+    def status_on(self, habit_id, day):
+        """Status of the habit's log on a day: 'Completed', 'Skipped' or None"""
+        with self._lock:
+            days = self._habits.get(habit_id)
+            return days.status_on(day_number(day)) if days is not None else None
+
+    def done_on(self, habit_id, day):
+        return self.status_on(habit_id, day) == 'Completed'
+
+    def count(self, habit_id, date_from, date_to, status='Completed'):
+        """Days from date_from to date_to (inclusive) with the status"""
+        with self._lock:
+            days = self._habits.get(habit_id)
+            if days is None:
+                return 0
+            return bin(days.window(status, day_number(date_from), day_number(date_to))).count('1')
+
+    def heatmap(self, habit_ids, date_from, date_to, status='Completed'):
+        """Heatmap of date_from..date_to for one habit ID or summed over several"""
+        if isinstance(habit_ids, int):
+            habit_ids = [habit_ids]
+        first, last = day_number(date_from), day_number(date_to)
+        counts = [0] * max(last - first + 1, 0)
+        with self._lock:
+            windows = [self._habits[habit_id].window(status, first, last)
+                       for habit_id in habit_ids if habit_id in self._habits]
+        for bits in windows:
+            while bits:
+                lowest = bits & -bits
+                counts[lowest.bit_length() - 1] += 1
+                bits ^= lowest
+        # 1970-01-01 was a Thursday
+        week_start = first - (first + 3) % 7
+        weeks = (last - week_start) // 7 + 1 if counts else 0
+        rows = [[None] * weeks for _ in range(7)]
+        for offset, count in enumerate(counts):
+            day = first + offset
+            rows[(day + 3) % 7][(day - week_start) // 7] = count
+        return Heatmap(date_from, date_to, EPOCH + timedelta(days=week_start), rows)
+
+    def __len__(self):
+        return len(self._habits)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'habits': len(self._habits),
+                'bytes': sum(days.nbytes for days in self._habits.values()),
+                'updates': self.updates,
+                'reloads': self.reloads,
+                'rebuilt': self.rebuilt,
+                'stale': self._stale,
+            }
+
+
+# --- Snapshot files ---
+
+def _database_id(connection):
+    return json.dumps(report_cache.database_key(connection), default=str)
+
+
+def _snapshot_path(directory, connection):
+    digest = hashlib.sha1(_database_id(connection).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, f"bitmaps-{digest}.gz")
+
+
+def _read_snapshot(path, database):
+    """habit_id -> HabitDays from a snapshot; empty when missing, damaged or for another database"""
+    try:
+        with gzip.open(path, 'rb') as handle:
+            header = json.loads(handle.readline())
+            if header.get('version') != FORMAT_VERSION or header.get('database') != database:
+                return {}
+            habits = {}
+            for habit_id, first_day, size in header['habits']:
+                bitmaps = [bytearray(handle.read(size)) for _ in STATUSES]
+                if any(len(bitmap) != size for bitmap in bitmaps):
+                    return {}
+                habits[habit_id] = HabitDays(first_day, bitmaps)
+            return habits
+    except (OSError, EOFError, ValueError, KeyError, zlib.error):
+        return {}
+
+
+def _fill(connection, habits, habit_ids):
+    """Set the bits of the given habits from the archive, then from Logs"""
+    wanted = set(habit_ids)
+    archived_habits, archived_days, archived_statuses = log_archive.logged_days(connection, STATUSES)
+    for habit_id, day, code in zip(archived_habits, archived_days, archived_statuses):
+        if habit_id in wanted:
+            habits[habit_id].set(day, log_archive.STATUSES[code])
+    if len(wanted) <= IN_CHUNK_SIZE:
+        placeholders = ', '.join(['%s'] * len(wanted))
+        query, params = f"{_LOG_DAYS_QUERY} AND l.habit_id IN ({placeholders})", tuple(wanted)
+    else:
+        query, params = _LOG_DAYS_QUERY, None
+    cursor = db_backend.streaming_cursor(connection)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for habit_id, day, status in rows:
+                if habit_id in wanted:
+                    habits[habit_id].set(int(day), status)
+    finally:
+        cursor.close()
+
+
+def _index(connection):
+    database = report_cache.database_key(connection)
+    with _indexes_lock:
+        index = _indexes.get(database)
+        if index is None:
+            index = _indexes[database] = DayBitmaps()
+        return index
+
+
+def get(connection):
+    """The day bitmaps of the connection's database, loaded or reloaded as needed"""
+    index = _index(connection)
+    if index.stale:
+        index.load(connection)
+    return index
+
+
+def rebuild(connection):
+    """Rebuild every habit's bitmaps from Logs and the archive and rewrite the snapshot"""
+    index = _index(connection)
+    index.load(connection, rebuild=True)
+    return index
+
+
+# --- Notifications from write paths ---
+
+def _loaded(connection):
+    with _indexes_lock:
+        index = _indexes.get(report_cache.database_key(connection))
+    return index if index is not None and not index.stale else None
+
+
+def logs_written(connection, logs):
+    """Call after committing log writes, with (habit_id, log_date, status) of each"""
+    index = _loaded(connection)
+    if index is not None:
+        index.set_days(logs)
+
+
+def log_changed(connection, log_id):
+    """Call after committing a status change to one log"""
+    index = _loaded(connection)
+    if index is None:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT habit_id, log_date, status FROM Logs WHERE log_id = %s", (log_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if row is None:
+        index.invalidate()
+    else:
+        index.set_days([row])
+
+
+def bitmaps_changed(connection=None):
+    """Call after deletes or bulk writes; the bitmaps reload on next use"""
+    with _indexes_lock:
+        indexes = list(_indexes.items())
+    database = report_cache.database_key(connection) if connection is not None else None
+    for key, index in indexes:
+        if connection is None or key == database:
+            index.invalidate()
@@ -0,0 +1,548 @@
+"""
+Personal Habit Tracker - Storage Backends
+Provides a MySQL (PyMySQL) backend and an embedded SQLite backend behind a
+single connect() call. The SQLite backend mirrors the schema, function,
+procedure and trigger from project.sql so the menu functions in
+personal_habit_tracker.py run unchanged on either engine.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import pymysql
+    from pymysql import Error
+except ImportError:
+    pymysql = None
+
+    class Error(Exception):
+        """Base database error (used when PyMySQL is not installed)"""
+
+
+class SQLiteError(Error):
+    """SQLite error re-raised so existing `except Error` blocks catch it"""
+
+
+# --- Configuration ---
+
+# Select the engine with HABIT_TRACKER_BACKEND=mysql|sqlite
+BACKEND = os.environ.get('HABIT_TRACKER_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.environ.get('HABIT_TRACKER_SQLITE_PATH', 'habit_tracker.db')
+
+MYSQL_CONFIG = {
+    'host': 'localhost',
+    'database': 'project',
+    'user': 'root',
+    'password': 'your_mysql_password',
+    'charset': 'utf8mb4',
+}
+
+# --- SQLite Schema (equivalent of project.sql) ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Customer (
+    user_id INTEGER PRIMARY KEY,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    name VARCHAR(100) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    phone_no VARCHAR(15) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Habit (
+    habit_id INTEGER PRIMARY KEY,
+    user_id INT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    start_date DATE NOT NULL,
+    frequency VARCHAR(20) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    CONSTRAINT fk_habit_customer FOREIGN KEY (user_id)
+        REFERENCES Customer(user_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT chk_frequency CHECK (frequency IN ('Daily', 'Weekly', 'Monthly'))
+);
+
+CREATE TABLE IF NOT EXISTS Goal (
+    goal_id INTEGER PRIMARY KEY,
+    habit_id INT NOT NULL,
+    deadline DATE NOT NULL,
+    description TEXT NOT NULL,
+    is_achieved BOOLEAN DEFAULT FALSE,
+    target_count INT NULL,
+    CONSTRAINT fk_goal_habit FOREIGN KEY (habit_id)
+        REFERENCES Habit(habit_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Logs (
+    log_id INTEGER PRIMARY KEY,
+    habit_id INT NOT NULL,
+    log_date DATE NOT NULL DEFAULT (CURRENT_DATE),
+    notes TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'Pending',
+    CONSTRAINT fk_logs_habit FOREIGN KEY (habit_id)
+        REFERENCES Habit(habit_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT chk_status CHECK (status IN ('Completed', 'Pending', 'Skipped'))
+);
+
+CREATE INDEX IF NOT EXISTS fk_habit_customer ON Habit(user_id);
+CREATE INDEX IF NOT EXISTS fk_goal_habit ON Goal(habit_id);
+CREATE INDEX IF NOT EXISTS fk_logs_habit ON Logs(habit_id);
+CREATE INDEX IF NOT EXISTS idx_logs_habit_status_date ON Logs(habit_id, status, log_date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_logs_habit_date ON Logs(habit_id, log_date);
+CREATE INDEX IF NOT EXISTS idx_logs_log_date ON Logs(log_date);
+CREATE INDEX IF NOT EXISTS idx_goal_achieved_deadline ON Goal(is_achieved, deadline);
+
+-- Trigger: before_log_insert (same rule as the MySQL trigger)
+CREATE TRIGGER IF NOT EXISTS before_log_insert
+BEFORE INSERT ON Logs
+FOR EACH ROW
+WHEN NEW.log_date < (SELECT start_date FROM Habit WHERE habit_id = NEW.habit_id)
+BEGIN
+    SELECT RAISE(ABORT, 'Log date cannot be before habit start date');
+END;
+
+-- Summary tables (see the SUMMARY TABLES section of project.sql)
+CREATE TABLE IF NOT EXISTS HabitSummary (
+    habit_id INTEGER PRIMARY KEY,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_habitsummary_habit FOREIGN KEY (habit_id)
+        REFERENCES Habit(habit_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS UserSummary (
+    user_id INTEGER PRIMARY KEY,
+    habit_count INT NOT NULL DEFAULT 0,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_usersummary_customer FOREIGN KEY (user_id)
+        REFERENCES Customer(user_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+CREATE TRIGGER IF NOT EXISTS after_customer_insert
+AFTER INSERT ON Customer
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO UserSummary (user_id) VALUES (NEW.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS after_habit_insert
+AFTER INSERT ON Habit
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO HabitSummary (habit_id) VALUES (NEW.habit_id);
+    UPDATE UserSummary SET habit_count = habit_count + 1 WHERE user_id = NEW.user_id;
+END;
+
+-- Runs before the cascade; the cascaded Logs triggers then find no Habit row
+-- and leave UserSummary alone, matching MySQL where cascades fire no triggers
+CREATE TRIGGER IF NOT EXISTS before_habit_delete
+BEFORE DELETE ON Habit
+FOR EACH ROW
+BEGIN
+    UPDATE UserSummary
+    SET habit_count = habit_count - 1,
+        total_logs = total_logs - COALESCE((SELECT total_logs FROM HabitSummary WHERE habit_id = OLD.habit_id), 0),
+        completed_logs = completed_logs - COALESCE((SELECT completed_logs FROM HabitSummary WHERE habit_id = OLD.habit_id), 0),
+        skipped_logs = skipped_logs - COALESCE((SELECT skipped_logs FROM HabitSummary WHERE habit_id = OLD.habit_id), 0),
+        pending_logs = pending_logs - COALESCE((SELECT pending_logs FROM HabitSummary WHERE habit_id = OLD.habit_id), 0)
+    WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS after_log_insert
+AFTER INSERT ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE habit_id = NEW.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS after_log_update
+AFTER UPDATE OF habit_id, status ON Logs
+FOR EACH ROW
+WHEN OLD.status IS NOT NEW.status OR OLD.habit_id IS NOT NEW.habit_id
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE habit_id = OLD.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+
+    UPDATE HabitSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE habit_id = NEW.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS after_log_delete
+AFTER DELETE ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE habit_id = OLD.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+END;
+"""
+
+# Bumped whenever SQLITE_SCHEMA gains objects that need existing rows backfilled
+# or columns that CREATE TABLE IF NOT EXISTS cannot add to an existing table
+SQLITE_SCHEMA_VERSION = 3
+
+# Function: GetHabitCompletionRate, inlined as a scalar subquery
+_COMPLETION_RATE_SQL = (
+    "(SELECT CASE WHEN COUNT(*) = 0 THEN 0.00 "
+    "ELSE ROUND(SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) END "
+    "FROM Logs WHERE habit_id = {arg})"
+)
+_COMPLETION_RATE_RE = re.compile(r'GetHabitCompletionRate\s*\(\s*([^()]+?)\s*\)', re.IGNORECASE)
+
+
+def _adapt_date(value):
+    return value.isoformat()
+
+
+def _adapt_datetime(value):
+    return value.isoformat(sep=' ')
+
+
+def _convert_date(value):
+    return date.fromisoformat(value.decode())
+
+
+def _convert_timestamp(value):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(date, _adapt_date)
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+
+def _datediff(end, start):
+    """MySQL DATEDIFF(end, start) for ISO date strings"""
+    if end is None or start is None:
+        return None
+    return (date.fromisoformat(str(end)[:10]) - date.fromisoformat(str(start)[:10])).days
+
+
+@lru_cache(maxsize=256)
+def translate_query(query):
+    """Translate a MySQL/PyMySQL query string into SQLite syntax"""
+    query = _COMPLETION_RATE_RE.sub(
+        lambda m: _COMPLETION_RATE_SQL.format(arg=m.group(1)), query
+    )
+    # PyMySQL uses %s placeholders and %% for a literal percent sign
+    return re.sub(r'%(s|%)', lambda m: '?' if m.group(1) == 's' else '%', query)
+
+
+# --- Stored procedures ---
+
+def _proc_mark_goal_achieved(cursor, goal_id):
+    """SQLite version of the MarkGoalAchieved procedure"""
+    cursor.execute("UPDATE Goal SET is_achieved = TRUE WHERE goal_id = ?", (goal_id,))
+    cursor.execute("SELECT 'Goal ' || ? || ' marked as achieved!' AS Message", (goal_id,))
+
+
+def _proc_mark_goals_achieved(cursor, goal_ids):
+    """SQLite version of the MarkGoalsAchieved procedure (goal_ids is a JSON array)"""
+    cursor.execute(
+        "UPDATE Goal SET is_achieved = TRUE "
+        "WHERE is_achieved = FALSE AND goal_id IN (SELECT value FROM json_each(?))",
+        (goal_ids,),
+    )
+    cursor.execute("SELECT changes() AS goals_marked")
+
+
+# New log_ids continue from the largest one, but never start at or below the
+# connection's log_id_floor (the SQLite counterpart of ALTER TABLE ... AUTO_INCREMENT)
+_NEXT_LOG_ID_SQL = "(SELECT MAX(COALESCE(MAX(log_id), 0), ?) + 1 FROM Logs)"
+
+
+def _proc_upsert_log(cursor, habit_id, log_date, status, notes):
+    """SQLite version of the UpsertLog procedure"""
+    cursor.execute(
+        f"INSERT INTO Logs (log_id, habit_id, log_date, status, notes) "
+        f"VALUES ({_NEXT_LOG_ID_SQL}, ?, ?, ?, COALESCE(?, '')) "
+        "ON CONFLICT (habit_id, log_date) DO NOTHING",
+        (cursor.connection.log_id_floor, habit_id, log_date, status, notes),
+    )
+    if cursor.rowcount == 1:
+        log_id, created = cursor.lastrowid, 1
+    else:
+        cursor.execute(
+            "UPDATE Logs SET status = ?, notes = COALESCE(?, notes) WHERE habit_id = ? AND log_date = ?",
+            (status, notes, habit_id, log_date),
+        )
+        cursor.execute("SELECT log_id FROM Logs WHERE habit_id = ? AND log_date = ?", (habit_id, log_date))
+        log_id, created = cursor.fetchone()[0], 0
+    cursor.execute("SELECT ? AS log_id, ? AS created", (log_id, created))
+
+
+def _proc_upsert_logs(cursor, logs):
+    """SQLite version of the UpsertLogs procedure (logs is a JSON array of objects)"""
+    # WHERE true keeps the upsert clause from being parsed as part of the SELECT
+    # key is the array index, so every inserted row gets its own log_id
+    cursor.execute("SELECT COALESCE(MAX(log_id), 0) FROM Logs")
+    last_log_id = cursor.fetchone()[0]
+    cursor.execute(
+        "INSERT INTO Logs (log_id, habit_id, log_date, status, notes) "
+        f"SELECT {_NEXT_LOG_ID_SQL} + key, json_extract(value, '$.habit_id'), json_extract(value, '$.log_date'), "
+        "json_extract(value, '$.status'), json_extract(value, '$.notes') "
+        "FROM json_each(?) WHERE true "
+        "ON CONFLICT (habit_id, log_date) DO UPDATE SET status = excluded.status, "
+        "notes = COALESCE(excluded.notes, notes)",
+        (cursor.connection.log_id_floor, logs),
+    )
+    # DO UPDATE only sees the inserted values, so new logs without notes get '' afterwards
+    cursor.execute("UPDATE Logs SET notes = '' WHERE log_id > ? AND notes IS NULL", (last_log_id,))
+    cursor.execute("SELECT json_array_length(?) AS logs_written", (logs,))
+
+
+SQLITE_PROCEDURES = {
+    'markgoalachieved': _proc_mark_goal_achieved,
+    'markgoalsachieved': _proc_mark_goals_achieved,
+    'upsertlog': _proc_upsert_log,
+    'upsertlogs': _proc_upsert_logs,
+}
+
+
+class SQLiteCursor:
+    """DB-API cursor that accepts the PyMySQL query dialect"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._raw.cursor()
+
+    def execute(self, query, args=None):
+        try:
+            self._cursor.execute(translate_query(query), tuple(args) if args is not None else ())
+        except sqlite3.Error as e:
+            raise SQLiteError(str(e)) from e
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        try:
+            self._cursor.executemany(translate_query(query), args)
+        except sqlite3.Error as e:
+            raise SQLiteError(str(e)) from e
+        return self._cursor.rowcount
+
+    def callproc(self, procname, args=()):
+        procedure = SQLITE_PROCEDURES.get(procname.lower())
+        if procedure is None:
+            raise SQLiteError(f"PROCEDURE {procname} does not exist")
+        try:
+            procedure(self, *args)
+        except sqlite3.Error as e:
+            raise SQLiteError(str(e)) from e
+        return args
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size if size is not None else self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SQLiteConnection:
+    """In-process SQLite connection with the PyMySQL connection interface"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path, log_id_floor=0):
+        self.path = path
+        self.log_id_floor = log_id_floor
+        self._raw = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        self._raw.create_function('DATEDIFF', 2, _datediff, deterministic=True)
+        self._raw.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self._raw.execute("PRAGMA journal_mode = WAL")
+            self._raw.execute("PRAGMA synchronous = NORMAL")
+        self._raw.executescript(SQLITE_SCHEMA)
+        self._upgrade_schema()
+
+    def _upgrade_schema(self):
+        """Backfill objects added to SQLITE_SCHEMA since the file was created"""
+        version = self._raw.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SQLITE_SCHEMA_VERSION:
+            return
+        if version < 1:
+            import habit_summary
+            habit_summary.rebuild_summaries(self)
+        if version < 2:
+            columns = [row[1] for row in self._raw.execute("PRAGMA table_info(Goal)")]
+            if 'target_count' not in columns:
+                self._raw.execute("ALTER TABLE Goal ADD COLUMN target_count INT NULL")
+        if version < 3:
+            # One log per habit and day: keep the newest duplicate (the delete
+            # trigger keeps the summaries current), then make the index unique
+            self._raw.execute(
+                "DELETE FROM Logs WHERE EXISTS (SELECT 1 FROM Logs newer WHERE newer.habit_id = Logs.habit_id "
+                "AND newer.log_date = Logs.log_date AND newer.log_id > Logs.log_id)"
+            )
+            self._raw.execute("DROP INDEX IF EXISTS idx_logs_habit_date")
+            self._raw.execute("CREATE UNIQUE INDEX idx_logs_habit_date ON Logs(habit_id, log_date)")
+        self._raw.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        self._raw.commit()
+
+    @property
+    def open(self):
+        return self._raw is not None
+
+    def _check_open(self):
+        if self._raw is None:
+            raise SQLiteError("Already closed")
+
+    def cursor(self, cursor=None):
+        # The cursor class argument (e.g. SSCursor) is accepted for PyMySQL
+        # compatibility; SQLite cursors already step through results lazily
+        self._check_open()
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self._check_open()
+        self._raw.commit()
+
+    def rollback(self):
+        self._check_open()
+        self._raw.rollback()
+
+    def ping(self, reconnect=True):
+        self._check_open()
+        try:
+            self._raw.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise SQLiteError(str(e)) from e
+
+    def close(self):
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+
+
+def connect(backend=None, database=None, log_id_floor=0):
+    """Open a connection to the configured backend (raises Error on failure).
+
+    `database` is a SQLite file or MySQL schema to use instead of the
+    configured one. On SQLite, new log_ids are kept above `log_id_floor`.
+    """
+    import db_instrument
+    return db_instrument.instrument(_connect_raw(backend, database, log_id_floor))
+
+
+def _connect_raw(backend=None, database=None, log_id_floor=0):
+    backend = (backend or BACKEND).lower()
+    if backend == 'sqlite':
+        try:
+            return SQLiteConnection(database or SQLITE_PATH, log_id_floor)
+        except sqlite3.Error as e:
+            raise SQLiteError(str(e)) from e
+    if backend == 'mysql':
+        if pymysql is None:
+            raise Error("PyMySQL is not installed (pip install PyMySQL)")
+        return pymysql.connect(cursorclass=pymysql.cursors.Cursor,
+                               **dict(MYSQL_CONFIG, database=database or MYSQL_CONFIG['database']))
+    raise Error(f"Unknown backend '{backend}' (expected 'mysql' or 'sqlite')")
+
+
+def is_constraint_error(error):
+    """True when a write was rejected by a key, constraint or trigger check"""
+    if isinstance(error.__cause__, sqlite3.IntegrityError):
+        return True
+    if pymysql is not None and isinstance(error, pymysql.err.IntegrityError):
+        return True
+    # MySQL SIGNAL SQLSTATE '45000' (before_log_insert)
+    return bool(error.args) and error.args[0] == 1644
+
+
+def streaming_cursor(connection):
+    """Unbuffered cursor for large scans: SSCursor on MySQL, a plain cursor on SQLite"""
+    if getattr(connection, 'backend', 'mysql') == 'mysql':
+        return connection.cursor(pymysql.cursors.SSCursor)
+    return connection.cursor()
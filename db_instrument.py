@@ -0,0 +1,306 @@
+"""
+Personal Habit Tracker - Query Instrumentation
+Wraps database connections so every statement is timed. Stats are kept per
+stable query name ("<calling function> <VERB> <table>"), with a latency
+histogram, rows returned and approximate bytes fetched. Statements slower
+than the threshold are written to a slow-query log together with their
+EXPLAIN plan.
+
+Environment:
+    HABIT_TRACKER_INSTRUMENT=0        disable instrumentation
+    HABIT_TRACKER_SLOW_MS=200         slow-query threshold in milliseconds
+    HABIT_TRACKER_SLOW_LOG=path       slow-query log file (JSON Lines)
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+ENABLED = os.environ.get('HABIT_TRACKER_INSTRUMENT', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('HABIT_TRACKER_SLOW_MS', '200'))
+SLOW_LOG_PATH = os.environ.get('HABIT_TRACKER_SLOW_LOG', 'slow_queries.log')
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+RECENT_SLOW_QUERIES = 50
+
+_VERB_RE = re.compile(r'^\s*(\w+)')
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)', re.IGNORECASE)
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+# Frames from these modules are skipped when naming a query after its caller
+_INTERNAL_MODULES = {__name__, 'db_backend'}
+
+
+class QueryStat:
+    """Aggregated measurements for one query name"""
+
+    __slots__ = ('name', 'sql', 'count', 'errors', 'total_ms', 'max_ms', 'rows', 'bytes', 'histogram')
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def percentile_ms(self, pct):
+        """Upper bound of the histogram bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100
+        seen = 0
+        for bound, bucket in zip(HISTOGRAM_BOUNDS_MS + (self.max_ms,), self.histogram):
+            seen += bucket
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'sql': self.sql,
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile_ms(50),
+            'p95_ms': self.percentile_ms(95),
+            'max_ms': round(self.max_ms, 3),
+            'total_ms': round(self.total_ms, 3),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'histogram': dict(zip([f"<={b}ms" for b in HISTOGRAM_BOUNDS_MS] + ['>5000ms'], self.histogram)),
+        }
+
+
+class QueryRegistry:
+    """Thread-safe store of per-query stats and recent slow queries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.slow_queries = deque(maxlen=RECENT_SLOW_QUERIES)
+
+    def record(self, name, sql, elapsed_ms, failed=False):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = QueryStat(name, _normalize(sql))
+            stat.count += 1
+            stat.errors += failed
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if elapsed_ms <= bound:
+                    stat.histogram[i] += 1
+                    break
+            else:
+                stat.histogram[-1] += 1
+
+    def record_fetch(self, name, rows, size):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is not None:
+                stat.rows += rows
+                stat.bytes += size
+
+    def record_slow(self, entry):
+        with self._lock:
+            self.slow_queries.append(entry)
+        try:
+            with open(SLOW_LOG_PATH, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry, default=str) + '\n')
+        except OSError:
+            pass
+
+    def snapshot(self):
+        """Per-query stats as dicts, slowest total time first"""
+        with self._lock:
+            stats = [stat.as_dict() for stat in self._stats.values()]
+        return sorted(stats, key=lambda stat: stat['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow_queries.clear()
+
+    def dump(self, path):
+        """Write the aggregated stats and recent slow queries to a JSON file"""
+        with self._lock:
+            slow = list(self.slow_queries)
+        report = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'slow_query_ms': SLOW_QUERY_MS,
+            'queries': self.snapshot(),
+            'slow_queries': slow,
+        }
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, default=str)
+
+
+registry = QueryRegistry()
+
+
+def _normalize(sql):
+    return ' '.join(sql.split())
+
+
+def query_name(sql):
+    """Stable name for a statement: calling function, SQL verb and main table"""
+    frame = sys._getframe(2)
+    caller = '?'
+    while frame is not None:
+        function = frame.f_code.co_name
+        module = frame.f_globals.get('__name__', '')
+        if module not in _INTERNAL_MODULES and not function.startswith(('_', '<')):
+            caller = f"{module}.{function}" if module != '__main__' else function
+            break
+        frame = frame.f_back
+    verb = _VERB_RE.match(sql)
+    table = _TABLE_RE.search(sql)
+    return f"{caller} {verb.group(1).upper() if verb else '?'} {table.group(1) if table else ''}".rstrip()
+
+
+def _row_size(row):
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times statements and counts fetched rows and bytes"""
+
+    def __init__(self, cursor, connection, unbuffered=False):
+        self._cursor = cursor
+        self._connection = connection
+        self._unbuffered = unbuffered
+        self._name = None
+        self._pending_explain = None
+
+    def _run(self, method, sql, args, explainable=False):
+        self._explain_pending()
+        self._name = query_name(sql)
+        started = time.perf_counter()
+        try:
+            result = method(sql, args)
+        except Exception:
+            registry.record(self._name, sql, (time.perf_counter() - started) * 1000, failed=True)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        registry.record(self._name, sql, elapsed_ms)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            entry = {
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'name': self._name,
+                'elapsed_ms': round(elapsed_ms, 3),
+                'sql': _normalize(sql),
+                'args': None if args is None else [str(arg) for arg in islice(args, 20)],
+            }
+            if explainable and sql.lstrip()[:7].upper().startswith(_EXPLAINABLE):
+                if self._unbuffered:
+                    # The connection is busy streaming; explain once the cursor is done
+                    self._pending_explain = (entry, sql, args)
+                    return result
+                entry['plan'] = self._connection.explain(sql, args)
+            registry.record_slow(entry)
+        return result
+
+    def _explain_pending(self):
+        if self._pending_explain is not None:
+            entry, sql, args = self._pending_explain
+            self._pending_explain = None
+            entry['plan'] = self._connection.explain(sql, args)
+            registry.record_slow(entry)
+
+    def execute(self, query, args=None):
+        return self._run(self._cursor.execute, query, args, explainable=True)
+
+    def executemany(self, query, args):
+        return self._run(self._cursor.executemany, query, args)
+
+    def callproc(self, procname, args=()):
+        return self._run(lambda name, params: self._cursor.callproc(name, params), procname, args)
+
+    def _count(self, rows):
+        if self._name is not None and rows:
+            registry.record_fetch(self._name, len(rows), sum(_row_size(row) for row in rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        return self._count(rows)
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._cursor.close()
+        self._explain_pending()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args):
+        unbuffered = bool(args) and 'SS' in getattr(args[0], '__name__', '')
+        return InstrumentedCursor(self._connection.cursor(*args), self, unbuffered)
+
+    def explain(self, sql, args):
+        """EXPLAIN plan rows for a statement, or the error text if it can't be explained"""
+        prefix = 'EXPLAIN QUERY PLAN ' if getattr(self._connection, 'backend', 'mysql') == 'sqlite' else 'EXPLAIN '
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(prefix + sql, args)
+            return [list(row) for row in cursor.fetchall()]
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def instrument(connection):
+    """Wrap a connection when instrumentation is enabled"""
+    return InstrumentedConnection(connection) if ENABLED else connection
@@ -0,0 +1,181 @@
+"""
+Personal Habit Tracker - Connection Pool
+A bounded, thread-safe pool of database connections so every GUI action and
+worker thread gets its own connection instead of sharing one.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import db_backend
+from db_backend import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no connection could be checked out in time"""
+
+
+class ConnectionPool:
+    """Bounded connection pool with ping-before-use and idle eviction"""
+
+    def __init__(self, connect=db_backend.connect, max_size=8, idle_timeout=300,
+                 checkout_timeout=30):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = deque()          # (connection, last_used) pairs, most recent last
+        self._in_use = set()
+        self._opening = 0             # connections being created outside the lock
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'checkouts': 0,
+            'reconnects': 0,
+            'evicted': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+        }
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _evict_idle(self, now):
+        """Close idle connections unused for longer than idle_timeout"""
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._stats['evicted'] += 1
+            _close_quietly(conn)
+
+    def _validate(self, conn):
+        """Ping a pooled connection, reconnecting it if the server dropped it"""
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            pass
+        try:
+            conn.ping(reconnect=True)
+            with self._cond:
+                self._stats['reconnects'] += 1
+            return True
+        except Error:
+            return False
+
+    def checkout(self, timeout=None):
+        """Take a connection from the pool, opening one if below max_size"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise Error("Connection pool is closed")
+                    self._evict_idle(time.monotonic())
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        self._in_use.add(conn)
+                        break
+                    if self._size() < self.max_size:
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {timeout}s "
+                            f"({self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use.add(conn)
+                    self._stats['created'] += 1
+            elif not self._validate(conn):
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._stats['checkouts'] += 1
+                self._stats['total_wait'] += waited
+                self._stats['max_wait'] = max(self._stats['max_wait'], waited)
+            return conn
+
+    def checkin(self, conn):
+        """Return a connection to the pool"""
+        try:
+            # End any open transaction so the next user does not see a stale snapshot
+            conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._in_use.discard(conn)
+            if self._closed:
+                _close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        with self._cond:
+            self._in_use.discard(conn)
+            self._stats['discarded'] += 1
+            self._cond.notify()
+        _close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager: checkout on enter, checkin on exit"""
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def stats(self):
+        """Snapshot of pool counters for sizing and diagnostics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size()
+            stats['in_use'] = len(self._in_use)
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = round(stats.pop('total_wait') / checkouts * 1000, 3) if checkouts else 0.0
+        stats['max_wait_ms'] = round(stats.pop('max_wait') * 1000, 3)
+        return stats
+
+    def close(self):
+        """Close idle connections; in-use ones are closed when checked in"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -0,0 +1,237 @@
+"""
+Personal Habit Tracker - Streaming Export
+Exports every table and report to CSV, JSON Lines or Parquet in constant
+memory: table rows come from a server-side cursor in fixed-size chunks and
+each chunk is written before the next one is fetched. CSV and JSON Lines
+output can be gzip or zstd compressed; Parquet uses the codec internally.
+Parquet needs pyarrow and zstd needs zstandard; both are imported only when
+used.
+
+Output goes to a temporary file that is renamed into place when the export
+finishes, so a failed export never leaves a truncated file behind.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import db_backend
+import habit_cli
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+COMPRESSIONS = ('gzip', 'zstd')
+CHUNK_SIZE = 10000
+
+EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+COMPRESSED_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+KINDS = ('table', 'report')
+
+# Table name -> (query, column names); rows stream in primary-key order.
+# Customer passwords are never exported.
+TABLES = {
+    'customers': ("SELECT user_id, name, email, phone_no, created_at FROM Customer ORDER BY user_id",
+                  ('user_id', 'name', 'email', 'phone_no', 'created_at')),
+    'habits': ("SELECT habit_id, user_id, name, start_date, frequency, is_active FROM Habit ORDER BY habit_id",
+               ('habit_id', 'user_id', 'name', 'start_date', 'frequency', 'is_active')),
+    'goals': ("SELECT goal_id, habit_id, description, deadline, is_achieved, target_count FROM Goal ORDER BY goal_id",
+              ('goal_id', 'habit_id', 'description', 'deadline', 'is_achieved', 'target_count')),
+    'logs': ("SELECT log_id, habit_id, log_date, status, notes FROM Logs ORDER BY log_id",
+             ('log_id', 'habit_id', 'log_date', 'status', 'notes')),
+}
+TABLE_NAMES = {'customers': 'Customer', 'habits': 'Habit', 'goals': 'Goal', 'logs': 'Logs'}
+
+# Column types for Parquet schemas; columns not listed are strings
+COLUMN_TYPES = {
+    'user_id': 'int', 'habit_id': 'int', 'goal_id': 'int', 'log_id': 'int',
+    'habits': 'int', 'total_logs': 'int', 'completed_logs': 'int', 'skipped_logs': 'int',
+    'pending_logs': 'int', 'days_overdue': 'int', 'current': 'int', 'longest': 'int',
+    'is_active': 'int', 'is_achieved': 'int', 'target_count': 'int',
+    'completion_rate': 'decimal',
+    'start_date': 'date', 'deadline': 'date', 'log_date': 'date',
+    'current_breaks_on': 'date', 'longest_broke_on': 'date',
+    'created_at': 'timestamp',
+}
+
+
+def default_path(kind, name, fmt, compression=None):
+    """logs.csv, habits_report.jsonl.gz, ..."""
+    path = (name if kind == 'table' else f"{name}_report".replace('-', '_')) + EXTENSIONS[fmt]
+    if compression and fmt != 'parquet':
+        path += COMPRESSED_EXTENSIONS[compression]
+    return path
+
+
+# --- Sources ---
+
+def columns_of(kind, name):
+    if kind == 'table':
+        return TABLES[name][1]
+    return tuple(key for key, _ in habit_cli.REPORTS[name][1])
+
+
+def count_rows(connection, kind, name):
+    """Row count of a table, or None for reports"""
+    if kind != 'table':
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE_NAMES[name]}")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def iter_chunks(connection, kind, name, chunk_size=CHUNK_SIZE):
+    """Lists of at most chunk_size rows of a table or report"""
+    if kind == 'table':
+        cursor = db_backend.streaming_cursor(connection)
+        try:
+            cursor.execute(TABLES[name][0])
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+    else:
+        # Reports are aggregates (one row per user, habit or goal)
+        rows = iter(habit_cli.REPORTS[name][0](connection))
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+
+# --- Writers ---
+
+def _open_binary(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression needs zstandard: pip install zstandard") from None
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+    return open(path, 'wb')
+
+
+def _write_csv(path, columns, chunks, compression):
+    with _open_binary(path, compression) as raw:
+        handle = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+        handle.flush()
+        handle.detach()
+
+
+def _write_jsonl(path, columns, chunks, compression):
+    with _open_binary(path, compression) as raw:
+        handle = io.TextIOWrapper(raw, encoding='utf-8', newline='\n')
+        for chunk in chunks:
+            handle.writelines(
+                json.dumps(dict(zip(columns, row)), default=habit_cli.json_value) + '\n' for row in chunk
+            )
+        handle.flush()
+        handle.detach()
+
+
+def _write_parquet(path, columns, chunks, compression):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+    arrow_types = {
+        'int': pa.int64(), 'decimal': pa.decimal128(5, 2), 'date': pa.date32(),
+        'timestamp': pa.timestamp('s'), 'str': pa.string(),
+    }
+    schema = pa.schema([(column, arrow_types[COLUMN_TYPES.get(column, 'str')]) for column in columns])
+    with pq.ParquetWriter(path, schema, compression=compression or 'snappy') as writer:
+        for chunk in chunks:
+            # One row group per chunk
+            values = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+            ))
+
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def export(connection, kind, name, path=None, fmt='csv', compression=None, chunk_size=CHUNK_SIZE,
+           progress=None):
+    """Stream a table or report (kind 'table' / 'report') to a file; returns (path, rows written).
+
+    progress, if given, is called as progress(rows_written, total_rows) after
+    every chunk; total_rows is None for reports.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown export kind {kind!r}")
+    if name not in (TABLES if kind == 'table' else habit_cli.REPORTS):
+        raise ValueError(f"unknown {kind} {name!r}")
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if compression not in (None,) + COMPRESSIONS:
+        raise ValueError(f"unknown compression {compression!r}")
+    path = path or default_path(kind, name, fmt, compression)
+    total = count_rows(connection, kind, name)
+    written = 0
+
+    def counted(chunks):
+        nonlocal written
+        for chunk in chunks:
+            yield chunk
+            # Resumed by the writer once the chunk is written
+            written += len(chunk)
+            if progress:
+                progress(written, total)
+
+    temp = f"{path}.part"
+    try:
+        chunks = counted(iter_chunks(connection, kind, name, chunk_size))
+        WRITERS[fmt](temp, columns_of(kind, name), chunks, compression)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return path, written
+
+
+class ProgressMeter:
+    """Single-line progress on a terminal: rows written, percentage and rate"""
+
+    def __init__(self, out=None, interval=0.1):
+        self.out = out or sys.stderr
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._shown_at = 0.0
+        self._shown = False
+
+    def __call__(self, rows, total=None):
+        now = time.perf_counter()
+        if now - self._shown_at < self.interval and rows != total:
+            return
+        self._shown_at = now
+        rate = rows / max(now - self.started, 1e-9)
+        percent = f" ({rows * 100 / total:.1f}%)" if total else ""
+        of_total = f" / {total:,}" if total is not None else ""
+        self.out.write(f"\r{rows:,}{of_total} rows{percent}  {rate:,.0f} rows/s ")
+        self.out.flush()
+        self._shown = True
+
+    def finish(self):
+        if self._shown:
+            self.out.write('\n')
+            self.out.flush()
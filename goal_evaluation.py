@@ -0,0 +1,81 @@
+"""
+Personal Habit Tracker - Goal Evaluation
+Decides goal achievement from the logs instead of one MarkGoalAchieved call
+per goal. A goal with a target_count is achieved once its habit has at least
+that many Completed logs dated on or before the deadline.
+
+evaluate_goals() counts those logs for every open goal with a target in one
+grouped query (a range scan of idx_logs_habit_status_date per goal), adds
+Completed logs from the archive, and marks every goal that reached its
+target with a single MarkGoalsAchieved call. Goals without a target and
+goals already achieved (including by hand) are never changed, so running it
+again is harmless; schedule it nightly with:
+    python habit_cli.py goals evaluate
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date
+
+import habit_queries
+import log_archive
+
+GoalProgress = namedtuple('GoalProgress', ['goal_id', 'habit_id', 'deadline', 'target_count', 'completed'])
+Evaluation = namedtuple('Evaluation', ['evaluated', 'achieved'])
+
+# Completed logs on or before each open goal's deadline, one row per goal
+_PROGRESS_QUERY = """
+SELECT g.goal_id, g.habit_id, g.deadline, g.target_count, COUNT(l.log_id)
+FROM Goal g
+LEFT JOIN Logs l
+    ON l.habit_id = g.habit_id
+    AND l.status = 'Completed'
+    AND l.log_date <= g.deadline
+WHERE g.is_achieved = FALSE AND g.target_count IS NOT NULL
+GROUP BY g.goal_id, g.habit_id, g.deadline, g.target_count
+ORDER BY g.goal_id
+"""
+
+
+def _archived_days(connection):
+    """Map habit_id -> sorted day numbers of archived Completed logs"""
+    habits, days = log_archive.completed_days(connection)
+    by_habit = {}
+    for habit_id, day in zip(habits, days):
+        by_habit.setdefault(habit_id, []).append(day)
+    for habit_days in by_habit.values():
+        habit_days.sort()
+    return by_habit
+
+
+def goal_progress(connection):
+    """GoalProgress for every open goal with a target, by goal_id"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_PROGRESS_QUERY)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    archived = _archived_days(connection) if rows else {}
+    progress = []
+    for goal_id, habit_id, deadline, target_count, completed in rows:
+        # The joined DATE column can come back as a string on SQLite
+        deadline = deadline if isinstance(deadline, date) else date.fromisoformat(str(deadline)[:10])
+        habit_days = archived.get(habit_id)
+        if habit_days:
+            completed += bisect_right(habit_days, (deadline - log_archive.EPOCH).days)
+        progress.append(GoalProgress(goal_id, habit_id, deadline, target_count, completed))
+    return progress
+
+
+def evaluate_goals(connection, dry_run=False):
+    """Mark every open goal whose target is reached; returns an Evaluation.
+
+    `achieved` lists the goals that reached their target (and, unless
+    dry_run, were marked achieved).
+    """
+    progress = goal_progress(connection)
+    achieved = [goal.goal_id for goal in progress if goal.completed >= goal.target_count]
+    if achieved and not dry_run:
+        habit_queries.mark_goals_achieved(connection, achieved)
+    return Evaluation(len(progress), achieved)
@@ -0,0 +1,309 @@
+"""
+Personal Habit Tracker - Overdue Goal Scheduler
+Keeps every unachieved goal in a min-heap ordered by deadline. A goal
+becomes overdue when its deadline has passed (deadline < today, as in the
+overdue goals report); the scheduler thread sleeps until the next deadline
+passes, moves those goals to the overdue set and emits one event per goal.
+
+Write paths notify running schedulers: insert_goal, mark_goal_achieved and
+mark_goals_achieved update the heap in O(log n) per goal, and changes that cannot be applied
+incrementally (deleting customers or habits, renaming customers, bulk
+loads) mark them stale so they reload from the database. While a fresh
+scheduler runs, habit_queries.fetch_overdue_goals() answers from it
+instead of scanning Goal joined to Habit and Customer.
+"""
+
+import heapq
+import sys
+import threading
+import weakref
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import report_cache
+
+# Longest sleep between checks; also bounds the delay after a clock change
+MAX_WAIT_SECONDS = 60
+
+ScheduledGoal = namedtuple('ScheduledGoal', ['goal_id', 'user_id', 'name', 'description', 'deadline'])
+
+_GOAL_QUERY = """
+SELECT g.goal_id, c.user_id, c.name, g.description, g.deadline
+FROM Goal g
+JOIN Habit h ON h.habit_id = g.habit_id
+JOIN Customer c ON c.user_id = h.user_id
+WHERE g.is_achieved = FALSE
+"""
+
+_schedulers = weakref.WeakSet()
+_schedulers_lock = threading.Lock()
+
+
+def _as_date(value):
+    # Joined DATE columns can come back as strings on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _goal(row):
+    goal_id, user_id, name, description, deadline = row
+    return ScheduledGoal(goal_id, user_id, name, description, _as_date(deadline))
+
+
+class OverdueScheduler:
+    """Min-heap of unachieved goals by deadline with an overdue set and events.
+
+    `connect` returns a new database connection; the scheduler thread keeps
+    one for (re)loading. `on_overdue(goal)` is called on the scheduler thread
+    for every goal whose deadline passes while it runs. Goals already overdue
+    when the scheduler (re)loads are overdue without an event.
+    """
+
+    def __init__(self, connect, on_overdue=None, today=date.today):
+        self._connect = connect
+        self._today = today
+        self.on_overdue = on_overdue
+        self._changed = threading.Condition()
+        # (deadline, goal_id); entries of achieved or rescheduled goals are skipped when popped
+        self._heap = []
+        self._pending = {}
+        self._overdue = {}
+        self._stale = True
+        self._generation = 0
+        self._database = None
+        self._thread = None
+        self._stopping = False
+        self.events = 0
+        self.reloads = 0
+
+    # --- Incremental updates ---
+
+    def add(self, goal):
+        """Schedule an unachieved goal (new, or with a changed deadline)"""
+        with self._changed:
+            self._generation += 1
+            self._overdue.pop(goal.goal_id, None)
+            self._pending[goal.goal_id] = goal
+            heapq.heappush(self._heap, (goal.deadline, goal.goal_id))
+            self._changed.notify()
+
+    def remove(self, goal_id):
+        """Forget an achieved or deleted goal"""
+        with self._changed:
+            self._generation += 1
+            self._pending.pop(goal_id, None)
+            self._overdue.pop(goal_id, None)
+
+    def invalidate(self):
+        """Reload from the database on the next tick"""
+        with self._changed:
+            self._generation += 1
+            self._stale = True
+            self._changed.notify()
+
+    # --- Loading and advancing ---
+
+    def load(self, connection):
+        """Rebuild the heap from every unachieved goal (an index range scan on Goal)"""
+        with self._changed:
+            generation = self._generation
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_GOAL_QUERY)
+            goals = [_goal(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        today = self._today()
+        with self._changed:
+            self._pending = {goal.goal_id: goal for goal in goals if goal.deadline >= today}
+            self._overdue = {goal.goal_id: goal for goal in goals if goal.deadline < today}
+            self._heap = [(goal.deadline, goal.goal_id) for goal in self._pending.values()]
+            heapq.heapify(self._heap)
+            self._database = report_cache.database_key(connection)
+            # A change that raced with the query is not in `goals`; load again
+            self._stale = self._generation != generation
+            self.reloads += 1
+
+    def _advance(self, today):
+        """Move goals whose deadline is before today to the overdue set; caller holds the lock"""
+        passed = []
+        while self._heap and self._heap[0][0] < today:
+            deadline, goal_id = heapq.heappop(self._heap)
+            goal = self._pending.get(goal_id)
+            if goal is None or goal.deadline != deadline:
+                continue
+            del self._pending[goal_id]
+            self._overdue[goal_id] = goal
+            passed.append(goal)
+        return passed
+
+    def advance(self, today=None):
+        """Emit events for goals that became overdue; returns them.
+
+        Runs on the scheduler thread, and from overdue_goals() so a query made
+        just after midnight does not wait for the thread to wake up.
+        """
+        with self._changed:
+            if self._stale:
+                return []
+            passed = self._advance(today or self._today())
+            self.events += len(passed)
+        if self.on_overdue:
+            for goal in passed:
+                self.on_overdue(goal)
+        return passed
+
+    def next_deadline(self):
+        """Earliest pending deadline, or None"""
+        with self._changed:
+            while self._heap:
+                deadline, goal_id = self._heap[0]
+                goal = self._pending.get(goal_id)
+                if goal is not None and goal.deadline == deadline:
+                    return deadline
+                heapq.heappop(self._heap)
+            return None
+
+    # --- Queries ---
+
+    def overdue_goals(self, today=None):
+        """Rows of habit_queries.fetch_overdue_goals, or None while stale"""
+        today = today or self._today()
+        self.advance(today)
+        with self._changed:
+            if self._stale:
+                return None
+            goals = list(self._overdue.values())
+        rows = [
+            (goal.user_id, goal.name, goal.goal_id, goal.description, goal.deadline, (today - goal.deadline).days)
+            for goal in goals
+        ]
+        rows.sort(key=lambda row: row[5], reverse=True)
+        return rows
+
+    def serves(self, connection):
+        """True if this scheduler tracks the database behind the connection"""
+        return self._database == report_cache.database_key(connection)
+
+    def stats(self):
+        with self._changed:
+            return {
+                'pending': len(self._pending),
+                'overdue': len(self._overdue),
+                'heap_entries': len(self._heap),
+                'events': self.events,
+                'reloads': self.reloads,
+                'stale': self._stale,
+            }
+
+    # --- Thread ---
+
+    def start(self):
+        """Load and run the scheduler on a daemon thread"""
+        with _schedulers_lock:
+            _schedulers.add(self)
+        self._thread = threading.Thread(target=self._run, name='goal-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._changed:
+            self._stopping = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+        with _schedulers_lock:
+            _schedulers.discard(self)
+
+    def _seconds_until_next(self):
+        deadline = self.next_deadline()
+        if deadline is None:
+            return MAX_WAIT_SECONDS
+        # Overdue from midnight after the deadline
+        due = datetime.combine(deadline + timedelta(days=1), datetime.min.time())
+        return min(max((due - datetime.now()).total_seconds(), 0), MAX_WAIT_SECONDS)
+
+    def _run(self):
+        connection = None
+        try:
+            while True:
+                with self._changed:
+                    if self._stopping:
+                        return
+                    stale = self._stale
+                failed = False
+                if stale:
+                    try:
+                        if connection is None:
+                            connection = self._connect()
+                        self.load(connection)
+                    except Exception as e:
+                        print(f"Goal scheduler reload failed: {e}", file=sys.stderr)
+                        if connection is not None:
+                            connection.close()
+                        connection = None
+                        failed = True
+                self.advance()
+                wait = MAX_WAIT_SECONDS if failed else self._seconds_until_next()
+                with self._changed:
+                    if not self._stopping and (failed or not self._stale):
+                        self._changed.wait(wait)
+        finally:
+            if connection is not None:
+                connection.close()
+
+
+# --- Notifications from write paths ---
+
+def _running():
+    with _schedulers_lock:
+        return list(_schedulers)
+
+
+def goal_added(connection, goal_id):
+    """Call after committing a new goal"""
+    schedulers = [scheduler for scheduler in _running() if scheduler.serves(connection)]
+    if not schedulers:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_GOAL_QUERY + " AND g.goal_id = %s", (goal_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    for scheduler in schedulers:
+        if row is None:
+            scheduler.remove(goal_id)
+        else:
+            scheduler.add(_goal(row))
+
+
+def goal_achieved(connection, goal_id):
+    """Call after committing MarkGoalAchieved"""
+    for scheduler in _running():
+        if scheduler.serves(connection):
+            scheduler.remove(goal_id)
+
+
+def goals_achieved(connection, goal_ids):
+    """Call after committing MarkGoalsAchieved"""
+    for scheduler in _running():
+        if scheduler.serves(connection):
+            for goal_id in goal_ids:
+                scheduler.remove(goal_id)
+
+
+def goals_changed(connection=None):
+    """Call after a write that changes goals in bulk; schedulers reload"""
+    for scheduler in _running():
+        if connection is None or scheduler.serves(connection):
+            scheduler.invalidate()
+
+
+def overdue_goals(connection, today=None):
+    """Overdue goal rows from a running scheduler for this database, or None"""
+    for scheduler in _running():
+        if scheduler.serves(connection):
+            rows = scheduler.overdue_goals(today)
+            if rows is not None:
+                return rows
+    return None
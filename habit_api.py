@@ -0,0 +1,649 @@
+"""
+Personal Habit Tracker - JSON API Server
+An asyncio HTTP/1.1 server exposing the customer, habit, goal and log
+operations and every report as JSON. Sockets are handled on the event loop;
+database work runs on a thread pool with one pooled connection per worker.
+
+Concurrency: at most `max_concurrency` requests touch the database at once
+(one per worker and pooled connection). Up to `max_queue` more wait for a
+slot; beyond that requests get 503 with Retry-After, and clients over
+`max_clients` are turned away the same way, so load spikes cannot pile up
+unbounded work.
+
+A goal scheduler (goal_scheduler.py) runs alongside the server, so
+/reports/overdue is answered from its deadline heap and overdue goals are
+logged as their deadlines pass.
+
+POST /logs without a log_id records the habit's log for that day: it is
+inserted with a server-assigned log_id, or the existing log's status and
+notes are updated (201 or 200, with the log_id); without "notes" the
+existing notes are kept. POST /logs/batch does the
+same for many logs in one statement.
+
+With --write-behind, POST /logs and /logs/batch are answered 202 Accepted
+as soon as the logs are in the local write-ahead log (log_writer.py) and
+reach the database in group-committed batches; use it for high-rate
+automated check-ins.
+
+Usage:
+    python habit_api.py --host 127.0.0.1 --port 8080 --pool-size 8 [--write-behind]
+
+Routes:
+    GET    /health                      GET    /stats
+    GET    /customers                   POST   /customers
+    GET    /customers/{user_id}         PATCH  /customers/{user_id}
+    DELETE /customers/{user_id}
+    GET    /habits?user_id=             POST   /habits
+    DELETE /habits/{habit_id}
+    GET    /goals?habit_id=             POST   /goals
+    POST   /goals/{goal_id}/achieve     POST   /goals/achieve   (body: {"goal_ids": [...]})
+    POST   /goals/evaluate
+    GET    /logs?habit_id=&from=&to=&after_date=&after_id=&limit=
+    POST   /logs                        PATCH  /logs/{log_id}
+    POST   /logs/batch                  (body: {"logs": [{"habit_id", "log_date", "status", "notes"}, ...]})
+    GET    /reports/{name}              (users, habits, above-average, goals, overdue, streaks)
+    GET    /leaderboard/{name}?by=&limit=&offset=&id=   (users, habits; by rate or completed)
+    GET    /habits/{habit_id}/heatmap?from=&to=&status=  GET /habits/{habit_id}/days/{date}
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import db_backend
+import goal_scheduler
+import habit_cli
+import habit_queries
+import log_archive
+import report_cache
+from db_backend import Error
+from db_pool import ConnectionPool, PoolTimeout
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_SECONDS = 15
+MAX_PAGE_SIZE = 500
+RETRY_AFTER_SECONDS = 1
+
+REASONS = {
+    200: 'OK', 201: 'Created', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 411: 'Length Required',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+CUSTOMER_KEYS = ('user_id', 'name', 'email', 'phone_no', 'created_at')
+HABIT_KEYS = ('habit_id', 'user', 'name', 'start_date', 'frequency', 'is_active')
+GOAL_KEYS = ('goal_id', 'habit', 'description', 'deadline', 'is_achieved', 'target_count')
+LOG_KEYS = tuple(key for key, _ in habit_cli.LOG_COLUMNS)
+
+_REQUIRED = object()
+
+
+class HttpError(Exception):
+    """Ends a request with the given status and an {"error": message} body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    """A parsed request; `params` holds the path parameters matched by the route"""
+
+    __slots__ = ('method', 'path', 'query', 'headers', 'body', 'params')
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.params = {}
+
+    def arg(self, name, convert=str, default=None):
+        """Query-string parameter converted with `convert`"""
+        values = self.query.get(name)
+        if not values:
+            return default
+        return _convert(name, values[0], convert)
+
+    def field(self, name, convert=str, default=_REQUIRED):
+        """JSON body field converted with `convert`; missing (or null) required fields are a 400"""
+        if self.body.get(name) is None:
+            if default is _REQUIRED:
+                raise HttpError(400, f"Missing field '{name}'")
+            return default
+        return _convert(name, self.body[name], convert)
+
+
+def _convert(name, value, convert):
+    try:
+        if convert is date:
+            return date.fromisoformat(str(value))
+        if convert is list and not isinstance(value, list):
+            # list() would split a string into characters
+            raise TypeError(value)
+        if convert is str and not isinstance(value, str):
+            # str() would store the repr of a list or object
+            raise TypeError(value)
+        return convert(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Invalid value for '{name}': {value!r}")
+
+
+def _records(rows, keys):
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def _one_of(name, value, choices):
+    if value not in choices:
+        raise HttpError(400, f"'{name}' must be one of {', '.join(choices)}")
+    return value
+
+
+def _found(affected, what):
+    if not affected:
+        raise HttpError(404, f"{what} not found")
+
+
+# --- Handlers (run on the worker threads with a pooled connection) ---
+
+def list_customers(connection, request):
+    return 200, _records(habit_queries.fetch_customers(connection), CUSTOMER_KEYS)
+
+
+def get_customer(connection, request):
+    rows = habit_queries.fetch_customers(connection, request.params['id'])
+    _found(rows, f"Customer {request.params['id']}")
+    return 200, _records(rows, CUSTOMER_KEYS)[0]
+
+
+def create_customer(connection, request):
+    user_id = request.field('user_id', int)
+    habit_queries.insert_customer(connection, user_id, request.field('email'), request.field('name'),
+                                  request.field('password'), request.field('phone_no'))
+    return 201, {'user_id': user_id}
+
+
+def update_customer(connection, request):
+    changes = {name: request.field(name) for name in habit_queries.CUSTOMER_FIELDS if name in request.body}
+    if not changes:
+        raise HttpError(400, f"Nothing to update; fields are {', '.join(habit_queries.CUSTOMER_FIELDS)}")
+    _found(habit_queries.update_customer_fields(connection, request.params['id'], changes),
+           f"Customer {request.params['id']}")
+    return 200, {'user_id': request.params['id'], 'updated': sorted(changes)}
+
+
+def delete_customer(connection, request):
+    _found(habit_queries.delete_customer(connection, request.params['id']), f"Customer {request.params['id']}")
+    return 200, {'deleted': request.params['id']}
+
+
+def list_habits(connection, request):
+    return 200, _records(habit_queries.fetch_habits(connection, request.arg('user_id', int)), HABIT_KEYS)
+
+
+def create_habit(connection, request):
+    habit_id = request.field('habit_id', int)
+    frequency = _one_of('frequency', request.field('frequency', default='Daily'), habit_queries.FREQUENCIES)
+    habit_queries.insert_habit(connection, habit_id, request.field('user_id', int), request.field('name'),
+                               request.field('start_date', date), frequency)
+    return 201, {'habit_id': habit_id}
+
+
+def delete_habit(connection, request):
+    _found(habit_queries.delete_habit(connection, request.params['id']), f"Habit {request.params['id']}")
+    return 200, {'deleted': request.params['id']}
+
+
+def list_goals(connection, request):
+    return 200, _records(habit_queries.fetch_goals(connection, request.arg('habit_id', int)), GOAL_KEYS)
+
+
+def create_goal(connection, request):
+    goal_id = request.field('goal_id', int)
+    habit_queries.insert_goal(connection, goal_id, request.field('habit_id', int),
+                              request.field('deadline', date), request.field('description'),
+                              request.field('target_count', int, None))
+    return 201, {'goal_id': goal_id}
+
+
+def achieve_goal(connection, request):
+    message = habit_queries.mark_goal_achieved(connection, request.params['id'])
+    return 200, {'goal_id': request.params['id'], 'message': message}
+
+
+def achieve_goals(connection, request):
+    goal_ids = [_convert('goal_ids', goal_id, int) for goal_id in request.field('goal_ids', list)]
+    return 200, {'marked': habit_queries.mark_goals_achieved(connection, goal_ids)}
+
+
+def evaluate_goals(connection, request):
+    import goal_evaluation
+    evaluation = goal_evaluation.evaluate_goals(connection, dry_run=request.arg('dry_run') == '1')
+    return 200, {'evaluated': evaluation.evaluated, 'achieved': evaluation.achieved}
+
+
+def list_logs(connection, request):
+    """One keyset page of logs, newest first, plus the cursor for the next page"""
+    limit = max(1, min(request.arg('limit', int, 50), MAX_PAGE_SIZE))
+    after_date, after_id = request.arg('after_date', date), request.arg('after_id', int)
+    after = (after_date, after_id) if after_date is not None and after_id is not None else None
+    rows = habit_queries.fetch_log_page(
+        connection, request.arg('habit_id', int), request.arg('from', date), request.arg('to', date),
+        after=after, page_size=limit,
+    )
+    next_page = None
+    if len(rows) == limit:
+        log_date, log_id = habit_queries.page_key(rows[-1])
+        next_page = {'after_date': log_date, 'after_id': log_id}
+    return 200, {'logs': _records(rows, LOG_KEYS), 'next': next_page}
+
+
+def _log_fields(request):
+    """(log_id or None, habit_id, log_date, status, notes) of a POST /logs body"""
+    status = _one_of('status', request.field('status', default='Pending'), habit_cli.STATUSES)
+    return (request.field('log_id', int, None), request.field('habit_id', int),
+            request.field('log_date', date, date.today()), status, request.field('notes', default=None))
+
+
+def _batch_fields(request):
+    """(habit_id, log_date, status, notes) of every entry of a POST /logs/batch body"""
+    entries = []
+    for entry in request.field('logs', list):
+        if not isinstance(entry, dict):
+            raise HttpError(400, "Every entry of 'logs' must be a JSON object")
+        _, habit_id, log_date, status, notes = _log_fields(Request('POST', request.path, {}, {}, entry))
+        entries.append((habit_id, log_date, status, notes))
+    return entries
+
+
+def create_log(connection, request):
+    log_id, habit_id, log_date, status, notes = _log_fields(request)
+    if log_id is None:
+        log_id, created = habit_queries.upsert_log(connection, habit_id, log_date, status, notes)
+        return 201 if created else 200, {'log_id': log_id, 'created': created}
+    habit_queries.insert_log(connection, log_id, habit_id, log_date, status, notes or '')
+    return 201, {'log_id': log_id, 'created': True}
+
+
+def create_logs(connection, request):
+    return 200, {'written': habit_queries.upsert_logs(connection, _batch_fields(request))}
+
+
+def update_log(connection, request):
+    status = _one_of('status', request.field('status'), habit_cli.STATUSES)
+    _found(habit_queries.set_log_status(connection, request.params['id'], status), f"Log {request.params['id']}")
+    return 200, {'log_id': request.params['id'], 'status': status}
+
+
+def get_report(connection, request):
+    name = request.params['name']
+    if name not in habit_cli.REPORTS:
+        raise HttpError(404, f"Unknown report '{name}'; reports are {', '.join(sorted(habit_cli.REPORTS))}")
+    fetch, columns, _ = habit_cli.REPORTS[name]
+    try:
+        rows = fetch(connection)
+    except ImportError:
+        raise HttpError(503, "The streak engine needs NumPy on the server")
+    return 200, _records(rows, [key for key, _ in columns])
+
+
+def get_leaderboard(connection, request):
+    """Top entries of a leaderboard, or with ?id= the rank and percentile of one user or habit"""
+    import leaderboard
+    kind = _one_of('leaderboard', request.params['name'], leaderboard.KINDS)
+    metric = _one_of('by', request.arg('by', str, 'rate'), leaderboard.METRICS)
+    keys = [key for key, _ in habit_cli.LEADERBOARD_COLUMNS]
+    board = leaderboard.get(connection)
+    entity_id = request.arg('id', int)
+    if entity_id is not None:
+        entry = board.rank(kind, entity_id, metric)
+        _found(entry, f"Ranked {kind[:-1]} {entity_id}")
+        return 200, dict(zip(keys, entry), percentile=board.percentile(kind, entity_id, metric))
+    limit = max(1, min(request.arg('limit', int, 10), MAX_PAGE_SIZE))
+    offset = max(0, request.arg('offset', int, 0))
+    return 200, _records(board.top(kind, metric, limit, offset), keys)
+
+
+def get_heatmap(connection, request):
+    """Calendar heatmap of one habit from the day bitmaps (default: the last 365 days)"""
+    import day_bitmaps
+    status = _one_of('status', request.arg('status', str, 'Completed'), day_bitmaps.STATUSES)
+    date_to = request.arg('to', date) or date.today()
+    date_from = request.arg('from', date) or date_to - timedelta(days=364)
+    if date_from > date_to:
+        raise HttpError(400, "'from' is after 'to'")
+    bitmaps = day_bitmaps.get(connection)
+    _found(request.params['id'] in bitmaps, f"Habit {request.params['id']}")
+    heatmap = bitmaps.heatmap(request.params['id'], date_from, date_to, status)
+    return 200, dict(heatmap._asdict(), habit_id=request.params['id'], status=status,
+                     days=bitmaps.count(request.params['id'], date_from, date_to, status))
+
+
+def get_habit_day(connection, request):
+    """Status of a habit's log on one day: Completed, Skipped or null"""
+    import day_bitmaps
+    day = _convert('date', request.params['name'], date)
+    bitmaps = day_bitmaps.get(connection)
+    _found(request.params['id'] in bitmaps, f"Habit {request.params['id']}")
+    return 200, {'habit_id': request.params['id'], 'date': day,
+                 'status': bitmaps.status_on(request.params['id'], day)}
+
+
+# (method, path pattern, handler); {id} and {name} become path parameters
+ROUTES = [
+    ('GET', '/customers', list_customers),
+    ('POST', '/customers', create_customer),
+    ('GET', '/customers/{id}', get_customer),
+    ('PATCH', '/customers/{id}', update_customer),
+    ('DELETE', '/customers/{id}', delete_customer),
+    ('GET', '/habits', list_habits),
+    ('POST', '/habits', create_habit),
+    ('DELETE', '/habits/{id}', delete_habit),
+    ('GET', '/habits/{id}/heatmap', get_heatmap),
+    ('GET', '/habits/{id}/days/{name}', get_habit_day),
+    ('GET', '/goals', list_goals),
+    ('POST', '/goals', create_goal),
+    ('POST', '/goals/{id}/achieve', achieve_goal),
+    ('POST', '/goals/achieve', achieve_goals),
+    ('POST', '/goals/evaluate', evaluate_goals),
+    ('GET', '/logs', list_logs),
+    ('POST', '/logs', create_log),
+    ('POST', '/logs/batch', create_logs),
+    ('PATCH', '/logs/{id}', update_log),
+    ('GET', '/reports/{name}', get_report),
+    ('GET', '/leaderboard/{name}', get_leaderboard),
+]
+
+
+def _compile(pattern):
+    regex = re.escape(pattern).replace(r'\{id\}', r'(?P<id>\d+)').replace(r'\{name\}', r'(?P<name>[\w-]+)')
+    return re.compile(f"^{regex}/?$")
+
+
+_COMPILED_ROUTES = [(method, _compile(pattern), handler) for method, pattern, handler in ROUTES]
+
+
+def resolve(method, path):
+    """(handler, path params) for a request, raising 404 / 405"""
+    allowed = []
+    for route_method, regex, handler in _COMPILED_ROUTES:
+        match = regex.match(path)
+        if match:
+            if route_method == method:
+                params = {key: int(value) if key == 'id' else value for key, value in match.groupdict().items()}
+                return handler, params
+            allowed.append(route_method)
+    if allowed:
+        raise HttpError(405, f"Method {method} not allowed; use {', '.join(allowed)}")
+    raise HttpError(404, f"No route for {path}")
+
+
+# --- Server ---
+
+class ApiServer:
+    """Event-loop front end with a bounded executor and connection pool behind it"""
+
+    def __init__(self, pool, max_concurrency=None, max_queue=1000, max_clients=10000, scheduler=None,
+                 log_writer=None):
+        self.pool = pool
+        self.scheduler = scheduler
+        self.log_writer = log_writer
+        self.max_concurrency = max_concurrency or pool.max_size
+        self.max_queue = max_queue
+        self.max_clients = max_clients
+        self.executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='habit-api')
+        self._slots = None
+        self._server = None
+        self.counters = {
+            'requests': 0,
+            'errors': 0,
+            'rejected': 0,
+            'clients': 0,
+            'clients_rejected': 0,
+            'in_flight': 0,
+            'queued': 0,
+        }
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(
+            self._handle_client, host, port, limit=MAX_HEADER_BYTES, backlog=1024
+        )
+        return self._server
+
+    async def serve_forever(self, host='127.0.0.1', port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+    def stats(self):
+        stats = {
+            'server': dict(self.counters, max_concurrency=self.max_concurrency,
+                           max_queue=self.max_queue, max_clients=self.max_clients),
+            'pool': self.pool.stats(),
+            'report_cache': report_cache.cache.stats(),
+        }
+        if self.scheduler is not None:
+            stats['goal_scheduler'] = self.scheduler.stats()
+        if self.log_writer is not None:
+            stats['log_writer'] = self.log_writer.stats()
+        return stats
+
+    async def run_db(self, handler, request):
+        """Run a handler on a worker thread with a pooled connection"""
+        return await self._run_in_slot(self._call, handler, request)
+
+    async def _run_in_slot(self, func, *args):
+        """Run func on a worker thread, queueing for a slot or failing fast with 503"""
+        if self.counters['queued'] >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise HttpError(503, "Server busy, retry later")
+        self.counters['queued'] += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.counters['queued'] -= 1
+        self.counters['in_flight'] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.counters['in_flight'] -= 1
+            self._slots.release()
+
+    def _call(self, handler, request):
+        with self.pool.connection() as connection:
+            return handler(connection, request)
+
+    def _buffer_logs(self, handler, request):
+        """POST /logs or /logs/batch with --write-behind: accepted once the logs are in the WAL"""
+        import log_writer
+        if handler is create_logs:
+            entries = _batch_fields(request)
+            self.log_writer.append_many(log_writer.make_event(*entry) for entry in entries)
+            return 202, {'buffered': len(entries)}
+        log_id, habit_id, log_date, status, notes = _log_fields(request)
+        self.log_writer.append(habit_id, log_date, status, notes, log_id)
+        return 202, {'buffered': 1}
+
+    async def dispatch(self, request):
+        """(status, payload) for a request"""
+        self.counters['requests'] += 1
+        try:
+            if request.path == '/health' and request.method == 'GET':
+                return 200, {'status': 'ok'}
+            if request.path == '/stats' and request.method == 'GET':
+                return 200, self.stats()
+            handler, request.params = resolve(request.method, request.path)
+            if handler in (create_log, create_logs) and self.log_writer is not None:
+                # No database work, but the WAL fsync still takes a worker slot and the queue limit
+                return await self._run_in_slot(self._buffer_logs, handler, request)
+            return await self.run_db(handler, request)
+        except HttpError as e:
+            status, message = e.status, str(e)
+        except PoolTimeout as e:
+            status, message = 503, str(e)
+        except Error as e:
+            if db_backend.is_constraint_error(e) or isinstance(e, log_archive.ArchivedLogError):
+                status, message = 409, str(e)
+            else:
+                print(f"{request.method} {request.path} failed: {e}", file=sys.stderr)
+                status, message = 500, "Database error"
+        except ValueError as e:
+            status, message = 400, str(e)
+        if status == 500:
+            self.counters['errors'] += 1
+        return status, {'error': message}
+
+    async def _read_request(self, reader):
+        """Next request on the connection, or None when the client is done"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_SECONDS)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "Request headers too large")
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HttpError(411, "Chunked bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+        body = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except asyncio.IncompleteReadError:
+                return None
+            except ValueError:
+                raise HttpError(400, "Body is not valid JSON")
+            if not isinstance(body, dict):
+                raise HttpError(400, "Body must be a JSON object")
+
+        url = urlsplit(target)
+        request = Request(method.upper(), url.path, parse_qs(url.query), headers, body)
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        return request, keep_alive
+
+    async def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=habit_cli.json_value).encode('utf-8')
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            head.append(f"Retry-After: {RETRY_AFTER_SECONDS}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        # Waits while the client is slow to read, so responses can't pile up in memory
+        await writer.drain()
+
+    async def _handle_client(self, reader, writer):
+        if self.counters['clients'] >= self.max_clients:
+            self.counters['clients_rejected'] += 1
+            try:
+                await self._write_response(writer, 503, {'error': "Too many connections"}, False)
+            except ConnectionError:
+                pass
+            writer.close()
+            return
+
+        self.counters['clients'] += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    parsed = await self._read_request(reader)
+                except HttpError as e:
+                    await self._write_response(writer, e.status, {'error': str(e)}, False)
+                    break
+                if parsed is None:
+                    break
+                request, keep_alive = parsed
+                status, payload = await self.dispatch(request)
+                await self._write_response(writer, status, payload, keep_alive)
+        except ConnectionError:
+            pass
+        finally:
+            self.counters['clients'] -= 1
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Personal Habit Tracker JSON API server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="defaults to HABIT_TRACKER_BACKEND")
+    parser.add_argument('--pool-size', type=int, default=8, help="database connections and worker threads")
+    parser.add_argument('--max-queue', type=int, default=1000, help="requests waiting for a worker before 503s")
+    parser.add_argument('--max-clients', type=int, default=10000, help="open client connections before 503s")
+    parser.add_argument('--write-behind', action='store_true',
+                        help="accept POST /logs into a local write-ahead log and insert in batches")
+    parser.add_argument('--wal-dir', help="default: HABIT_TRACKER_WAL_DIR or log_wal")
+    options = parser.parse_args(argv)
+
+    pool = ConnectionPool(lambda: db_backend.connect(options.backend), max_size=options.pool_size)
+    try:
+        # Fail fast on a bad configuration
+        pool.checkin(pool.checkout())
+    except Error as e:
+        print(f"Database connection failed: {e}", file=sys.stderr)
+        return 1
+
+    scheduler = goal_scheduler.OverdueScheduler(
+        lambda: db_backend.connect(options.backend),
+        on_overdue=lambda goal: print(f"Goal {goal.goal_id} of user {goal.user_id} is overdue "
+                                      f"(deadline {goal.deadline})", file=sys.stderr),
+    ).start()
+    writer = None
+    if options.write_behind:
+        import log_writer
+        # Replays whatever an earlier run left in the WAL
+        writer = log_writer.LogWriter(lambda: db_backend.connect(options.backend), options.wal_dir).start()
+    server = ApiServer(pool, max_queue=options.max_queue, max_clients=options.max_clients, scheduler=scheduler,
+                       log_writer=writer)
+    print(f"Serving on http://{options.host}:{options.port} "
+          f"({options.pool_size} workers, queue {options.max_queue})")
+    try:
+        asyncio.run(server.serve_forever(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        scheduler.stop()
+        if writer is not None:
+            writer.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
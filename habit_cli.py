@@ -0,0 +1,620 @@
+"""
+Personal Habit Tracker - Command Line Subcommands
+Non-interactive entry points for scripts and scheduled jobs, built on the
+query functions in habit_queries.py. Only the modules a command needs are
+imported: table_renderer for table output, NumPy for streaks, never tkinter.
+Table output streams rows as they are read and pages on a terminal.
+
+Usage:
+    python habit_cli.py report habits --format json
+    python habit_cli.py logs add --habit-id 201 --status Completed
+    python habit_cli.py goals overdue --format csv
+    python habit_cli.py goals evaluate
+    python habit_cli.py leaderboard users --by completed --top 20
+    python habit_cli.py calendar show 201 --from 2024-01-01 --to 2024-12-31
+    python habit_cli.py user-reports --output reports --format html --workers 8
+    python habit_cli.py archive run --keep-months 12
+    python habit_cli.py report users --snapshot
+    python habit_cli.py shards split && python habit_cli.py report above-average --sharded
+    python habit_cli.py export table logs --format jsonl --compress gzip
+
+Exit status is 0 on success, 1 on a database or file error and 2 on bad
+arguments.
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+import db_backend
+import habit_queries
+from db_backend import Error
+
+FORMATS = ('table', 'json', 'jsonl', 'csv')
+STATUSES = ('Completed', 'Pending', 'Skipped')
+
+# Column (key, header) pairs for every row shape a command can print
+USER_PERFORMANCE_COLUMNS = (('user_id', 'User ID'), ('name', 'Name'), ('habits', 'Habits'),
+                            ('total_logs', 'Total Logs'), ('completed_logs', 'Completed'),
+                            ('completion_rate', 'Completion %'))
+HABIT_PERFORMANCE_COLUMNS = (('habit', 'Habit'), ('total_logs', 'Total Logs'), ('completed_logs', 'Completed'),
+                             ('skipped_logs', 'Skipped'), ('pending_logs', 'Pending'),
+                             ('completion_rate', 'Completion %'))
+ABOVE_AVERAGE_COLUMNS = (('user_id', 'User ID'), ('name', 'Name'), ('completed_logs', 'Completed Logs'))
+HABITS_WITH_GOALS_COLUMNS = (('user', 'User'), ('habit', 'Habit'), ('frequency', 'Frequency'),
+                             ('goal', 'Goal'), ('deadline', 'Deadline'), ('is_achieved', 'Achieved'))
+OVERDUE_GOALS_COLUMNS = (('user_id', 'User ID'), ('name', 'Name'), ('goal_id', 'Goal ID'),
+                         ('description', 'Description'), ('deadline', 'Deadline'),
+                         ('days_overdue', 'Days Overdue'))
+STREAK_COLUMNS = (('habit_id', 'Habit ID'), ('user_id', 'User ID'), ('habit', 'Habit'),
+                  ('frequency', 'Frequency'), ('current', 'Current'), ('longest', 'Longest'),
+                  ('current_breaks_on', 'Breaks On'), ('longest_broke_on', 'Longest Broke On'))
+LEADERBOARD_COLUMNS = (('rank', 'Rank'), ('id', 'ID'), ('name', 'Name'), ('total_logs', 'Total Logs'),
+                       ('completed_logs', 'Completed'), ('completion_rate', 'Completion %'))
+WORKER_COLUMNS = (('worker', 'Worker PID'), ('shards', 'Shards'), ('users', 'Users'),
+                  ('query_seconds', 'Query s'), ('render_seconds', 'Render s'))
+LOG_COLUMNS = tuple(zip(('log_id', 'habit', 'log_date', 'status', 'notes'), habit_queries.LOG_COLUMNS))
+
+
+def _fetch_streaks(connection):
+    import streaks
+    return streaks.all_streaks(connection)
+
+
+# report name -> (fetch function, columns, title)
+REPORTS = {
+    'users': (habit_queries.fetch_user_performance, USER_PERFORMANCE_COLUMNS, "USER PERFORMANCE SUMMARY"),
+    'habits': (habit_queries.fetch_habit_performance, HABIT_PERFORMANCE_COLUMNS, "HABIT PERFORMANCE REPORT"),
+    'above-average': (habit_queries.fetch_users_above_average, ABOVE_AVERAGE_COLUMNS,
+                      "USERS WITH ABOVE AVERAGE PERFORMANCE"),
+    'goals': (habit_queries.fetch_habits_with_goals, HABITS_WITH_GOALS_COLUMNS, "HABITS WITH GOALS"),
+    'overdue': (habit_queries.fetch_overdue_goals, OVERDUE_GOALS_COLUMNS, "OVERDUE GOALS"),
+    'streaks': (_fetch_streaks, STREAK_COLUMNS, "HABIT STREAKS"),
+}
+
+
+# --- Output ---
+
+def json_value(value):
+    """json.dump default= hook for Decimal and date values"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def write_rows(rows, columns, fmt='table', out=None, title=None, paged=False):
+    """Write rows in the requested format; rows can be any iterable of sequences.
+
+    paged tables pause after every screen when `out` is a terminal.
+    """
+    out = out or sys.stdout
+    keys = [key for key, _ in columns]
+    if fmt == 'json':
+        import json
+        json.dump([dict(zip(keys, row)) for row in rows], out, default=json_value, indent=2)
+        out.write('\n')
+    elif fmt == 'jsonl':
+        import json
+        for row in rows:
+            out.write(json.dumps(dict(zip(keys, row)), default=json_value) + '\n')
+    elif fmt == 'csv':
+        import csv
+        writer = csv.writer(out)
+        writer.writerow(keys)
+        writer.writerows(rows)
+    else:
+        import table_renderer
+        if title:
+            out.write(f"{title}\n")
+        pager = table_renderer.pager_for(out) if paged else None
+        if not table_renderer.render_table(rows, [header for _, header in columns], out, pager):
+            out.write("No rows.\n")
+
+
+def _fail(message):
+    print(f"Error: {message}", file=sys.stderr)
+    return 1
+
+
+# --- Commands ---
+
+def cmd_report(connection, options):
+    fetch, columns, title = REPORTS[options.name]
+    try:
+        if options.snapshot is not None:
+            import analytics
+            rows = analytics.REPORTS[options.name](analytics.load_snapshot(options.snapshot or None))
+        elif options.sharded:
+            import shards
+            if options.name not in shards.REPORTS:
+                return _fail(f"the {options.name} report cannot run over shards")
+            with shards.ShardSet(backend=options.backend) as shard_set:
+                rows = shard_set.report(options.name)
+        else:
+            rows = fetch(connection)
+    except ImportError:
+        return _fail("the streak engine and snapshots need NumPy: pip install numpy")
+    write_rows(rows, columns, options.format, title=title, paged=not options.no_pager)
+    return 0
+
+
+def cmd_logs_list(connection, options):
+    rows = habit_queries.iter_logs(connection, options.habit_id, options.date_from, options.date_to)
+    if options.limit:
+        rows = islice(rows, options.limit)
+    write_rows(rows, LOG_COLUMNS, options.format, title="LOGS", paged=not options.no_pager)
+    return 0
+
+
+def cmd_logs_add(connection, options):
+    log_date = options.log_date or date.today()
+    if options.log_id is not None:
+        habit_queries.insert_log(connection, options.log_id, options.habit_id, log_date, options.status,
+                                 options.notes or '')
+        print(f"Log {options.log_id} added.")
+        return 0
+    log_id, created = habit_queries.upsert_log(connection, options.habit_id, log_date, options.status,
+                                               options.notes)
+    print(f"Log {log_id} {'added' if created else 'updated'}.")
+    return 0
+
+
+def cmd_logs_set_status(connection, options):
+    if not habit_queries.set_log_status(connection, options.log_id, options.status):
+        return _fail(f"log {options.log_id} not found")
+    print(f"Log {options.log_id} set to {options.status}.")
+    return 0
+
+
+def cmd_logs_import(connection, options):
+    import log_importer
+    stats = log_importer.import_logs(connection, options.files, options.batch_size)
+    print(f"Imported {stats.inserted} of {stats.read} rows in {stats.elapsed:.2f}s, rejected {stats.rejected}.")
+    for source, line_no, reason in stats.reject_samples:
+        print(f"{source}:{line_no}: {reason}", file=sys.stderr)
+    return 1 if stats.rejected else 0
+
+
+def cmd_logs_replay_wal(connection, options):
+    import log_writer
+    stats = log_writer.replay(connection, options.dir)
+    print(f"Replayed {stats['replayed']} logged events: wrote {stats['written']}, "
+          f"skipped {stats['duplicates']} log_ids already present, rejected {stats['rejected']}.")
+    if stats['rejected']:
+        print(f"Rejected events were added to {log_writer.REJECTED_NAME} in {options.dir or log_writer.WAL_DIR}",
+              file=sys.stderr)
+    return 1 if stats['rejected'] else 0
+
+
+def cmd_goals_overdue(connection, options):
+    _, columns, title = REPORTS['overdue']
+    write_rows(habit_queries.fetch_overdue_goals(connection), columns, options.format, title=title)
+    return 0
+
+
+def cmd_goals_achieve(connection, options):
+    if len(options.goal_ids) == 1:
+        goal_id = options.goal_ids[0]
+        message = habit_queries.mark_goal_achieved(connection, goal_id)
+        print(message or f"Goal {goal_id} processed.")
+        return 0
+    marked = habit_queries.mark_goals_achieved(connection, options.goal_ids)
+    print(f"Marked {marked} of {len(set(options.goal_ids))} goals achieved.")
+    return 0
+
+
+def cmd_goals_evaluate(connection, options):
+    import goal_evaluation
+    evaluation = goal_evaluation.evaluate_goals(connection, dry_run=options.dry_run)
+    verb = "would be marked" if options.dry_run else "were marked"
+    print(f"Evaluated {evaluation.evaluated} open goals with targets; "
+          f"{len(evaluation.achieved)} reached their target and {verb} achieved.")
+    if options.dry_run and evaluation.achieved:
+        print("Goal IDs: " + ", ".join(str(goal_id) for goal_id in evaluation.achieved))
+    return 0
+
+
+def cmd_goals_watch(connection, options):
+    import json
+    import time
+    import goal_scheduler
+
+    def emit(goal):
+        row = (goal.user_id, goal.name, goal.goal_id, goal.description, goal.deadline,
+               (date.today() - goal.deadline).days)
+        keys = [key for key, _ in OVERDUE_GOALS_COLUMNS]
+        print(json.dumps(dict(zip(keys, row)), default=json_value), flush=True)
+
+    scheduler = goal_scheduler.OverdueScheduler(lambda: db_backend.connect(options.backend), on_overdue=emit)
+    scheduler.start()
+    print("Watching goal deadlines; press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+    return 0
+
+
+def cmd_leaderboard(connection, options):
+    import leaderboard
+    board = leaderboard.get(connection)
+    if options.id is None:
+        rows = board.top(options.kind, options.by, options.top, options.offset)
+        write_rows(rows, LEADERBOARD_COLUMNS, options.format,
+                   title=f"TOP {options.kind.upper()} BY {options.by.upper()}")
+        return 0
+    entry = board.rank(options.kind, options.id, options.by)
+    if entry is None:
+        return _fail(f"{options.kind[:-1]} {options.id} is not ranked (no logs)")
+    percentile = board.percentile(options.kind, options.id, options.by)
+    write_rows([entry + (percentile,)], LEADERBOARD_COLUMNS + (('percentile', 'Percentile'),), options.format,
+               title=f"{options.kind.upper()} RANKING BY {options.by.upper()}")
+    return 0
+
+
+# Heatmap cells: no log, then increasing shares of the busiest day
+HEATMAP_LEVELS = '.-+#'
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def heatmap_lines(heatmap):
+    """A day_bitmaps.Heatmap as text: a row per weekday, a column per week, month names on top"""
+    weeks = len(heatmap.rows[0])
+    peak = max((count for row in heatmap.rows for count in row if count), default=0)
+    months, free = [' '] * weeks, 0
+    for week in range(weeks):
+        sunday = heatmap.week_start + timedelta(days=7 * week + 6)
+        # Label the week holding the 1st of a month, when the name fits
+        if sunday.day <= 7 and week >= free and week + 3 <= weeks:
+            months[week:week + 3] = sunday.strftime('%b')
+            free = week + 4
+    lines = ['    ' + ''.join(months)]
+    for weekday, row in zip(WEEKDAYS, heatmap.rows):
+        cells = [
+            ' ' if count is None else HEATMAP_LEVELS[1 + (count * 3 - 1) // peak if count else 0]
+            for count in row
+        ]
+        lines.append(f"{weekday} {''.join(cells)}")
+    return lines
+
+
+def cmd_calendar_show(connection, options):
+    import day_bitmaps
+    date_to = options.date_to or date.today()
+    date_from = options.date_from or date_to - timedelta(days=364)
+    if date_from > date_to:
+        return _fail("--from is after --to")
+    bitmaps = day_bitmaps.get(connection)
+    for habit_id in options.habit_ids:
+        if habit_id not in bitmaps:
+            return _fail(f"habit {habit_id} not found")
+    heatmap = bitmaps.heatmap(options.habit_ids, date_from, date_to, options.status)
+    days = sum(bitmaps.count(habit_id, date_from, date_to, options.status) for habit_id in options.habit_ids)
+    if options.format == 'json':
+        import json
+        json.dump(dict(heatmap._asdict(), habit_ids=options.habit_ids, status=options.status, days=days),
+                  sys.stdout, default=json_value)
+        print()
+        return 0
+    habits = ', '.join(str(habit_id) for habit_id in options.habit_ids)
+    print(f"{options.status.upper()} DAYS OF HABIT {habits}, {date_from} TO {date_to}: {days}")
+    for line in heatmap_lines(heatmap):
+        print(line)
+    return 0
+
+
+def cmd_calendar_day(connection, options):
+    import day_bitmaps
+    status = day_bitmaps.get(connection).status_on(options.habit_id, options.day)
+    print(f"Habit {options.habit_id} on {options.day}: {status or 'not completed or skipped'}")
+    return 0
+
+
+def cmd_calendar_rebuild(connection, options):
+    import day_bitmaps
+    stats = day_bitmaps.rebuild(connection).stats()
+    print(f"Rebuilt the day bitmaps of {stats['habits']:,} habits ({stats['bytes']:,} bytes).")
+    return 0
+
+
+def cmd_user_reports(connection, options):
+    import user_reports
+    stats, results = user_reports.generate_reports(
+        connection, options.output, options.format, options.workers, options.backend, options.shard_size,
+        options.user_ids or None,
+        progress=None if options.quiet else lambda result: print(
+            f"users {result.first_user_id}-{result.last_user_id}: {result.users} reports "
+            f"(worker {result.worker}, {result.query_seconds + result.render_seconds:.2f}s)", file=sys.stderr),
+    )
+    print(f"Wrote {stats.users:,} reports ({stats.bytes / 1e6:.1f} MB) to {options.output} in {stats.seconds:.2f}s: "
+          f"{stats.users / max(stats.seconds, 1e-9):,.0f} users/s with {stats.workers} workers.")
+    write_rows(user_reports.worker_timings(results), WORKER_COLUMNS, 'table', title="PER-WORKER TIMING")
+    return 0
+
+
+def cmd_archive_run(connection, options):
+    import log_archive
+    created = log_archive.archive_logs(
+        connection, options.keep_months,
+        progress=lambda segment: print(f"{segment['period']}: {segment['rows']} logs -> {segment['file']} "
+                                       f"({segment['bytes']:,} bytes)"),
+    )
+    print(f"Archived {sum(segment['rows'] for segment in created)} logs into {len(created)} segment(s).")
+    return 0
+
+
+def cmd_archive_status(connection, options):
+    import log_archive
+    rows = [
+        (segment['period'], segment['file'], segment['rows'], segment['bytes'], segment['status'])
+        for segment in log_archive.segments(connection, status=None)
+    ]
+    columns = (('period', 'Period'), ('file', 'File'), ('rows', 'Logs'), ('bytes', 'Bytes'), ('status', 'Status'))
+    write_rows(rows, columns, options.format, title="LOG ARCHIVE")
+    return 0
+
+
+def cmd_snapshot_create(connection, options):
+    try:
+        import analytics
+    except ImportError:
+        return _fail("snapshots need NumPy: pip install numpy")
+    meta = analytics.create_snapshot(connection, options.dir)
+    lengths = meta['lengths']
+    print(f"Snapshot written to {options.dir or analytics.SNAPSHOT_DIR}: {lengths['log_day']} logs, "
+          f"{lengths['habit_id']} habits, {lengths['user_id']} users, {lengths['goal_id']} goals.")
+    return 0
+
+
+SHARD_COLUMNS = (('shard', 'Shard'), ('customers', 'Customers'), ('habits', 'Habits'), ('goals', 'Goals'),
+                 ('logs', 'Logs'))
+
+
+def cmd_shards_init(connection, options):
+    import shards
+    with shards.ShardSet(backend=options.backend) as shard_set:
+        shard_set.prepare()
+        print(f"Prepared {len(shard_set)} shard(s): {', '.join(shard_set.shards)}.")
+    return 0
+
+
+def cmd_shards_split(connection, options):
+    import shards
+    with shards.ShardSet(backend=options.backend) as shard_set:
+        counts = shards.split(connection, shard_set, options.batch_size)
+        print(f"Copied {counts['Customer']:,} customers, {counts['Habit']:,} habits, {counts['Goal']:,} goals "
+              f"and {counts['Logs']:,} logs into {len(shard_set)} shards.")
+    return 0
+
+
+def cmd_shards_status(connection, options):
+    import shards
+    with shards.ShardSet(backend=options.backend) as shard_set:
+        write_rows(shard_set.table_counts(), SHARD_COLUMNS, options.format, title="SHARDS")
+    return 0
+
+
+def cmd_export(connection, options):
+    import exporter
+    meter = None if options.quiet or not sys.stderr.isatty() else exporter.ProgressMeter()
+    try:
+        path, rows = exporter.export(connection, options.kind, options.name, options.output, options.format,
+                                     options.compress, options.chunk_size, meter)
+    except ImportError as e:
+        return _fail(e)
+    finally:
+        if meter:
+            meter.finish()
+    print(f"Exported {rows:,} rows to {path}.")
+    return 0
+
+
+def _parse_date(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}, expected YYYY-MM-DD")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="habit_cli.py", description="Personal Habit Tracker commands")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="defaults to HABIT_TRACKER_BACKEND")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    report = commands.add_parser('report', help="print a report")
+    report.add_argument('name', choices=sorted(REPORTS))
+    report.add_argument('--format', choices=FORMATS, default='table')
+    source = report.add_mutually_exclusive_group()
+    source.add_argument('--snapshot', nargs='?', const='', metavar='DIR',
+                        help="read an analytics snapshot instead of the database")
+    source.add_argument('--sharded', action='store_true',
+                        help="gather the report from the HABIT_TRACKER_SHARDS databases")
+    report.add_argument('--no-pager', action='store_true', help="do not pause after every screen")
+    report.set_defaults(handler=cmd_report)
+
+    logs = commands.add_parser('logs', help="list, add, update or import logs")
+    log_commands = logs.add_subparsers(dest='logs_command', metavar='ACTION', required=True)
+
+    log_list = log_commands.add_parser('list', help="stream logs, newest first")
+    log_list.add_argument('--habit-id', type=int)
+    log_list.add_argument('--from', dest='date_from', type=_parse_date)
+    log_list.add_argument('--to', dest='date_to', type=_parse_date)
+    log_list.add_argument('--limit', type=int, default=0, help="maximum rows (default: all)")
+    log_list.add_argument('--format', choices=FORMATS, default='table')
+    log_list.add_argument('--no-pager', action='store_true', help="do not pause after every screen")
+    log_list.set_defaults(handler=cmd_logs_list)
+
+    log_add = log_commands.add_parser('add', help="add a habit's log for a day, or update it if there is one")
+    log_add.add_argument('--log-id', type=int, help="insert with this ID instead (fails if the day is logged)")
+    log_add.add_argument('--habit-id', type=int, required=True)
+    log_add.add_argument('--date', dest='log_date', type=_parse_date, help="default: today")
+    log_add.add_argument('--status', choices=STATUSES, default='Pending')
+    log_add.add_argument('--notes', help="default: keep the notes of an existing log")
+    log_add.set_defaults(handler=cmd_logs_add)
+
+    log_status = log_commands.add_parser('set-status', help="change the status of a log")
+    log_status.add_argument('log_id', type=int)
+    log_status.add_argument('status', choices=STATUSES)
+    log_status.set_defaults(handler=cmd_logs_set_status)
+
+    log_import = log_commands.add_parser('import', help="bulk import CSV / JSON Lines files")
+    log_import.add_argument('files', nargs='+')
+    log_import.add_argument('--batch-size', type=int, default=5000)
+    log_import.set_defaults(handler=cmd_logs_import)
+
+    log_replay = log_commands.add_parser('replay-wal', help="insert the logs left in a write-behind WAL")
+    log_replay.add_argument('--dir', help="default: HABIT_TRACKER_WAL_DIR or log_wal")
+    log_replay.set_defaults(handler=cmd_logs_replay_wal)
+
+    goals = commands.add_parser('goals', help="overdue goals and achievements")
+    goal_commands = goals.add_subparsers(dest='goals_command', metavar='ACTION', required=True)
+
+    goal_overdue = goal_commands.add_parser('overdue', help="unachieved goals past their deadline")
+    goal_overdue.add_argument('--format', choices=FORMATS, default='table')
+    goal_overdue.set_defaults(handler=cmd_goals_overdue)
+
+    goal_achieve = goal_commands.add_parser(
+        'achieve', help="mark goals achieved (MarkGoalAchieved, or MarkGoalsAchieved for several)"
+    )
+    goal_achieve.add_argument('goal_ids', type=int, nargs='+', metavar='goal_id')
+    goal_achieve.set_defaults(handler=cmd_goals_achieve)
+
+    goal_evaluate = goal_commands.add_parser(
+        'evaluate', help="mark every goal whose habit reached its target achieved"
+    )
+    goal_evaluate.add_argument('--dry-run', action='store_true',
+                               help="report the goals that reached their target without marking them")
+    goal_evaluate.set_defaults(handler=cmd_goals_evaluate)
+
+    goal_watch = goal_commands.add_parser('watch', help="print a JSON line whenever a goal becomes overdue")
+    goal_watch.set_defaults(handler=cmd_goals_watch)
+
+    archive = commands.add_parser('archive', help="move closed months of logs to the cold archive")
+    archive_commands = archive.add_subparsers(dest='archive_command', metavar='ACTION', required=True)
+
+    archive_run = archive_commands.add_parser('run', help="archive months older than --keep-months")
+    archive_run.add_argument('--keep-months', type=int, default=12,
+                             help="full months kept in the Logs table besides the current one")
+    archive_run.set_defaults(handler=cmd_archive_run)
+
+    archive_status = archive_commands.add_parser('status', help="list archive segments")
+    archive_status.add_argument('--format', choices=FORMATS, default='table')
+    archive_status.set_defaults(handler=cmd_archive_status)
+
+    export = commands.add_parser('export', help="stream a table or report to CSV, JSON Lines or Parquet")
+    export_kinds = export.add_subparsers(dest='kind', metavar='KIND', required=True)
+    for kind, names in (('table', ('customers', 'habits', 'goals', 'logs')), ('report', sorted(REPORTS))):
+        export_kind = export_kinds.add_parser(kind, help=f"export a {kind}")
+        export_kind.add_argument('name', choices=names)
+        export_kind.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), default='csv')
+        export_kind.add_argument('--compress', choices=('gzip', 'zstd'),
+                                 help="compress the file (Parquet: the codec used inside the file)")
+        export_kind.add_argument('--output', '-o', help="default: NAME[_report].FORMAT[.gz|.zst]")
+        export_kind.add_argument('--chunk-size', type=int, default=10000, help="rows fetched and written at a time")
+        export_kind.add_argument('--quiet', '-q', action='store_true', help="no progress meter")
+        export_kind.set_defaults(handler=cmd_export)
+
+    board = commands.add_parser('leaderboard', help="users or habits ranked by completion")
+    board.add_argument('kind', choices=('users', 'habits'))
+    board.add_argument('--by', choices=('rate', 'completed'), default='rate',
+                       help="completion rate or completed-log count")
+    board.add_argument('--top', type=int, default=10, help="entries to show")
+    board.add_argument('--offset', type=int, default=0, help="skip this many entries first")
+    board.add_argument('--id', type=int, help="show the rank and percentile of one user or habit")
+    board.add_argument('--format', choices=FORMATS, default='table')
+    board.set_defaults(handler=cmd_leaderboard)
+
+    calendar = commands.add_parser('calendar', help="calendar heatmaps from the per-habit day bitmaps")
+    calendar_commands = calendar.add_subparsers(dest='calendar_command', metavar='ACTION', required=True)
+
+    calendar_show = calendar_commands.add_parser('show', help="heatmap of one habit, or summed over several")
+    calendar_show.add_argument('habit_ids', type=int, nargs='+', metavar='habit_id')
+    calendar_show.add_argument('--from', dest='date_from', type=_parse_date, help="default: 364 days before --to")
+    calendar_show.add_argument('--to', dest='date_to', type=_parse_date, help="default: today")
+    calendar_show.add_argument('--status', choices=('Completed', 'Skipped'), default='Completed')
+    calendar_show.add_argument('--format', choices=('table', 'json'), default='table')
+    calendar_show.set_defaults(handler=cmd_calendar_show)
+
+    calendar_day = calendar_commands.add_parser('day', help="status of a habit's log on one day")
+    calendar_day.add_argument('habit_id', type=int)
+    calendar_day.add_argument('day', type=_parse_date)
+    calendar_day.set_defaults(handler=cmd_calendar_day)
+
+    calendar_rebuild = calendar_commands.add_parser('rebuild', help="rebuild the bitmaps from Logs and the archive")
+    calendar_rebuild.set_defaults(handler=cmd_calendar_rebuild)
+
+    user_report = commands.add_parser('user-reports', help="write one progress report file per user")
+    user_report.add_argument('--output', '-o', default='user_reports', help="directory for the report files")
+    user_report.add_argument('--format', choices=('md', 'html'), default='md')
+    user_report.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    user_report.add_argument('--shard-size', type=int, default=500, help="users per unit of work")
+    user_report.add_argument('--user', dest='user_ids', type=int, action='append',
+                             help="only this user (repeatable)")
+    user_report.add_argument('--quiet', '-q', action='store_true', help="no per-shard progress")
+    user_report.set_defaults(handler=cmd_user_reports)
+
+    snapshot = commands.add_parser('snapshot', help="columnar analytics snapshots")
+    snapshot_commands = snapshot.add_subparsers(dest='snapshot_command', metavar='ACTION', required=True)
+
+    snapshot_create = snapshot_commands.add_parser('create', help="snapshot the database for report --snapshot")
+    snapshot_create.add_argument('--dir', help="default: HABIT_TRACKER_SNAPSHOT_DIR or analytics_snapshot")
+    snapshot_create.set_defaults(handler=cmd_snapshot_create)
+
+    shards = commands.add_parser('shards', help="user-sharded databases (HABIT_TRACKER_SHARDS)")
+    shard_commands = shards.add_subparsers(dest='shards_command', metavar='ACTION', required=True)
+
+    shards_init = shard_commands.add_parser('init', help="create the shards' schema and log_id ranges")
+    shards_init.set_defaults(handler=cmd_shards_init, sharded=True)
+
+    shards_split = shard_commands.add_parser('split', help="copy the database into empty shards by user")
+    shards_split.add_argument('--batch-size', type=int, default=5000, help="rows per insert batch")
+    shards_split.set_defaults(handler=cmd_shards_split)
+
+    shards_status = shard_commands.add_parser('status', help="row counts per shard")
+    shards_status.add_argument('--format', choices=FORMATS, default='table')
+    shards_status.set_defaults(handler=cmd_shards_status, sharded=True)
+
+    return parser
+
+
+COMMANDS = ('report', 'logs', 'goals', 'archive', 'snapshot', 'export', 'leaderboard', 'calendar', 'user-reports',
+            'shards')
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    if getattr(options, 'snapshot', None) is not None:
+        # Snapshot reports never touch the database
+        try:
+            return options.handler(None, options)
+        except FileNotFoundError as e:
+            return _fail(f"no snapshot at {e.filename}; run `habit_cli.py snapshot create` first")
+        except (OSError, ValueError) as e:
+            return _fail(e)
+    if getattr(options, 'sharded', False):
+        # Sharded commands open their own connection per shard
+        try:
+            return options.handler(None, options)
+        except (Error, OSError) as e:
+            return _fail(e)
+    try:
+        connection = db_backend.connect(options.backend)
+    except Error as e:
+        return _fail(f"database connection failed: {e}")
+    try:
+        return options.handler(connection, options)
+    except (Error, OSError) as e:
+        return _fail(e)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,683 @@
+"""
+Personal Habit Tracker - Query APIs
+Queries and writes that return data instead of printing it, for use by the
+menus, batch jobs, benchmarks and other front ends.
+"""
+
+import json
+from decimal import Decimal, ROUND_HALF_UP
+
+import day_bitmaps
+import db_backend
+import goal_scheduler
+import leaderboard
+import log_archive
+import report_cache
+from report_cache import cached_report
+
+# Largest IN (...) list sent in one statement
+IN_CHUNK_SIZE = 1000
+
+_FOUR_PLACES = Decimal('0.0001')
+_FIVE_PLACES = Decimal('0.00001')
+_TWO_PLACES = Decimal('0.01')
+
+
+def completion_rate(total_logs, completed_logs):
+    """Completion percentage with the same rounding as GetHabitCompletionRate"""
+    if not total_logs:
+        return Decimal('0.00')
+    # MySQL evaluates (completed * 100.0) / total at scale 5 (div_precision_increment),
+    # then rounds into the DECIMAL(5,2) return value
+    rate = (Decimal(int(completed_logs)) * 100 / Decimal(int(total_logs))).quantize(_FIVE_PLACES, ROUND_HALF_UP)
+    return rate.quantize(_TWO_PLACES, ROUND_HALF_UP)
+
+
+def average_rate(total_logs, completed_logs):
+    """Same value as ROUND(AVG(CASE WHEN status = 'Completed' THEN 100 ELSE 0 END), 2)"""
+    if not total_logs:
+        return None
+    # AVG over integers is evaluated at scale 4 before ROUND(..., 2)
+    rate = (Decimal(int(completed_logs)) * 100 / Decimal(int(total_logs))).quantize(_FOUR_PLACES, ROUND_HALF_UP)
+    return rate.quantize(_TWO_PLACES, ROUND_HALF_UP)
+
+
+def _fetch_all(connection, query, args=None):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, args)
+        return list(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _iter_rows(connection, query, args=None, batch_size=1000):
+    """Yield a query's rows through an unbuffered cursor, batch_size at a time"""
+    cursor = db_backend.streaming_cursor(connection)
+    try:
+        cursor.execute(query, args)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _execute_write(connection, query, args):
+    """Run one write statement and commit; returns the affected row count"""
+    cursor = connection.cursor()
+    try:
+        affected = cursor.execute(query, args)
+        connection.commit()
+        return affected
+    finally:
+        cursor.close()
+
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def get_completion_counts(connection, habit_ids=None):
+    """Map habit_id -> (total_logs, completed_logs) from one grouped pass over Logs"""
+    query = """
+    SELECT h.habit_id,
+           COUNT(l.log_id),
+           SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END)
+    FROM Habit h
+    LEFT JOIN Logs l ON l.habit_id = h.habit_id
+    {where}
+    GROUP BY h.habit_id
+    """
+    counts = {}
+    cursor = connection.cursor()
+    try:
+        if habit_ids is None:
+            cursor.execute(query.format(where=""))
+            rows = cursor.fetchall()
+        else:
+            rows = []
+            for chunk in _chunks(habit_ids):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(query.format(where=f"WHERE h.habit_id IN ({placeholders})"), chunk)
+                rows.extend(cursor.fetchall())
+    finally:
+        cursor.close()
+    archived = log_archive.habit_totals(connection)
+    for habit_id, total, completed in rows:
+        old_total, old_completed = archived.get(habit_id, (0, 0))[:2]
+        counts[habit_id] = (int(total or 0) + old_total, int(completed or 0) + old_completed)
+    return counts
+
+
+def get_completion_rates(connection, habit_ids=None):
+    """Map habit_id -> completion rate (%) for the given habits, or all habits.
+
+    Equivalent to calling GetHabitCompletionRate for each habit, but computed
+    in a single grouped pass. Unknown habit IDs are omitted.
+    """
+    return {
+        habit_id: completion_rate(total, completed)
+        for habit_id, (total, completed) in get_completion_counts(connection, habit_ids).items()
+    }
+
+
+@cached_report('Customer', 'Habit', 'Logs')
+def fetch_user_performance(connection):
+    """Rows for the user performance summary, read from UserSummary.
+
+    Returns (user_id, name, habits, total_logs, completed_logs, completion %)
+    for users with at least one log, best completion rate first. Archived
+    logs (see log_archive.py) are included.
+    """
+    archived = log_archive.habit_totals(connection)
+    if archived:
+        return _user_performance_with_archive(connection, archived)
+    cursor = connection.cursor()
+    try:
+        # The original LEFT JOIN report averages one extra 0% row for every habit
+        # with no logs, so those habits are counted to keep the same percentages
+        cursor.execute("""
+        SELECT c.user_id, c.name, us.habit_count, us.total_logs, us.completed_logs,
+               (SELECT COUNT(*)
+                FROM Habit h
+                JOIN HabitSummary hs ON hs.habit_id = h.habit_id
+                WHERE h.user_id = us.user_id AND hs.total_logs = 0) AS empty_habits
+        FROM UserSummary us
+        JOIN Customer c ON c.user_id = us.user_id
+        WHERE us.total_logs > 0
+        """)
+        rows = [
+            (user_id, name, habits, total, completed, average_rate(total + empty_habits, completed))
+            for user_id, name, habits, total, completed, empty_habits in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+    rows.sort(key=lambda row: row[5], reverse=True)
+    return rows
+
+
+def _habit_counts_with_archive(connection, archived):
+    """(habit_id, user_id, user name, habit name, [total, completed, skipped, pending]) per habit"""
+    rows = _fetch_all(connection, """
+    SELECT h.habit_id, h.user_id, c.name, h.name,
+           hs.total_logs, hs.completed_logs, hs.skipped_logs, hs.pending_logs
+    FROM HabitSummary hs
+    JOIN Habit h ON h.habit_id = hs.habit_id
+    JOIN Customer c ON c.user_id = h.user_id
+    """)
+    merged = []
+    for habit_id, user_id, user_name, habit_name, *counts in rows:
+        old = archived.get(habit_id, (0, 0, 0, 0))
+        merged.append((habit_id, user_id, user_name, habit_name,
+                       [int(count) + old[i] for i, count in enumerate(counts)]))
+    return merged
+
+
+def _user_performance_with_archive(connection, archived):
+    users = {}
+    for _, user_id, name, _, counts in _habit_counts_with_archive(connection, archived):
+        user = users.setdefault(user_id, [name, 0, 0, 0, 0])
+        user[1] += 1
+        user[2] += counts[0]
+        user[3] += counts[1]
+        user[4] += counts[0] == 0
+    rows = [
+        (user_id, name, habits, total, completed, average_rate(total + empty_habits, completed))
+        for user_id, (name, habits, total, completed, empty_habits) in users.items()
+        if total > 0
+    ]
+    rows.sort(key=lambda row: row[5], reverse=True)
+    return rows
+
+
+@cached_report('Habit', 'Logs')
+def fetch_habit_performance(connection):
+    """Rows for the habit performance report, read from HabitSummary.
+
+    Returns (habit name, total, completed, skipped, pending, completion %)
+    for habits with at least one log, best completion rate first. Archived
+    logs are included.
+    """
+    archived = log_archive.habit_totals(connection)
+    if archived:
+        rows = [
+            (habit_name, total, completed, skipped, pending, average_rate(total, completed))
+            for _, _, _, habit_name, (total, completed, skipped, pending)
+            in _habit_counts_with_archive(connection, archived)
+            if total > 0
+        ]
+        rows.sort(key=lambda row: row[5], reverse=True)
+        return rows
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+        SELECT h.name, hs.total_logs, hs.completed_logs, hs.skipped_logs, hs.pending_logs
+        FROM HabitSummary hs
+        JOIN Habit h ON h.habit_id = hs.habit_id
+        WHERE hs.total_logs > 0
+        """)
+        rows = [
+            (name, total, completed, skipped, pending, average_rate(total, completed))
+            for name, total, completed, skipped, pending in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+    rows.sort(key=lambda row: row[5], reverse=True)
+    return rows
+
+
+# --- Advanced queries ---
+
+@cached_report('Customer', 'Habit', 'Logs')
+def fetch_users_above_average(connection):
+    """Users whose completed-log count beats the average per-habit completed count"""
+    if log_archive.habit_totals(connection):
+        return filter_above_average(*fetch_completed_totals(connection))
+    return _fetch_all(connection, """
+    SELECT 
+        c.user_id,
+        c.name,
+        COUNT(CASE WHEN l.status = 'Completed' THEN 1 END) AS completed_logs
+    FROM Customer c
+    JOIN Habit h ON c.user_id = h.user_id
+    JOIN Logs l ON h.habit_id = l.habit_id
+    GROUP BY c.user_id, c.name
+    HAVING COUNT(CASE WHEN l.status = 'Completed' THEN 1 END) > (
+        SELECT AVG(completed_count)
+        FROM (
+            SELECT COUNT(CASE WHEN status = 'Completed' THEN 1 END) AS completed_count
+            FROM Logs
+            GROUP BY habit_id
+        ) AS avg_table
+    )
+    ORDER BY completed_logs DESC
+    """)
+
+
+@cached_report('Customer', 'Habit', 'Logs')
+def fetch_completed_totals(connection):
+    """The parts of users_above_average that add up across databases.
+
+    Returns ([(user_id, name, completed_logs)] for users with logs, number of
+    habits with logs, completed logs of those habits), archive included.
+    """
+    users = {}
+    habits_with_logs = completed_sum = 0
+    archived = log_archive.habit_totals(connection)
+    for _, user_id, name, _, (total, completed, _, _) in _habit_counts_with_archive(connection, archived):
+        if total:
+            habits_with_logs += 1
+            completed_sum += completed
+            user = users.setdefault(user_id, [name, 0])
+            user[1] += completed
+    return [(user_id, name, completed) for user_id, (name, completed) in users.items()], habits_with_logs, completed_sum
+
+
+def filter_above_average(users, habits_with_logs, completed_sum):
+    """Rows of fetch_completed_totals beating the average per-habit completed count, best first"""
+    # completed > completed_sum / habits_with_logs, without rounding
+    rows = [row for row in users if row[2] * habits_with_logs > completed_sum]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+@cached_report('Customer', 'Habit', 'Goal')
+def fetch_habits_with_goals(connection):
+    """Every habit with its owner and goals (habits without goals included)"""
+    return _fetch_all(connection, """
+    SELECT 
+        c.name AS user_name,
+        h.name AS habit_name,
+        h.frequency,
+        g.description AS goal_description,
+        g.deadline,
+        g.is_achieved
+    FROM Customer c
+    JOIN Habit h ON c.user_id = h.user_id
+    LEFT JOIN Goal g ON h.habit_id = g.habit_id
+    ORDER BY c.name, h.name
+    """)
+
+
+@cached_report('Customer', 'Habit', 'Goal', per_day=True)
+def fetch_overdue_goals(connection):
+    """Unachieved goals past their deadline, most overdue first.
+
+    Served from a running goal_scheduler for this database when there is one;
+    otherwise idx_goal_achieved_deadline limits the scan to overdue goals.
+    """
+    scheduled = goal_scheduler.overdue_goals(connection)
+    if scheduled is not None:
+        return scheduled
+    return _fetch_all(connection, """
+    SELECT DISTINCT
+        c.user_id,
+        c.name,
+        g.goal_id,
+        g.description,
+        g.deadline,
+        DATEDIFF(CURRENT_DATE, g.deadline) AS days_overdue
+    FROM Customer c
+    JOIN Habit h ON c.user_id = h.user_id
+    JOIN Goal g ON h.habit_id = g.habit_id
+    WHERE g.is_achieved = FALSE AND g.deadline < CURRENT_DATE
+    ORDER BY days_overdue DESC
+    """)
+
+
+# --- Customers, habits and goals ---
+
+# Customer columns update_customer may change
+CUSTOMER_FIELDS = ('name', 'email', 'phone_no', 'password')
+FREQUENCIES = ('Daily', 'Weekly', 'Monthly')
+
+
+def _customers_query(user_id):
+    if user_id is not None:
+        return "SELECT user_id, name, email, phone_no, created_at FROM Customer WHERE user_id = %s", (user_id,)
+    return "SELECT user_id, name, email, phone_no, created_at FROM Customer", None
+
+
+def fetch_customers(connection, user_id=None):
+    """(user_id, name, email, phone_no, created_at) for one or all customers"""
+    return _fetch_all(connection, *_customers_query(user_id))
+
+
+def iter_customers(connection, user_id=None):
+    """fetch_customers streamed through an unbuffered cursor (see iter_logs)"""
+    return _iter_rows(connection, *_customers_query(user_id))
+
+
+def insert_customer(connection, user_id, email, name, password, phone_no):
+    """Insert one customer and commit"""
+    affected = _execute_write(
+        connection,
+        """INSERT INTO Customer (user_id, email, name, password, phone_no) 
+           VALUES (%s, %s, %s, %s, %s)""",
+        (user_id, email, name, password, phone_no),
+    )
+    report_cache.invalidate('Customer')
+    return affected
+
+
+def update_customer(connection, user_id, field, value):
+    """Set one CUSTOMER_FIELDS column and commit; returns the affected row count"""
+    return update_customer_fields(connection, user_id, {field: value})
+
+
+def update_customer_fields(connection, user_id, changes):
+    """Set several CUSTOMER_FIELDS columns ({field: value}) in one UPDATE and commit"""
+    for field in changes:
+        if field not in CUSTOMER_FIELDS:
+            raise ValueError(f"Cannot update Customer.{field}")
+    assignments = ", ".join(f"{field} = %s" for field in changes)
+    affected = _execute_write(
+        connection, f"UPDATE Customer SET {assignments} WHERE user_id = %s", (*changes.values(), user_id)
+    )
+    report_cache.invalidate('Customer')
+    if 'name' in changes:
+        goal_scheduler.goals_changed(connection)
+        leaderboard.leaderboards_changed(connection)
+    return affected
+
+
+def delete_customer(connection, user_id):
+    """Delete a customer (cascading to their habits, goals and logs) and commit"""
+    habit_ids = [row[0] for row in _fetch_all(connection, "SELECT habit_id FROM Habit WHERE user_id = %s", (user_id,))]
+    affected = _execute_write(connection, "DELETE FROM Customer WHERE user_id = %s", (user_id,))
+    if affected and habit_ids:
+        log_archive.forget_habits(connection, habit_ids)
+    report_cache.invalidate('Customer', 'Habit', 'Goal', 'Logs')
+    goal_scheduler.goals_changed(connection)
+    leaderboard.leaderboards_changed(connection)
+    day_bitmaps.bitmaps_changed(connection)
+    return affected
+
+
+def _habits_query(user_id):
+    where = "WHERE h.user_id = %s" if user_id is not None else ""
+    return f"""
+    SELECT h.habit_id, c.name, h.name, h.start_date, h.frequency, h.is_active
+    FROM Habit h
+    JOIN Customer c ON h.user_id = c.user_id
+    {where}
+    ORDER BY h.habit_id
+    """, (user_id,) if user_id is not None else None
+
+
+def fetch_habits(connection, user_id=None):
+    """(habit_id, user name, habit name, start_date, frequency, is_active), by habit_id"""
+    return _fetch_all(connection, *_habits_query(user_id))
+
+
+def iter_habits(connection, user_id=None):
+    """fetch_habits streamed through an unbuffered cursor (see iter_logs)"""
+    return _iter_rows(connection, *_habits_query(user_id))
+
+
+def insert_habit(connection, habit_id, user_id, name, start_date, frequency):
+    """Insert one habit and commit"""
+    affected = _execute_write(
+        connection,
+        """INSERT INTO Habit (habit_id, user_id, name, start_date, frequency) 
+           VALUES (%s, %s, %s, %s, %s)""",
+        (habit_id, user_id, name, start_date, frequency),
+    )
+    report_cache.invalidate('Habit')
+    return affected
+
+
+def delete_habit(connection, habit_id):
+    """Delete a habit (cascading to its goals and logs) and commit"""
+    affected = _execute_write(connection, "DELETE FROM Habit WHERE habit_id = %s", (habit_id,))
+    if affected:
+        log_archive.forget_habits(connection, [habit_id])
+    report_cache.invalidate('Habit', 'Goal', 'Logs')
+    goal_scheduler.goals_changed(connection)
+    leaderboard.leaderboards_changed(connection)
+    day_bitmaps.bitmaps_changed(connection)
+    return affected
+
+
+def _goals_query(habit_id):
+    where = "WHERE g.habit_id = %s" if habit_id is not None else ""
+    return f"""
+    SELECT g.goal_id, h.name, g.description, g.deadline, g.is_achieved, g.target_count
+    FROM Goal g
+    JOIN Habit h ON g.habit_id = h.habit_id
+    {where}
+    ORDER BY g.goal_id
+    """, (habit_id,) if habit_id is not None else None
+
+
+def fetch_goals(connection, habit_id=None):
+    """(goal_id, habit name, description, deadline, is_achieved, target_count), by goal_id"""
+    return _fetch_all(connection, *_goals_query(habit_id))
+
+
+def iter_goals(connection, habit_id=None):
+    """fetch_goals streamed through an unbuffered cursor (see iter_logs)"""
+    return _iter_rows(connection, *_goals_query(habit_id))
+
+
+def insert_goal(connection, goal_id, habit_id, deadline, description, target_count=None):
+    """Insert one goal and commit.
+
+    target_count, if given, is the number of Completed logs on or before the
+    deadline that achieves the goal (see goal_evaluation).
+    """
+    if target_count is not None and target_count < 1:
+        raise ValueError("target_count must be at least 1")
+    affected = _execute_write(
+        connection,
+        """INSERT INTO Goal (goal_id, habit_id, deadline, description, target_count) 
+           VALUES (%s, %s, %s, %s, %s)""",
+        (goal_id, habit_id, deadline, description, target_count),
+    )
+    report_cache.invalidate('Goal')
+    goal_scheduler.goal_added(connection, goal_id)
+    return affected
+
+
+# --- Log browsing ---
+
+LOG_COLUMNS = ("Log ID", "Habit", "Date", "Status", "Notes")
+
+_LOG_SELECT = """
+SELECT l.log_id, h.name, l.log_date, l.status, l.notes
+FROM Logs l
+JOIN Habit h ON l.habit_id = h.habit_id
+"""
+
+
+def _log_filters(habit_id, date_from, date_to):
+    conditions, params = [], []
+    if habit_id is not None:
+        conditions.append("l.habit_id = %s")
+        params.append(habit_id)
+    if date_from is not None:
+        conditions.append("l.log_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("l.log_date <= %s")
+        params.append(date_to)
+    return conditions, params
+
+
+def fetch_recent_logs(connection, limit=50):
+    """The most recent logs across all habits"""
+    return _fetch_all(connection, f"{_LOG_SELECT} ORDER BY l.log_date DESC LIMIT %s", (limit,))
+
+
+def fetch_log_page(connection, habit_id=None, date_from=None, date_to=None,
+                   after=None, before=None, page_size=50):
+    """One page of logs, newest first, using keyset pagination on (log_date, log_id).
+
+    Pass `after` = (log_date, log_id) of the last row shown to get the next
+    (older) page, or `before` = the first row's key for the previous page.
+    Each page is an index range scan, however deep into the history it is.
+    """
+    conditions, params = _log_filters(habit_id, date_from, date_to)
+    order = "DESC"
+    if after is not None:
+        conditions.append("(l.log_date, l.log_id) < (%s, %s)")
+        params.extend(after)
+    elif before is not None:
+        conditions.append("(l.log_date, l.log_id) > (%s, %s)")
+        params.extend(before)
+        order = "ASC"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"{_LOG_SELECT} {where} ORDER BY l.log_date {order}, l.log_id {order} LIMIT %s"
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params + [page_size])
+        rows = list(cursor.fetchall())
+    finally:
+        cursor.close()
+    if order == "ASC":
+        rows.reverse()
+    return rows
+
+
+def page_key(row):
+    """Keyset position (log_date, log_id) of a row returned by fetch_log_page"""
+    return row[2], row[0]
+
+
+def iter_logs(connection, habit_id=None, date_from=None, date_to=None, batch_size=1000):
+    """Stream logs newest first through an unbuffered server-side cursor.
+
+    Memory stays constant regardless of how many logs match. The connection
+    cannot run other queries until the generator is exhausted or closed.
+    """
+    conditions, params = _log_filters(habit_id, date_from, date_to)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    yield from _iter_rows(connection, f"{_LOG_SELECT} {where} ORDER BY l.log_date DESC, l.log_id DESC",
+                          params, batch_size)
+
+
+# --- Log writes ---
+
+def insert_log(connection, log_id, habit_id, log_date, status, notes):
+    """Insert one log entry with a caller-chosen log_id and commit (see upsert_log)"""
+    log_archive.check_writable(connection, [log_date])
+    affected = _execute_write(
+        connection,
+        """INSERT INTO Logs (log_id, habit_id, log_date, notes, status) 
+           VALUES (%s, %s, %s, %s, %s)""",
+        (log_id, habit_id, log_date, notes, status),
+    )
+    report_cache.invalidate('Logs')
+    leaderboard.habit_logs_changed(connection, habit_id)
+    day_bitmaps.logs_written(connection, [(habit_id, log_date, status)])
+    return affected
+
+
+def upsert_log(connection, habit_id, log_date, status='Pending', notes=None):
+    """Record a habit's log for a day with one UpsertLog call and commit.
+
+    Inserts the log with a server-assigned log_id, or updates the status and
+    notes of the habit's log for that day; notes=None keeps the existing
+    notes. Returns (log_id, created). Raises log_archive.ArchivedLogError for
+    a day in an archived month.
+    """
+    log_archive.check_writable(connection, [log_date])
+    cursor = connection.cursor()
+    try:
+        cursor.callproc('UpsertLog', [habit_id, log_date, status, notes])
+        log_id, created = cursor.fetchone()
+        connection.commit()
+    finally:
+        cursor.close()
+    report_cache.invalidate('Logs')
+    leaderboard.habit_logs_changed(connection, habit_id)
+    day_bitmaps.logs_written(connection, [(habit_id, log_date, status)])
+    return log_id, bool(created)
+
+
+def upsert_entry(habit_id, log_date, status, notes):
+    """One UpsertLogs array entry; without notes the procedure keeps the existing ones"""
+    entry = {'habit_id': int(habit_id), 'log_date': str(log_date), 'status': status}
+    if notes is not None:
+        entry['notes'] = notes
+    return entry
+
+
+def upsert_logs(connection, logs):
+    """upsert_log for many (habit_id, log_date, status, notes) tuples with one UpsertLogs call.
+
+    Commits once and returns how many logs were written; a later entry for
+    the same habit and day wins, and notes of None keep the existing notes.
+    """
+    entries = [upsert_entry(*log) for log in logs]
+    if not entries:
+        return 0
+    log_archive.check_writable(connection, [entry['log_date'] for entry in entries])
+    cursor = connection.cursor()
+    try:
+        cursor.callproc('UpsertLogs', [json.dumps(entries)])
+        written = cursor.fetchone()
+        connection.commit()
+    finally:
+        cursor.close()
+    report_cache.invalidate('Logs')
+    leaderboard.habits_logs_changed(connection, {entry['habit_id'] for entry in entries})
+    day_bitmaps.logs_written(connection, [(entry['habit_id'], entry['log_date'], entry['status'])
+                                          for entry in entries])
+    return written[0] if written else len(entries)
+
+
+def set_log_status(connection, log_id, status):
+    """Change the status of one log and commit; returns the affected row count"""
+    affected = _execute_write(
+        connection, "UPDATE Logs SET status = %s WHERE log_id = %s", (status, log_id)
+    )
+    report_cache.invalidate('Logs')
+    if affected:
+        leaderboard.log_changed(connection, log_id)
+        day_bitmaps.log_changed(connection, log_id)
+    return affected
+
+
+# --- Goal writes ---
+
+def mark_goal_achieved(connection, goal_id):
+    """Run the MarkGoalAchieved procedure and commit; returns its status message"""
+    cursor = connection.cursor()
+    try:
+        cursor.callproc('MarkGoalAchieved', [goal_id])
+        # The procedure's SELECT is the cursor's first result set
+        message = cursor.fetchone()
+        connection.commit()
+    finally:
+        cursor.close()
+    report_cache.invalidate('Goal')
+    goal_scheduler.goal_achieved(connection, goal_id)
+    return message[0] if message else None
+
+
+def mark_goals_achieved(connection, goal_ids):
+    """Mark many goals achieved with one MarkGoalsAchieved call and commit.
+
+    Returns how many goals changed; goals that were already achieved or do
+    not exist are skipped.
+    """
+    goal_ids = sorted({int(goal_id) for goal_id in goal_ids})
+    if not goal_ids:
+        return 0
+    cursor = connection.cursor()
+    try:
+        cursor.callproc('MarkGoalsAchieved', [json.dumps(goal_ids)])
+        row = cursor.fetchone()
+        connection.commit()
+    finally:
+        cursor.close()
+    report_cache.invalidate('Goal')
+    goal_scheduler.goals_achieved(connection, goal_ids)
+    return int(row[0]) if row else 0
@@ -0,0 +1,105 @@
+"""
+Personal Habit Tracker - Summary Tables
+HabitSummary and UserSummary hold per-habit / per-user log counters that
+database triggers keep current on every Logs insert, update and delete
+(including cascades from Habit and Customer deletes). This module rebuilds
+them from scratch and checks them against the live Logs table.
+"""
+
+import day_bitmaps
+import leaderboard
+import report_cache
+
+SUMMARY_COLUMNS = ('total_logs', 'completed_logs', 'skipped_logs', 'pending_logs')
+
+# Fresh aggregates straight from Logs; also used to (re)fill the tables
+_HABIT_COUNTS_QUERY = """
+SELECT
+    h.habit_id,
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Habit h
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY h.habit_id
+"""
+
+_USER_COUNTS_QUERY = """
+SELECT
+    c.user_id,
+    COUNT(DISTINCT h.habit_id),
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Customer c
+LEFT JOIN Habit h ON c.user_id = h.user_id
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY c.user_id
+"""
+
+REBUILD_STATEMENTS = (
+    "DELETE FROM HabitSummary",
+    "DELETE FROM UserSummary",
+    "INSERT INTO HabitSummary (habit_id, total_logs, completed_logs, skipped_logs, pending_logs)"
+    + _HABIT_COUNTS_QUERY,
+    "INSERT INTO UserSummary (user_id, habit_count, total_logs, completed_logs, skipped_logs, pending_logs)"
+    + _USER_COUNTS_QUERY,
+)
+
+
+def _fetch_map(connection, query):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query)
+        return {row[0]: tuple(int(value) for value in row[1:]) for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def rebuild_summaries(connection):
+    """Recompute both summary tables from Logs in one transaction"""
+    cursor = connection.cursor()
+    try:
+        for statement in REBUILD_STATEMENTS:
+            cursor.execute(statement)
+        connection.commit()
+        report_cache.invalidate()
+        leaderboard.leaderboards_changed(connection)
+        day_bitmaps.bitmaps_changed(connection)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def check_summaries(connection):
+    """Diff the live counters against a fresh aggregation of Logs.
+
+    Returns a list of (table, id, column, live_value, expected_value);
+    an empty list means the summaries are consistent.
+    """
+    checks = (
+        ('HabitSummary', 'SELECT habit_id, ' + ', '.join(SUMMARY_COLUMNS) + ' FROM HabitSummary',
+         _HABIT_COUNTS_QUERY, SUMMARY_COLUMNS),
+        ('UserSummary', 'SELECT user_id, habit_count, ' + ', '.join(SUMMARY_COLUMNS) + ' FROM UserSummary',
+         _USER_COUNTS_QUERY, ('habit_count',) + SUMMARY_COLUMNS),
+    )
+    differences = []
+    for table, live_query, expected_query, columns in checks:
+        live = _fetch_map(connection, live_query)
+        expected = _fetch_map(connection, expected_query)
+        for key in sorted(live.keys() | expected.keys()):
+            live_row = live.get(key)
+            expected_row = expected.get(key)
+            if live_row is None or expected_row is None:
+                differences.append((table, key, '(row)',
+                                    'missing' if live_row is None else 'present',
+                                    'missing' if expected_row is None else 'present'))
+                continue
+            for column, live_value, expected_value in zip(columns, live_row, expected_row):
+                if live_value != expected_value:
+                    differences.append((table, key, column, live_value, expected_value))
+    return differences
@@ -0,0 +1,364 @@
+"""
+Personal Habit Tracker - Leaderboard
+Keeps users and habits ranked by completion rate and by completed-log count
+in order-statistic skip lists, so top-K, rank and percentile queries take
+O(log n) (plus K for top-K) instead of regrouping Logs. A user's rate is
+completed logs over all of their logs; habits and users without logs are not
+ranked. Ties are broken by the other metric, then by ID.
+
+One leaderboard per database is loaded on first use (get()) from
+HabitSummary plus the log archive. Write paths keep it current: inserting a
+log or changing its status re-reads that habit's summary row and moves the
+habit and its user in O(log n); deletes, renames and bulk loads mark it stale
+so the next get() reloads.
+"""
+
+import random
+import threading
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+import report_cache
+
+KINDS = ('users', 'habits')
+METRICS = ('rate', 'completed')
+
+# Completion rates are compared as completed * RATE_SCALE // total
+RATE_SCALE = 10 ** 9
+MAX_LEVELS = 24
+# Bulk writes touching more habits reload the leaderboard instead of moving each one
+HABIT_UPDATE_LIMIT = 100
+
+Entry = namedtuple('Entry', ['rank', 'id', 'name', 'total_logs', 'completed_logs', 'completion_rate'])
+
+_HABIT_QUERY = """
+SELECT h.habit_id, h.user_id, c.name, h.name, hs.total_logs, hs.completed_logs
+FROM Habit h
+JOIN Customer c ON c.user_id = h.user_id
+JOIN HabitSummary hs ON hs.habit_id = h.habit_id
+"""
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # Number of level-0 steps each link skips
+        self.width = [1] * levels
+
+
+class RankedSet:
+    """Sorted set of unique keys with O(log n) add, remove, rank and select.
+
+    An indexable skip list: every link records how many entries it skips,
+    so positions are summed on the way down.
+    """
+
+    def __init__(self, seed=0):
+        self._head = _Node(None, MAX_LEVELS)
+        self._random = random.Random(seed)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _path(self, key):
+        """Last node before `key` on every level, and the position of each"""
+        path = [None] * MAX_LEVELS
+        positions = [0] * MAX_LEVELS
+        node, position = self._head, 0
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            path[level] = node
+            positions[level] = position
+        return path, positions
+
+    def add(self, key):
+        path, positions = self._path(key)
+        levels = 1
+        while levels < MAX_LEVELS and self._random.random() < 0.5:
+            levels += 1
+        node = _Node(key, levels)
+        position = positions[0] + 1
+        for level in range(MAX_LEVELS):
+            before = path[level]
+            if level < levels:
+                node.next[level] = before.next[level]
+                before.next[level] = node
+                skipped = position - positions[level]
+                node.width[level] = before.width[level] - skipped + 1
+                before.width[level] = skipped
+            else:
+                before.width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        path, _ = self._path(key)
+        node = path[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(MAX_LEVELS):
+            before = path[level]
+            if level < len(node.next):
+                before.width[level] += node.width[level] - 1
+                before.next[level] = node.next[level]
+            else:
+                before.width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """Number of keys smaller than `key`"""
+        return self._path(key)[1][0]
+
+    def _node_at(self, index):
+        node, remaining = self._head, index + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return self._node_at(index).key
+
+    def slice(self, start, stop):
+        """Keys at positions start..stop-1: O(log n + stop - start)"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        node = self._node_at(start)
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+def _rate(total, completed):
+    return Decimal(completed * 100) / Decimal(total) if total else Decimal(0)
+
+
+class Leaderboard:
+    """Users and habits ranked by completion rate and completed logs"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # habit_id -> [user_id, habit name, hot total, hot completed, archived total, archived completed]
+        self._habits = {}
+        # user_id -> [name, total, completed]
+        self._users = {}
+        self._ranked = {(kind, metric): RankedSet() for kind in KINDS for metric in METRICS}
+        self._counts = {kind: {} for kind in KINDS}
+        self._stale = True
+        self._generation = 0
+        self.updates = 0
+        self.reloads = 0
+
+    @property
+    def stale(self):
+        return self._stale
+
+    # --- Ranking keys ---
+
+    @staticmethod
+    def _keys(entity_id, total, completed):
+        """Sort keys per metric; ascending order is best first"""
+        scaled = completed * RATE_SCALE // total
+        return {'rate': (-scaled, -completed, entity_id), 'completed': (-completed, -scaled, entity_id)}
+
+    def _set_counts(self, kind, entity_id, total, completed):
+        """Move one user or habit to its new counts; caller holds the lock"""
+        counts = self._counts[kind]
+        old = counts.get(entity_id)
+        if old == (total, completed):
+            return
+        if old is not None:
+            for metric, key in self._keys(entity_id, *old).items():
+                self._ranked[(kind, metric)].remove(key)
+            del counts[entity_id]
+        if total > 0:
+            for metric, key in self._keys(entity_id, total, completed).items():
+                self._ranked[(kind, metric)].add(key)
+            counts[entity_id] = (total, completed)
+
+    # --- Loading and updates ---
+
+    def load(self, connection):
+        """Rebuild from HabitSummary and the archive"""
+        import log_archive
+        with self._lock:
+            generation = self._generation
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_HABIT_QUERY)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        archived = log_archive.habit_totals(connection)
+        with self._lock:
+            self._habits, self._users = {}, {}
+            self._ranked = {(kind, metric): RankedSet() for kind in KINDS for metric in METRICS}
+            self._counts = {kind: {} for kind in KINDS}
+            for habit_id, user_id, user_name, habit_name, total, completed in rows:
+                archived_total, archived_completed = archived.get(habit_id, (0, 0))[:2]
+                self._habits[habit_id] = [user_id, habit_name, total, completed, archived_total, archived_completed]
+                user = self._users.setdefault(user_id, [user_name, 0, 0])
+                user[1] += total + archived_total
+                user[2] += completed + archived_completed
+                self._set_counts('habits', habit_id, total + archived_total, completed + archived_completed)
+            for user_id, (_, total, completed) in self._users.items():
+                self._set_counts('users', user_id, total, completed)
+            self._stale = self._generation != generation
+            self.reloads += 1
+
+    def habit_changed(self, connection, habit_id):
+        """Re-read one habit's summary row after its logs changed"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(_HABIT_QUERY + " WHERE h.habit_id = %s", (habit_id,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        with self._lock:
+            self._generation += 1
+            habit = self._habits.get(habit_id)
+            if row is None or (habit is not None and habit[0] != row[1]):
+                # Deleted or moved to another user
+                self._stale = True
+                return
+            _, user_id, user_name, habit_name, total, completed = row
+            if habit is None:
+                habit = self._habits[habit_id] = [user_id, habit_name, 0, 0, 0, 0]
+            user = self._users.setdefault(user_id, [user_name, 0, 0])
+            user[1] += total - habit[2]
+            user[2] += completed - habit[3]
+            habit[2], habit[3] = total, completed
+            self._set_counts('habits', habit_id, total + habit[4], completed + habit[5])
+            self._set_counts('users', user_id, user[1], user[2])
+            self.updates += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    # --- Queries ---
+
+    def _entry(self, kind, position, key):
+        entity_id = key[-1]
+        total, completed = self._counts[kind][entity_id]
+        name = self._users[entity_id][0] if kind == 'users' else self._habits[entity_id][1]
+        rate = _rate(total, completed).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        return Entry(position + 1, entity_id, name, total, completed, rate)
+
+    def top(self, kind='users', metric='rate', k=10, offset=0):
+        """Entries ranked offset+1 .. offset+k"""
+        with self._lock:
+            keys = self._ranked[(kind, metric)].slice(offset, offset + k)
+            return [self._entry(kind, offset + i, key) for i, key in enumerate(keys)]
+
+    def rank(self, kind, entity_id, metric='rate'):
+        """The entry of one user or habit (rank is 1-based), or None if unranked"""
+        with self._lock:
+            counts = self._counts[kind].get(entity_id)
+            if counts is None:
+                return None
+            key = self._keys(entity_id, *counts)[metric]
+            return self._entry(kind, self._ranked[(kind, metric)].rank(key), key)
+
+    def percentile(self, kind, entity_id, metric='rate'):
+        """Share of ranked entries at or below this one, in percent (100 = first)"""
+        with self._lock:
+            entry = self.rank(kind, entity_id, metric)
+            if entry is None:
+                return None
+            size = len(self._ranked[(kind, metric)])
+            return (Decimal((size - entry.rank + 1) * 100) / size).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+    def __len__(self):
+        return len(self._counts['users'])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._counts['users']),
+                'habits': len(self._counts['habits']),
+                'updates': self.updates,
+                'reloads': self.reloads,
+                'stale': self._stale,
+            }
+
+
+def get(connection):
+    """The leaderboard for the connection's database, loaded or reloaded as needed"""
+    database = report_cache.database_key(connection)
+    with _boards_lock:
+        board = _boards.get(database)
+        if board is None:
+            board = _boards[database] = Leaderboard()
+    if board.stale:
+        board.load(connection)
+    return board
+
+
+# --- Notifications from write paths ---
+
+def _loaded(connection):
+    with _boards_lock:
+        board = _boards.get(report_cache.database_key(connection))
+    return board if board is not None and not board.stale else None
+
+
+def habit_logs_changed(connection, habit_id):
+    """Call after committing a log insert or status change for a habit"""
+    board = _loaded(connection)
+    if board is not None:
+        board.habit_changed(connection, habit_id)
+
+
+def habits_logs_changed(connection, habit_ids):
+    """Call after committing a batch of log writes to the given habits"""
+    habit_ids = set(habit_ids)
+    if len(habit_ids) > HABIT_UPDATE_LIMIT:
+        leaderboards_changed(connection)
+        return
+    board = _loaded(connection)
+    if board is not None:
+        for habit_id in habit_ids:
+            board.habit_changed(connection, habit_id)
+
+
+def log_changed(connection, log_id):
+    """Call after committing a change to one log"""
+    board = _loaded(connection)
+    if board is None:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT habit_id FROM Logs WHERE log_id = %s", (log_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if row is None:
+        board.invalidate()
+    else:
+        board.habit_changed(connection, row[0])
+
+
+def leaderboards_changed(connection=None):
+    """Call after a bulk or cascading write; leaderboards reload on next use"""
+    with _boards_lock:
+        boards = list(_boards.items())
+    database = report_cache.database_key(connection) if connection is not None else None
+    for key, board in boards:
+        if connection is None or key == database:
+            board.invalidate()
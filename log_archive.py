@@ -0,0 +1,380 @@
+"""
+Personal Habit Tracker - Log Archive
+Moves closed months of Logs out of the database into compressed columnar
+segment files on local disk, keeping the hot table small. Each segment holds
+one month of one archiving run as gzip-compressed JSON columns (log_id,
+habit_id, day number, status code, notes). The manifest records every
+segment with per-habit aggregates, so reports merge archived history by
+reading one small file instead of the segments themselves.
+
+An archived month is closed to log writes (check_writable): upserts only
+see Logs, so writing a day that is already in a segment would add a second
+log for it. Deleting a habit or customer rewrites the segments holding its
+logs (forget_habits), so a habit re-created with the same id starts clean.
+
+Archiving is crash-safe: a segment is written and recorded as 'pending',
+its rows are deleted from Logs in one transaction, then it is marked
+'complete'. Readers only use complete segments, and the next run resolves
+any pending segment by checking whether its rows are still in Logs.
+
+Environment:
+    HABIT_TRACKER_ARCHIVE_DIR=log_archive    where segments and the manifest live
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import leaderboard
+import report_cache
+from db_backend import Error
+
+ARCHIVE_DIR = os.environ.get('HABIT_TRACKER_ARCHIVE_DIR', 'log_archive')
+MANIFEST_NAME = 'manifest.json'
+KEEP_MONTHS = 12
+
+EPOCH = date(1970, 1, 1)
+# Status codes stored in segments; the index is the code
+STATUSES = ('Completed', 'Skipped', 'Pending')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+DELETE_CHUNK_SIZE = 1000
+
+_manifest_cache = {}
+_manifest_lock = threading.Lock()
+# Serialises manifest rewrites made by deletes on different threads
+_forget_lock = threading.Lock()
+
+
+class ArchivedLogError(Error):
+    """A log write dated in a month that has been moved to the archive"""
+
+
+def _month_start(value):
+    return value.replace(day=1)
+
+
+def _next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _database_id(connection):
+    return json.dumps(report_cache.database_key(connection), default=str)
+
+
+# --- Manifest ---
+
+def _manifest_path(directory):
+    return os.path.join(directory, MANIFEST_NAME)
+
+
+def load_manifest(directory=None):
+    """The manifest as a dict; cached until the file changes"""
+    path = _manifest_path(directory or ARCHIVE_DIR)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {'segments': []}
+    with _manifest_lock:
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = _manifest_cache.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        with open(path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+        _manifest_cache[path] = (version, manifest)
+        return manifest
+
+
+def _save_manifest(directory, manifest):
+    path = _manifest_path(directory)
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=1)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp, path)
+
+
+def segments(connection, directory=None, status='complete'):
+    """Manifest entries for the connection's database"""
+    database = _database_id(connection)
+    return [
+        segment for segment in load_manifest(directory)['segments']
+        if segment['database'] == database and (status is None or segment['status'] == status)
+    ]
+
+
+def archived_months(connection, directory=None):
+    """'YYYY-MM' months whose logs are (or are being) moved to the archive"""
+    return {segment['period'] for segment in segments(connection, directory, status=None)}
+
+
+def archived_message(log_date):
+    return f"Logs of {str(log_date)[:7]} are archived and can no longer be added or changed"
+
+
+def check_writable(connection, log_dates, directory=None):
+    """Raise ArchivedLogError if any of the dates is in an archived month"""
+    months = archived_months(connection, directory)
+    if months:
+        for log_date in log_dates:
+            if str(log_date)[:7] in months:
+                raise ArchivedLogError(archived_message(log_date))
+
+
+# --- Readers used by the reports ---
+
+def habit_totals(connection, directory=None):
+    """Map habit_id -> [total, completed, skipped, pending] over archived logs"""
+    totals = {}
+    for segment in segments(connection, directory):
+        for habit_id, counts in segment['habits'].items():
+            merged = totals.setdefault(int(habit_id), [0, 0, 0, 0])
+            for i, count in enumerate(counts):
+                merged[i] += count
+    return totals
+
+
+def read_segment(segment, directory=None):
+    """Columns of one segment: dict of equal-length lists"""
+    path = os.path.join(directory or ARCHIVE_DIR, segment['file'])
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        return json.load(handle)['columns']
+
+
+def logged_days(connection, statuses=STATUSES, directory=None):
+    """(habit_ids, day_numbers, status codes) of every archived log with one of `statuses`"""
+    habits, days, codes = [], [], []
+    wanted = {STATUS_CODES[status] for status in statuses}
+    for segment in segments(connection, directory):
+        columns = read_segment(segment, directory)
+        for habit_id, day, status in zip(columns['habit_id'], columns['day'], columns['status']):
+            if status in wanted:
+                habits.append(habit_id)
+                days.append(day)
+                codes.append(status)
+    return habits, days, codes
+
+
+def completed_days(connection, directory=None):
+    """(habit_ids, day_numbers) of every archived Completed log"""
+    habits, days, _ = logged_days(connection, ('Completed',), directory)
+    return habits, days
+
+
+# --- Archiving ---
+
+def _write_segment(directory, name, rows):
+    columns = {
+        'log_id': [row[0] for row in rows],
+        'habit_id': [row[1] for row in rows],
+        'day': [(row[2] - EPOCH).days for row in rows],
+        'status': [STATUS_CODES[row[3]] for row in rows],
+        'notes': [row[4] for row in rows],
+    }
+    path = os.path.join(directory, name)
+    temp = path + '.tmp'
+    with gzip.open(temp, 'wt', encoding='utf-8', compresslevel=6) as handle:
+        json.dump({'columns': columns}, handle, separators=(',', ':'))
+    with open(temp, 'rb') as handle:
+        os.fsync(handle.fileno())
+    os.replace(temp, path)
+    return os.path.getsize(path)
+
+
+def _aggregate(rows):
+    habits = {}
+    for _, habit_id, _, status, _ in rows:
+        counts = habits.setdefault(str(habit_id), [0, 0, 0, 0])
+        counts[0] += 1
+        counts[1 + STATUS_CODES[status]] += 1
+    return habits
+
+
+def _count_remaining(connection, log_ids):
+    cursor = connection.cursor()
+    remaining = 0
+    try:
+        for i in range(0, len(log_ids), DELETE_CHUNK_SIZE):
+            chunk = log_ids[i:i + DELETE_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"SELECT COUNT(*) FROM Logs WHERE log_id IN ({placeholders})", chunk)
+            remaining += cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return remaining
+
+
+def recover(connection, directory=None):
+    """Resolve pending segments left by an interrupted run; returns how many were fixed"""
+    directory = directory or ARCHIVE_DIR
+    pending = segments(connection, directory, status='pending')
+    if not pending:
+        return 0
+    manifest = load_manifest(directory)
+    for segment in pending:
+        log_ids = read_segment(segment, directory)['log_id']
+        if _count_remaining(connection, log_ids) == 0:
+            # The delete committed; only the status update was lost
+            segment['status'] = 'complete'
+        else:
+            # The delete never committed; the rows are still hot
+            manifest['segments'].remove(segment)
+            try:
+                os.remove(os.path.join(directory, segment['file']))
+            except FileNotFoundError:
+                pass
+    _save_manifest(directory, manifest)
+    report_cache.invalidate('Logs')
+    leaderboard.leaderboards_changed(connection)
+    return len(pending)
+
+
+def archive_month(connection, month, directory=None):
+    """Move every log dated in `month` (a date in that month) to a new segment"""
+    directory = directory or ARCHIVE_DIR
+    start, end = _month_start(month), _next_month(month)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT log_id, habit_id, log_date, status, notes FROM Logs "
+            "WHERE log_date >= %s AND log_date < %s ORDER BY log_id",
+            (start, end),
+        )
+        rows = list(cursor.fetchall())
+    finally:
+        cursor.close()
+    if not rows:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    sequence = sum(1 for segment in manifest['segments'] if segment['period'] == start.strftime('%Y-%m')) + 1
+    name = f"logs-{start:%Y-%m}-{sequence:03d}-{datetime.now():%Y%m%d%H%M%S}.json.gz"
+    segment = {
+        'file': name,
+        'database': _database_id(connection),
+        'period': start.strftime('%Y-%m'),
+        'rows': len(rows),
+        'first_log_id': rows[0][0],
+        'last_log_id': rows[-1][0],
+        'bytes': _write_segment(directory, name, rows),
+        'habits': _aggregate(rows),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'status': 'pending',
+    }
+    manifest = {'segments': manifest['segments'] + [segment]}
+    _save_manifest(directory, manifest)
+
+    log_ids = [row[0] for row in rows]
+    cursor = connection.cursor()
+    try:
+        for i in range(0, len(log_ids), DELETE_CHUNK_SIZE):
+            chunk = log_ids[i:i + DELETE_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM Logs WHERE log_id IN ({placeholders})", chunk)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        manifest['segments'].remove(segment)
+        _save_manifest(directory, manifest)
+        os.remove(os.path.join(directory, name))
+        raise
+    finally:
+        cursor.close()
+        report_cache.invalidate('Logs')
+
+    segment['status'] = 'complete'
+    _save_manifest(directory, manifest)
+    leaderboard.leaderboards_changed(connection)
+    return segment
+
+
+def forget_habits(connection, habit_ids, directory=None):
+    """Drop the archived logs of deleted habits; returns how many were removed.
+
+    Each segment holding any of them is rewritten without their rows (or
+    removed when nothing is left), the manifest is saved, then the old file
+    is deleted.
+    """
+    directory = directory or ARCHIVE_DIR
+    forgotten = {str(habit_id) for habit_id in habit_ids}
+    with _forget_lock:
+        affected = [
+            segment for segment in segments(connection, directory, status=None)
+            if forgotten & segment['habits'].keys()
+        ]
+        if not affected:
+            return 0
+        manifest = load_manifest(directory)
+        kept_segments, stale_files, removed = [], [], 0
+        for segment in manifest['segments']:
+            if segment not in affected:
+                kept_segments.append(segment)
+                continue
+            stale_files.append(segment['file'])
+            columns = read_segment(segment, directory)
+            rows = [
+                (log_id, habit_id, EPOCH + timedelta(days=day), STATUSES[status], notes)
+                for log_id, habit_id, day, status, notes in zip(
+                    columns['log_id'], columns['habit_id'], columns['day'],
+                    columns['status'], columns['notes'])
+                if str(habit_id) not in forgotten
+            ]
+            removed += segment['rows'] - len(rows)
+            if not rows:
+                continue
+            name = segment['file'].replace('.json.gz', f"-r{datetime.now():%Y%m%d%H%M%S%f}.json.gz")
+            kept_segments.append(dict(
+                segment,
+                file=name,
+                rows=len(rows),
+                first_log_id=rows[0][0],
+                last_log_id=rows[-1][0],
+                bytes=_write_segment(directory, name, rows),
+                habits=_aggregate(rows),
+            ))
+        _save_manifest(directory, {'segments': kept_segments})
+        for name in stale_files:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    report_cache.invalidate('Logs')
+    return removed
+
+
+def archive_logs(connection, keep_months=KEEP_MONTHS, today=None, directory=None, progress=None):
+    """Archive every month that ended more than `keep_months` months ago.
+
+    Returns the new segments. Pending segments from an interrupted run are
+    resolved first.
+    """
+    directory = directory or ARCHIVE_DIR
+    recover(connection, directory)
+
+    cutoff = _month_start(today or date.today())
+    for _ in range(keep_months):
+        cutoff = _month_start(cutoff - timedelta(days=1))
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT MIN(log_date) FROM Logs WHERE log_date < %s", (cutoff,))
+        oldest = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+    created = []
+    # MIN() loses the column type on SQLite, so it can come back as a string
+    month = _month_start(date.fromisoformat(str(oldest)[:10])) if oldest else cutoff
+    while month < cutoff:
+        segment = archive_month(connection, month, directory)
+        if segment:
+            created.append(segment)
+            if progress:
+                progress(segment)
+        month = _next_month(month)
+    return created
@@ -0,0 +1,228 @@
+"""
+Personal Habit Tracker - Bulk Log Importer
+Streams CSV / JSON Lines files of log entries through a generator pipeline:
+read -> validate (against an in-memory map of habit start dates) -> batch ->
+one UpsertLogs call with one commit per batch. Memory use is bounded by the
+batch size.
+
+Expected fields per row: habit_id, log_date (YYYY-MM-DD, default today),
+status (Completed/Pending/Skipped, default Pending), notes, and optionally
+log_id. Rows without a log_id are upserts like habit_queries.upsert_logs: a
+second row for a habit and day updates the first (and keeps its notes if
+the row's are blank). Rows with a log_id are inserted with that ID and
+rejected if the ID or the habit's day is already taken.
+"""
+
+import csv
+import gzip
+import json
+import time
+from datetime import date
+from itertools import islice
+
+import day_bitmaps
+import habit_queries
+import leaderboard
+import log_archive
+import report_cache
+from db_backend import Error
+
+VALID_STATUSES = ('Completed', 'Pending', 'Skipped')
+
+INSERT_LOG_QUERY = """INSERT INTO Logs (log_id, habit_id, log_date, notes, status)
+                      VALUES (%s, %s, %s, %s, %s)"""
+
+# Keep only the first few reject reasons so millions of bad rows stay cheap
+MAX_REJECT_SAMPLES = 20
+
+
+class ImportStats:
+    """Counters for one import run"""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.reject_samples = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, source, line_no, reason):
+        self.rejected += 1
+        if len(self.reject_samples) < MAX_REJECT_SAMPLES:
+            self.reject_samples.append((source, line_no, reason))
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_log_rows(path):
+    """Yield (source, line_no, row_dict) from a CSV or JSON Lines file"""
+    name = path[:-3] if path.endswith('.gz') else path
+    with _open_text(path) as handle:
+        if name.endswith(('.jsonl', '.ndjson', '.json')):
+            for line_no, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield path, line_no, {'_error': f"invalid JSON: {e}"}
+                    continue
+                yield path, line_no, row if isinstance(row, dict) else {'_error': "not a JSON object"}
+        else:
+            # Header is line 1, so data rows start at line 2
+            for line_no, row in enumerate(csv.DictReader(handle), start=2):
+                yield path, line_no, row
+
+
+def load_habit_start_dates(connection):
+    """Map habit_id -> start_date for every habit"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT habit_id, start_date FROM Habit")
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    start_dates = {}
+    for habit_id, start_date in rows:
+        if not isinstance(start_date, date):
+            start_date = date.fromisoformat(str(start_date))
+        start_dates[habit_id] = start_date
+    return start_dates
+
+
+def validate_rows(rows, habit_start_dates, stats, archived_months=frozenset()):
+    """Yield (log_id or None, habit_id, log_date, notes, status) for valid rows; count and sample the rejected ones"""
+    today = date.today()
+    for source, line_no, row in rows:
+        stats.read += 1
+        if '_error' in row:
+            stats.reject(source, line_no, row['_error'])
+            continue
+        try:
+            raw_log_id = row.get('log_id')
+            log_id = int(raw_log_id) if raw_log_id not in (None, '') else None
+            habit_id = int(row['habit_id'])
+            raw_date = (row.get('log_date') or '').strip()
+            log_date = date.fromisoformat(raw_date) if raw_date else today
+        except (KeyError, TypeError, ValueError) as e:
+            stats.reject(source, line_no, f"bad field: {e}")
+            continue
+
+        status = (row.get('status') or 'Pending').strip().capitalize()
+        if status not in VALID_STATUSES:
+            stats.reject(source, line_no, f"invalid status '{status}'")
+            continue
+
+        start_date = habit_start_dates.get(habit_id)
+        if start_date is None:
+            stats.reject(source, line_no, f"unknown habit {habit_id}")
+            continue
+        if log_date < start_date:
+            stats.reject(source, line_no, "Log date cannot be before habit start date")
+            continue
+        if log_date.strftime('%Y-%m') in archived_months:
+            stats.reject(source, line_no, log_archive.archived_message(log_date))
+            continue
+
+        # A blank note on an upsert keeps the existing log's notes
+        notes = row.get('notes') or ('' if log_id is not None else None)
+        yield (log_id, habit_id, log_date, notes, status), source, line_no
+
+
+def batched(iterable, size):
+    """Yield lists of at most `size` items"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _upsert_rows(connection, cursor, rows, stats):
+    """Upsert rows without a log_id in one UpsertLogs call; on failure retry row by row"""
+    try:
+        cursor.callproc('UpsertLogs', [json.dumps([
+            habit_queries.upsert_entry(habit_id, log_date.isoformat(), status, notes)
+            for (_, habit_id, log_date, notes, status), _, _ in rows
+        ])])
+        cursor.fetchall()
+        connection.commit()
+        stats.inserted += len(rows)
+    except Error:
+        connection.rollback()
+        for (_, habit_id, log_date, notes, status), source, line_no in rows:
+            try:
+                cursor.callproc('UpsertLog', [habit_id, log_date, status, notes])
+                cursor.fetchall()
+                stats.inserted += 1
+            except Error as e:
+                stats.reject(source, line_no, str(e))
+        connection.commit()
+
+
+def _insert_rows(connection, cursor, rows, stats):
+    """Insert rows with a log_id in one executemany; on failure retry row by row"""
+    try:
+        cursor.executemany(INSERT_LOG_QUERY, [values for values, _, _ in rows])
+        connection.commit()
+        stats.inserted += len(rows)
+    except Error:
+        connection.rollback()
+        # Isolate the offending rows (e.g. duplicate log_id, or a second log for a habit on one day) without losing the rest
+        for values, source, line_no in rows:
+            try:
+                cursor.execute(INSERT_LOG_QUERY, values)
+                stats.inserted += 1
+            except Error as e:
+                stats.reject(source, line_no, str(e))
+        connection.commit()
+
+
+def _insert_batch(connection, batch, stats):
+    """Write a batch: upserts first, then rows with their own log_id"""
+    daily = [item for item in batch if item[0][0] is None]
+    keyed = [item for item in batch if item[0][0] is not None]
+    cursor = connection.cursor()
+    try:
+        if daily:
+            _upsert_rows(connection, cursor, daily, stats)
+        if keyed:
+            _insert_rows(connection, cursor, keyed, stats)
+    finally:
+        cursor.close()
+        report_cache.invalidate('Logs')
+        leaderboard.leaderboards_changed(connection)
+        day_bitmaps.bitmaps_changed(connection)
+    stats.batches += 1
+
+
+def import_logs(connection, paths, batch_size=5000, progress=None):
+    """Import log rows from the given files; returns an ImportStats"""
+    stats = ImportStats()
+    habit_start_dates = load_habit_start_dates(connection)
+
+    def all_rows():
+        for path in paths:
+            yield from read_log_rows(path)
+
+    valid = validate_rows(all_rows(), habit_start_dates, stats, log_archive.archived_months(connection))
+    for batch in batched(valid, batch_size):
+        _insert_batch(connection, batch, stats)
+        stats.elapsed = time.perf_counter() - stats.started
+        if progress:
+            progress(stats)
+
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
@@ -0,0 +1,466 @@
+"""
+Personal Habit Tracker - Write-Behind Log Writer
+Buffers log check-ins from automated sources and writes them to the
+database in group-committed batches, instead of one INSERT and one commit
+per log as add_log does.
+
+append() writes the event to a local append-only write-ahead log (one JSON
+line, fsynced) before it returns, so an acknowledged event survives a crash
+of the process. Appends made concurrently from several threads share one
+fsync (group commit of the WAL itself), and append_many() logs a whole
+batch of events with a single write and fsync. Events are buffered in
+memory and written with one UpsertLogs call and one commit once
+`batch_size` events are waiting or the oldest has waited `flush_interval`
+seconds. A WAL segment is deleted only after its batch is committed.
+
+An event is a habit's log for a day: like habit_queries.upsert_log it
+inserts the log with a server-assigned log_id or updates the status and
+notes of the log already there. Events that carry a log_id are inserted
+with it instead, and skipped if that log_id is already in Logs.
+
+On start every segment left by a crash is replayed. Replay is idempotent,
+since writing a day's log again leaves the same row, so a segment whose
+batch was committed just before the crash is harmless to apply twice (and
+so is an event sent again by a retrying source). Events the database
+refuses (unknown habit, a date before the habit start) are moved to
+rejected.jsonl with the reason rather than dropped.
+
+One writer owns its WAL directory and its own connection; run it with
+start() to flush on a background thread, or call flush() yourself.
+
+Environment:
+    HABIT_TRACKER_WAL_DIR=log_wal    where WAL segments are written
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import day_bitmaps
+import habit_queries
+import leaderboard
+import log_archive
+import report_cache
+from db_backend import Error, is_constraint_error
+from log_importer import INSERT_LOG_QUERY, VALID_STATUSES
+
+WAL_DIR = os.environ.get('HABIT_TRACKER_WAL_DIR', 'log_wal')
+REJECTED_NAME = 'rejected.jsonl'
+SEGMENT_PREFIX = 'wal-'
+SEGMENT_SUFFIX = '.jsonl'
+
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 1.0
+# Appends wait while this many events are waiting for the database
+MAX_PENDING = 100000
+RETRY_SECONDS = 5.0
+# Log_ids per existence check
+ID_CHUNK_SIZE = 500
+
+
+def _segment_name(sequence):
+    return f"{SEGMENT_PREFIX}{sequence:08d}{SEGMENT_SUFFIX}"
+
+
+def _segment_sequence(name):
+    if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+        return None
+    number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+    return int(number) if number.isdigit() else None
+
+
+def segment_files(directory=None):
+    """WAL segment paths in the order they were written"""
+    directory = directory or WAL_DIR
+    if not os.path.isdir(directory):
+        return []
+    numbered = sorted(
+        (sequence, name) for sequence, name in
+        ((_segment_sequence(name), name) for name in os.listdir(directory))
+        if sequence is not None
+    )
+    return [os.path.join(directory, name) for _, name in numbered]
+
+
+def make_event(habit_id, log_date=None, status='Pending', notes=None, log_id=None):
+    """Validated event tuple (log_id, habit_id, log_date, notes, status); raises ValueError.
+
+    An upsert (no log_id) without notes keeps the notes of an existing log.
+    """
+    status = (status or 'Pending').strip().capitalize()
+    if status not in VALID_STATUSES:
+        raise ValueError(f"invalid status '{status}'")
+    if log_date is None:
+        log_date = date.today()
+    elif isinstance(log_date, datetime):
+        log_date = log_date.date()
+    elif not isinstance(log_date, date):
+        log_date = date.fromisoformat(str(log_date))
+    if log_id is not None:
+        return int(log_id), int(habit_id), log_date, notes or '', status
+    return None, int(habit_id), log_date, notes, status
+
+
+def _encode(event):
+    log_id, habit_id, log_date, notes, status = event
+    return json.dumps({'log_id': log_id, 'habit_id': habit_id, 'log_date': log_date.isoformat(),
+                       'status': status, 'notes': notes}, ensure_ascii=False) + '\n'
+
+
+def read_segment(path):
+    """(events, bad lines) of one segment; a torn last line from a crash is skipped"""
+    events, bad = [], []
+    with open(path, 'r', encoding='utf-8') as handle:
+        lines = handle.readlines()
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            events.append(make_event(row['habit_id'], row.get('log_date'), row.get('status'),
+                                     row.get('notes'), row.get('log_id')))
+        except (KeyError, TypeError, ValueError) as e:
+            # Only the last line can be torn; anything else is reported
+            if line_no < len(lines) or line.endswith('\n'):
+                bad.append((line.rstrip('\n'), f"unreadable WAL line {line_no}: {e}"))
+    return events, bad
+
+
+def _existing_log_ids(cursor, log_ids):
+    existing = set()
+    for i in range(0, len(log_ids), ID_CHUNK_SIZE):
+        chunk = log_ids[i:i + ID_CHUNK_SIZE]
+        cursor.execute(f"SELECT log_id FROM Logs WHERE log_id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+
+def _upsert_json(events):
+    return json.dumps([
+        habit_queries.upsert_entry(habit_id, log_date.isoformat(), status, notes)
+        for _, habit_id, log_date, notes, status in events
+    ])
+
+
+def _write_one(cursor, event):
+    log_id, habit_id, log_date, notes, status = event
+    if log_id is None:
+        cursor.callproc('UpsertLog', [habit_id, log_date, status, notes])
+        cursor.fetchall()
+    else:
+        cursor.execute(INSERT_LOG_QUERY, event)
+
+
+def write_batch(connection, events):
+    """Write a batch of events with one UpsertLogs call (plus one executemany
+    for events with a log_id not yet in Logs) and commit.
+
+    Returns (written, duplicates, rejected) where rejected lists
+    (event, reason), including events dated in an archived month. Raises
+    Error only for failures other than a rejected row (e.g. a lost
+    connection), after rolling back.
+    """
+    daily, seen, keyed, duplicates = [], set(), [], 0
+    archived, months = [], log_archive.archived_months(connection)
+    for event in events:
+        if months and event[2].strftime('%Y-%m') in months:
+            archived.append((event, log_archive.archived_message(event[2])))
+        elif event[0] is None:
+            daily.append(event)
+        elif event[0] in seen:
+            duplicates += 1
+        else:
+            seen.add(event[0])
+            keyed.append(event)
+    cursor = connection.cursor()
+    try:
+        existing = _existing_log_ids(cursor, [event[0] for event in keyed])
+        rows = [event for event in keyed if event[0] not in existing]
+        duplicates += len(keyed) - len(rows)
+        rejected = archived
+        try:
+            if rows:
+                cursor.executemany(INSERT_LOG_QUERY, rows)
+            if daily:
+                cursor.callproc('UpsertLogs', [_upsert_json(daily)])
+                cursor.fetchall()
+            connection.commit()
+            written = rows + daily
+        except Error as e:
+            connection.rollback()
+            if not is_constraint_error(e):
+                raise
+            # Isolate the refused rows without losing the rest of the batch
+            written = []
+            for event in rows + daily:
+                try:
+                    _write_one(cursor, event)
+                    written.append(event)
+                except Error as row_error:
+                    if not is_constraint_error(row_error):
+                        connection.rollback()
+                        raise
+                    rejected.append((event, str(row_error)))
+            connection.commit()
+    finally:
+        cursor.close()
+    if written:
+        report_cache.invalidate('Logs')
+        leaderboard.habits_logs_changed(connection, {event[1] for event in written})
+        day_bitmaps.logs_written(connection, [(event[1], event[2], event[4]) for event in written])
+    return len(written), duplicates, rejected
+
+
+def _fsync_directory(directory):
+    """Make the directory entries of newly created files durable"""
+    handle = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(handle)
+    finally:
+        os.close(handle)
+
+
+class _Segment:
+    """The WAL file being appended to, with the events written to it"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        self.events = []
+        self.oldest = time.monotonic()
+        # Writes made and writes known to be on disk; the lock serializes fsyncs
+        self.written = 0
+        self.synced = 0
+        self.lock = threading.Lock()
+
+    def sync(self, upto):
+        """Return once write number `upto` is on disk, fsyncing for every later write too"""
+        with self.lock:
+            if self.synced >= upto:
+                return
+            # Every write counted so far is already in the file, so one fsync covers them all
+            target = self.written
+            os.fsync(self.file.fileno())
+            self.synced = target
+
+    def close(self, fsync):
+        with self.lock:
+            if fsync and self.synced < self.written:
+                os.fsync(self.file.fileno())
+            self.synced = self.written
+            self.file.close()
+
+
+class LogWriter:
+    """Durable, buffered log inserts with group commit.
+
+    `connect` returns a new database connection, opened on first flush and
+    used only by flushes (which never run concurrently). With
+    owns_connection=False the connection belongs to the caller and is never
+    closed by the writer.
+    """
+
+    def __init__(self, connect, directory=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 fsync=True, max_pending=MAX_PENDING, owns_connection=True):
+        self._connect = connect
+        self._owns_connection = owns_connection
+        self.directory = directory or WAL_DIR
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_pending = max_pending
+        self._changed = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._connection = None
+        self._segment = None
+        # (path, events, unreadable lines) of closed segments not yet committed, oldest first
+        self._sealed = []
+        self._pending = 0
+        self._thread = None
+        self._stopping = False
+        self.counters = {
+            'appended': 0, 'written': 0, 'duplicates': 0, 'rejected': 0,
+            'batches': 0, 'replayed': 0, 'flush_failures': 0,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence = 0
+        self._load_segments()
+
+    def _load_segments(self):
+        """Queue segments left by an earlier run for replay"""
+        for path in segment_files(self.directory):
+            self._sequence = max(self._sequence, _segment_sequence(os.path.basename(path)))
+            events, bad = read_segment(path)
+            self._sealed.append((path, events, bad))
+            self._pending += len(events)
+            self.counters['replayed'] += len(events)
+
+    # --- Appending ---
+
+    def append(self, habit_id, log_date=None, status='Pending', notes=None, log_id=None):
+        """Log one check-in; durable once this returns. Raises ValueError for an invalid event."""
+        self.append_many([make_event(habit_id, log_date, status, notes, log_id)])
+
+    def append_many(self, events):
+        """Log many make_event() tuples with one WAL write and one fsync"""
+        events = list(events)
+        if not events:
+            return
+        data = ''.join(_encode(event) for event in events)
+        with self._changed:
+            while self._pending >= self.max_pending and self._thread is not None and not self._stopping:
+                self._changed.wait()
+            if self._segment is None:
+                self._sequence += 1
+                self._segment = _Segment(os.path.join(self.directory, _segment_name(self._sequence)))
+                if self.fsync:
+                    # Without this a crash could lose the new file, fsynced events and all
+                    _fsync_directory(self.directory)
+            segment = self._segment
+            segment.file.write(data)
+            segment.file.flush()
+            segment.written += 1
+            write = segment.written
+            segment.events.extend(events)
+            self._pending += len(events)
+            self.counters['appended'] += len(events)
+            flush_now = False
+            if self._due():
+                if self._thread is not None:
+                    self._changed.notify_all()
+                else:
+                    flush_now = True
+        # Outside the lock, so appends from other threads can join this fsync
+        if self.fsync:
+            segment.sync(write)
+        if flush_now:
+            self.flush()
+
+    def _seal(self):
+        """Close the current segment and queue its events; caller holds the lock"""
+        if self._segment is None:
+            return
+        self._segment.close(self.fsync)
+        self._sealed.append((self._segment.path, self._segment.events, []))
+        self._segment = None
+
+    # --- Flushing ---
+
+    def flush(self):
+        """Commit every buffered and replayed event; returns how many were written.
+
+        Raises Error if the database fails; the events stay queued (and in
+        the WAL) for the next flush.
+        """
+        with self._flush_lock:
+            with self._changed:
+                self._seal()
+                sealed = list(self._sealed)
+            written = 0
+            for path, events, bad in sealed:
+                try:
+                    if self._connection is None:
+                        self._connection = self._connect()
+                    count, duplicates, rejected = write_batch(self._connection, events)
+                except Error:
+                    with self._changed:
+                        self.counters['flush_failures'] += 1
+                    self._close_connection()
+                    raise
+                rejected = bad + [(_encode(event).rstrip('\n'), reason) for event, reason in rejected]
+                if rejected:
+                    self._write_rejected(rejected)
+                os.remove(path)
+                written += count
+                with self._changed:
+                    self._sealed.pop(0)
+                    self._pending -= len(events)
+                    self.counters['written'] += count
+                    self.counters['duplicates'] += duplicates
+                    self.counters['rejected'] += len(rejected)
+                    self.counters['batches'] += 1
+                    self._changed.notify_all()
+            return written
+
+    def _write_rejected(self, rejected):
+        with open(os.path.join(self.directory, REJECTED_NAME), 'a', encoding='utf-8') as handle:
+            for line, reason in rejected:
+                handle.write(json.dumps({'event': line, 'reason': reason}, ensure_ascii=False) + '\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _close_connection(self):
+        if self._connection is not None and self._owns_connection:
+            try:
+                self._connection.close()
+            except Error:
+                pass
+        self._connection = None
+
+    def _due(self):
+        """True when a flush is due; caller holds the lock"""
+        if self._sealed:
+            return True
+        segment = self._segment
+        return segment is not None and (len(segment.events) >= self.batch_size
+                                        or time.monotonic() - segment.oldest >= self.flush_interval)
+
+    def stats(self):
+        with self._changed:
+            return dict(self.counters, buffered=len(self._segment.events) if self._segment else 0,
+                        pending=self._pending, segments=len(self._sealed) + (self._segment is not None))
+
+    # --- Thread ---
+
+    def start(self):
+        """Replay leftover segments and flush on a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the thread, flush what is left and close the connection"""
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            self._close_connection()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while not self._stopping and not self._due():
+                    wait = self.flush_interval
+                    if self._segment is not None:
+                        wait = max(self._segment.oldest + self.flush_interval - time.monotonic(), 0)
+                    self._changed.wait(wait)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Error as e:
+                print(f"Log writer flush failed, retrying in {RETRY_SECONDS:.0f}s: {e}", file=sys.stderr)
+                with self._changed:
+                    if not self._stopping:
+                        self._changed.wait(RETRY_SECONDS)
+
+
+def replay(connection, directory=None):
+    """Commit the segments left in a WAL directory on `connection`; returns the writer's stats"""
+    writer = LogWriter(lambda: connection, directory, owns_connection=False)
+    writer.flush()
+    return writer.stats()
@@ -0,0 +1,43 @@
+-- ============================================================
+-- Migration 001: Composite index for completion-rate queries
+-- Adds Logs(habit_id, status, log_date) and rewrites
+-- GetHabitCompletionRate to a single index-only pass.
+-- Run with: mysql -u root -p project < migrations/001_logs_completion_rate_index.sql
+-- ============================================================
+
+USE project;
+
+CREATE INDEX idx_logs_habit_status_date ON Logs (habit_id, status, log_date);
+
+DROP FUNCTION IF EXISTS GetHabitCompletionRate;
+
+DELIMITER //
+
+-- Function 1: GetHabitCompletionRate
+-- Purpose: Calculates the completion rate (as a percentage) for a single habit.
+CREATE FUNCTION GetHabitCompletionRate(p_habit_id INT)
+RETURNS DECIMAL(5,2)
+DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE total_logs INT DEFAULT 0;
+    DECLARE completed_logs INT DEFAULT 0;
+    DECLARE completion_rate DECIMAL(5,2) DEFAULT 0.00;
+
+    -- Count total and completed logs in one range scan of idx_logs_habit_status_date
+    SELECT COUNT(*), COALESCE(SUM(status = 'Completed'), 0)
+    INTO total_logs, completed_logs
+    FROM Logs
+    WHERE habit_id = p_habit_id;
+
+    -- Check to prevent division by zero
+    IF total_logs = 0 THEN
+        RETURN 0.00;
+    END IF;
+
+    -- Calculate the completion rate
+    SET completion_rate = (completed_logs * 100.0) / total_logs;
+    RETURN completion_rate;
+END;
+//
+DELIMITER ;
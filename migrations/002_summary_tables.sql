@@ -0,0 +1,173 @@
+-- ============================================================
+-- Migration 002: Incrementally maintained summary tables
+-- HabitSummary / UserSummary hold per-habit and per-user log counts,
+-- kept current by triggers so the performance reports read O(habits)
+-- rows instead of regrouping Logs.
+-- Run with: mysql -u root -p project < migrations/002_summary_tables.sql
+-- ============================================================
+
+USE project;
+
+CREATE TABLE HabitSummary (
+    habit_id INT PRIMARY KEY,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_habitsummary_habit FOREIGN KEY (habit_id)
+        REFERENCES Habit(habit_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+CREATE TABLE UserSummary (
+    user_id INT PRIMARY KEY,
+    habit_count INT NOT NULL DEFAULT 0,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_usersummary_customer FOREIGN KEY (user_id)
+        REFERENCES Customer(user_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+DELIMITER //
+
+-- Every customer and habit gets a zeroed summary row
+CREATE TRIGGER after_customer_insert
+AFTER INSERT ON Customer
+FOR EACH ROW
+BEGIN
+    INSERT INTO UserSummary (user_id) VALUES (NEW.user_id);
+END;
+//
+
+CREATE TRIGGER after_habit_insert
+AFTER INSERT ON Habit
+FOR EACH ROW
+BEGIN
+    INSERT INTO HabitSummary (habit_id) VALUES (NEW.habit_id);
+    UPDATE UserSummary SET habit_count = habit_count + 1 WHERE user_id = NEW.user_id;
+END;
+//
+
+-- Cascaded deletes of Logs do not fire triggers, so take the habit's
+-- totals off its owner before the habit (and its HabitSummary row) goes.
+CREATE TRIGGER before_habit_delete
+BEFORE DELETE ON Habit
+FOR EACH ROW
+BEGIN
+    UPDATE UserSummary us
+    LEFT JOIN HabitSummary hs ON hs.habit_id = OLD.habit_id
+    SET us.habit_count = us.habit_count - 1,
+        us.total_logs = us.total_logs - COALESCE(hs.total_logs, 0),
+        us.completed_logs = us.completed_logs - COALESCE(hs.completed_logs, 0),
+        us.skipped_logs = us.skipped_logs - COALESCE(hs.skipped_logs, 0),
+        us.pending_logs = us.pending_logs - COALESCE(hs.pending_logs, 0)
+    WHERE us.user_id = OLD.user_id;
+END;
+//
+
+CREATE TRIGGER after_log_insert
+AFTER INSERT ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE habit_id = NEW.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+END;
+//
+
+CREATE TRIGGER after_log_update
+AFTER UPDATE ON Logs
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.status <=> NEW.status AND OLD.habit_id <=> NEW.habit_id) THEN
+        UPDATE HabitSummary
+        SET total_logs = total_logs - 1,
+            completed_logs = completed_logs - (OLD.status = 'Completed'),
+            skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+            pending_logs = pending_logs - (OLD.status = 'Pending')
+        WHERE habit_id = OLD.habit_id;
+
+        UPDATE UserSummary
+        SET total_logs = total_logs - 1,
+            completed_logs = completed_logs - (OLD.status = 'Completed'),
+            skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+            pending_logs = pending_logs - (OLD.status = 'Pending')
+        WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+
+        UPDATE HabitSummary
+        SET total_logs = total_logs + 1,
+            completed_logs = completed_logs + (NEW.status = 'Completed'),
+            skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+            pending_logs = pending_logs + (NEW.status = 'Pending')
+        WHERE habit_id = NEW.habit_id;
+
+        UPDATE UserSummary
+        SET total_logs = total_logs + 1,
+            completed_logs = completed_logs + (NEW.status = 'Completed'),
+            skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+            pending_logs = pending_logs + (NEW.status = 'Pending')
+        WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+    END IF;
+END;
+//
+
+CREATE TRIGGER after_log_delete
+AFTER DELETE ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE habit_id = OLD.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+END;
+//
+DELIMITER ;
+
+-- Backfill the summaries from the rows that already exist
+INSERT INTO UserSummary (user_id, habit_count, total_logs, completed_logs, skipped_logs, pending_logs)
+SELECT
+    c.user_id,
+    COUNT(DISTINCT h.habit_id),
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Customer c
+LEFT JOIN Habit h ON c.user_id = h.user_id
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY c.user_id;
+
+INSERT INTO HabitSummary (habit_id, total_logs, completed_logs, skipped_logs, pending_logs)
+SELECT
+    h.habit_id,
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Habit h
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY h.habit_id;
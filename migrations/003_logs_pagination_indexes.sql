@@ -0,0 +1,11 @@
+-- ============================================================
+-- Migration 003: Indexes for keyset-paginated log browsing
+-- Pages are ordered by (log_date, log_id); InnoDB appends the primary
+-- key to every secondary index, so these cover both filters.
+-- Run with: mysql -u root -p project < migrations/003_logs_pagination_indexes.sql
+-- ============================================================
+
+USE project;
+
+CREATE INDEX idx_logs_habit_date ON Logs (habit_id, log_date);
+CREATE INDEX idx_logs_log_date ON Logs (log_date);
@@ -0,0 +1,11 @@
+-- ============================================================
+-- Migration 004: Index for the overdue goals report and goal scheduler
+-- Both look up unachieved goals by deadline (is_achieved = FALSE AND
+-- deadline < CURRENT_DATE), a range scan on this index instead of a full
+-- scan of Goal.
+-- Run with: mysql -u root -p project < migrations/004_goal_deadline_index.sql
+-- ============================================================
+
+USE project;
+
+CREATE INDEX idx_goal_achieved_deadline ON Goal (is_achieved, deadline);
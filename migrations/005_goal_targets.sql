@@ -0,0 +1,26 @@
+-- ============================================================
+-- Migration 005: Goal targets and batch achievement
+-- target_count is the number of Completed logs (dated on or before the
+-- deadline) that achieves a goal; goal_evaluation.evaluate_goals() checks
+-- every open goal with a target in one pass over Logs and marks the ones
+-- that reached it with a single MarkGoalsAchieved call.
+-- Run with: mysql -u root -p project < migrations/005_goal_targets.sql
+-- ============================================================
+
+USE project;
+
+ALTER TABLE Goal ADD COLUMN target_count INT NULL;
+
+DELIMITER //
+
+CREATE PROCEDURE MarkGoalsAchieved(IN p_goal_ids JSON)
+BEGIN
+    UPDATE Goal g
+    JOIN JSON_TABLE(p_goal_ids, '$[*]' COLUMNS (goal_id INT PATH '$')) ids ON ids.goal_id = g.goal_id
+    SET g.is_achieved = TRUE
+    WHERE g.is_achieved = FALSE;
+
+    SELECT ROW_COUNT() AS goals_marked;
+END;
+//
+DELIMITER ;
@@ -0,0 +1,55 @@
+-- ============================================================
+-- Migration 006: One log per habit and day, server-assigned log IDs
+-- Removes duplicate logs (keeping the newest log_id of each habit and
+-- day), makes (habit_id, log_date) unique and log_id AUTO_INCREMENT, and
+-- adds the UpsertLog / UpsertLogs procedures used by
+-- habit_queries.upsert_log() and upsert_logs().
+-- The AFTER DELETE trigger keeps HabitSummary / UserSummary current while
+-- duplicates are removed.
+-- Run with: mysql -u root -p project < migrations/006_unique_daily_logs.sql
+-- ============================================================
+
+USE project;
+
+UPDATE Logs SET log_date = CURRENT_DATE WHERE log_date IS NULL;
+
+DELETE older FROM Logs older
+JOIN Logs newer
+    ON newer.habit_id = older.habit_id
+    AND newer.log_date = older.log_date
+    AND newer.log_id > older.log_id;
+
+ALTER TABLE Logs
+    MODIFY log_id INT NOT NULL AUTO_INCREMENT,
+    MODIFY log_date DATE NOT NULL DEFAULT (CURRENT_DATE),
+    DROP INDEX idx_logs_habit_date,
+    ADD UNIQUE INDEX idx_logs_habit_date (habit_id, log_date);
+
+DELIMITER //
+
+CREATE PROCEDURE UpsertLog(IN p_habit_id INT, IN p_log_date DATE, IN p_status VARCHAR(20), IN p_notes TEXT)
+BEGIN
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    VALUES (p_habit_id, p_log_date, p_status, p_notes)
+    ON DUPLICATE KEY UPDATE log_id = LAST_INSERT_ID(log_id), status = VALUES(status), notes = VALUES(notes);
+
+    SELECT LAST_INSERT_ID() AS log_id, ROW_COUNT() = 1 AS created;
+END;
+//
+
+CREATE PROCEDURE UpsertLogs(IN p_logs JSON)
+BEGIN
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    SELECT habit_id, log_date, status, notes
+    FROM JSON_TABLE(p_logs, '$[*]' COLUMNS (
+        habit_id INT PATH '$.habit_id',
+        log_date DATE PATH '$.log_date',
+        status VARCHAR(20) PATH '$.status',
+        notes TEXT PATH '$.notes'
+    )) AS entries
+    ON DUPLICATE KEY UPDATE status = VALUES(status), notes = VALUES(notes);
+
+    SELECT JSON_LENGTH(p_logs) AS logs_written;
+END;
+//
+DELIMITER ;
@@ -0,0 +1,42 @@
+-- ============================================================
+-- Migration 007: Status-only upserts keep a log's notes
+-- UpsertLog / UpsertLogs called without notes (NULL, or an entry with no
+-- "notes" key) now leave the notes of an existing log alone instead of
+-- clearing them; new logs still get empty notes.
+-- Run with: mysql -u root -p project < migrations/007_keep_log_notes.sql
+-- ============================================================
+
+USE project;
+
+DROP PROCEDURE IF EXISTS UpsertLog;
+DROP PROCEDURE IF EXISTS UpsertLogs;
+
+DELIMITER //
+
+CREATE PROCEDURE UpsertLog(IN p_habit_id INT, IN p_log_date DATE, IN p_status VARCHAR(20), IN p_notes TEXT)
+BEGIN
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    VALUES (p_habit_id, p_log_date, p_status, COALESCE(p_notes, ''))
+    ON DUPLICATE KEY UPDATE log_id = LAST_INSERT_ID(log_id), status = VALUES(status),
+        notes = COALESCE(p_notes, notes);
+
+    SELECT LAST_INSERT_ID() AS log_id, ROW_COUNT() = 1 AS created;
+END;
+//
+
+CREATE PROCEDURE UpsertLogs(IN p_logs JSON)
+BEGIN
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    SELECT entries.habit_id, entries.log_date, entries.status, COALESCE(entries.notes, '')
+    FROM JSON_TABLE(p_logs, '$[*]' COLUMNS (
+        habit_id INT PATH '$.habit_id',
+        log_date DATE PATH '$.log_date',
+        status VARCHAR(20) PATH '$.status',
+        notes TEXT PATH '$.notes'
+    )) AS entries
+    ON DUPLICATE KEY UPDATE status = VALUES(status), notes = COALESCE(entries.notes, Logs.notes);
+
+    SELECT JSON_LENGTH(p_logs) AS logs_written;
+END;
+//
+DELIMITER ;
@@ -6,16 +6,22 @@ NOTE: This Python file has been simplified to match the reduced SQL file
       1 Trigger: before_log_insert).
 """
 
-import pymysql
-from pymysql import Error
-from datetime import datetime, date
-from tabulate import tabulate
+from datetime import datetime, date, timedelta
 import os
 import sys
+import time
 import re
-import tkinter as tk
-from tkinter import messagebox
-import threading
+from itertools import chain
+import db_backend
+from db_backend import Error
+from db_pool import ConnectionPool
+import log_importer
+import habit_queries
+import habit_summary
+import db_instrument
+import report_cache
+import habit_cli
+import table_renderer
 
 # Color codes for terminal output
 class Colors:
@@ -33,6 +39,26 @@ def clear_screen():
     """Clear the terminal screen"""
     os.system('cls' if os.name == 'nt' else 'clear')
 
+def print_table(rows, headers=None):
+    """Stream rows as a grid table, pausing after every screen on a terminal"""
+    return table_renderer.render_table(rows, headers, pager=table_renderer.pager_for(sys.stdout))
+
+def print_listing(title, rows, headers, empty_message):
+    """Print title and stream rows as a table, or only empty_message if there are no rows"""
+    rows = iter(rows)
+    try:
+        first = next(rows, None)
+        if first is None:
+            print_info(empty_message)
+            return 0
+        print_header(title)
+        return print_table(chain([first], rows), headers)
+    finally:
+        # Release the streaming cursor even if the pager stopped early
+        close = getattr(rows, 'close', None)
+        if close:
+            close()
+
 def print_header(text):
     """Print styled header"""
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
@@ -52,20 +78,12 @@ def print_info(text):
     print(f"{Colors.YELLOW}ℹ {text}{Colors.END}")
 
 def get_db_connection():
-    """Establish database connection"""
+    """Establish database connection (MySQL or embedded SQLite, see db_backend)"""
     try:
-        connection = pymysql.connect(
-            host='localhost',
-            database='project',
-            user='root',  
-            password='your_mysql_password',
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.Cursor
-        )
-        return connection
+        return db_backend.connect()
     except Error as e:
-        print_error(f"Error connecting to MySQL: {e}")
-        print_error("Please ensure MySQL is running and credentials are correct.")
+        print_error(f"Error connecting to {db_backend.BACKEND} database: {e}")
+        print_error("Please ensure the database is running and credentials are correct.")
         return None
 
 def display_main_menu():
@@ -78,6 +96,7 @@ def display_main_menu():
     print(f"{Colors.BOLD}5.{Colors.END} Reports & Analytics")
     print(f"{Colors.BOLD}6.{Colors.END} Advanced Queries")
     print(f"{Colors.BOLD}7.{Colors.END} Test Single Function & Trigger")
+    print(f"{Colors.BOLD}8.{Colors.END} Diagnostics")
     print(f"{Colors.BOLD}0.{Colors.END} Exit")
     print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
 
@@ -86,17 +105,8 @@ def display_main_menu():
 def view_all_customers(connection):
     """View all customers"""
     try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT user_id, name, email, phone_no, created_at FROM Customer")
-        results = cursor.fetchall()
-        
-        if results:
-            headers = ["User ID", "Name", "Email", "Phone", "Created At"]
-            print_header("ALL CUSTOMERS")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
-        else:
-            print_info("No customers found.")
-        cursor.close()
+        headers = ["User ID", "Name", "Email", "Phone", "Created At"]
+        print_listing("ALL CUSTOMERS", habit_queries.iter_customers(connection), headers, "No customers found.")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -123,12 +133,7 @@ def add_customer(connection):
                 print_error("Invalid phone format. Please enter a 10-digit phone number.")
 
         
-        cursor = connection.cursor()
-        query = """INSERT INTO Customer (user_id, email, name, password, phone_no) 
-                    VALUES (%s, %s, %s, %s, %s)"""
-        cursor.execute(query, (user_id, email, name, password, phone))
-        connection.commit()
-        cursor.close()
+        habit_queries.insert_customer(connection, user_id, email, name, password, phone)
         
         print_success("Customer added successfully!")
     except Error as e:
@@ -147,26 +152,22 @@ def update_customer(connection):
         print("4. Password")
         choice = input("Enter choice (1-4): ")
         
-        cursor = connection.cursor()
-        
         if choice == '1':
             new_name = input("Enter new name: ")
-            cursor.execute("UPDATE Customer SET name = %s WHERE user_id = %s", (new_name, user_id))
+            habit_queries.update_customer(connection, user_id, 'name', new_name)
         elif choice == '2':
             new_email = input("Enter new email: ")
-            cursor.execute("UPDATE Customer SET email = %s WHERE user_id = %s", (new_email, user_id))
+            habit_queries.update_customer(connection, user_id, 'email', new_email)
         elif choice == '3':
             new_phone = input("Enter new phone: ")
-            cursor.execute("UPDATE Customer SET phone_no = %s WHERE user_id = %s", (new_phone, user_id))
+            habit_queries.update_customer(connection, user_id, 'phone_no', new_phone)
         elif choice == '4':
             new_password = input("Enter new password: ")
-            cursor.execute("UPDATE Customer SET password = %s WHERE user_id = %s", (new_password, user_id))
+            habit_queries.update_customer(connection, user_id, 'password', new_password)
         else:
             print_error("Invalid choice!")
             return
         
-        connection.commit()
-        cursor.close()
         print_success("Customer updated successfully!")
     except Error as e:
         print_error(f"Error: {e}")
@@ -179,10 +180,7 @@ def delete_customer(connection):
         confirm = input(f"Are you sure you want to delete user {user_id}? (yes/no): ")
         
         if confirm.lower() == 'yes':
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM Customer WHERE user_id = %s", (user_id,))
-            connection.commit()
-            cursor.close()
+            habit_queries.delete_customer(connection, user_id)
             print_success("Customer deleted successfully!")
         else:
             print_info("Deletion cancelled.")
@@ -222,23 +220,8 @@ def customer_menu(connection):
 def view_all_habits(connection):
     """View all habits"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT h.habit_id, c.name, h.name, h.start_date, h.frequency, h.is_active
-        FROM Habit h
-        JOIN Customer c ON h.user_id = c.user_id
-        ORDER BY h.habit_id
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            headers = ["Habit ID", "User", "Habit Name", "Start Date", "Frequency", "Active"]
-            print_header("ALL HABITS")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
-        else:
-            print_info("No habits found.")
-        cursor.close()
+        headers = ["Habit ID", "User", "Habit Name", "Start Date", "Frequency", "Active"]
+        print_listing("ALL HABITS", habit_queries.iter_habits(connection), headers, "No habits found.")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -260,12 +243,7 @@ def add_habit(connection):
         frequency_map = {'1': 'Daily', '2': 'Weekly', '3': 'Monthly'}
         frequency = frequency_map.get(freq_choice, 'Daily')
         
-        cursor = connection.cursor()
-        query = """INSERT INTO Habit (habit_id, user_id, name, start_date, frequency) 
-                   VALUES (%s, %s, %s, %s, %s)"""
-        cursor.execute(query, (habit_id, user_id, name, start_date, frequency))
-        connection.commit()
-        cursor.close()
+        habit_queries.insert_habit(connection, habit_id, user_id, name, start_date, frequency)
         
         print_success("Habit added successfully!")
     except Error as e:
@@ -279,10 +257,7 @@ def delete_habit(connection):
         confirm = input(f"Are you sure you want to delete habit {habit_id}? (yes/no): ")
         
         if confirm.lower() == 'yes':
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM Habit WHERE habit_id = %s", (habit_id,))
-            connection.commit()
-            cursor.close()
+            habit_queries.delete_habit(connection, habit_id)
             print_success("Habit deleted successfully!")
         else:
             print_info("Deletion cancelled.")
@@ -319,23 +294,8 @@ def habit_menu(connection):
 def view_all_goals(connection):
     """View all goals"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT g.goal_id, h.name, g.description, g.deadline, g.is_achieved
-        FROM Goal g
-        JOIN Habit h ON g.habit_id = h.habit_id
-        ORDER BY g.goal_id
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            headers = ["Goal ID", "Habit", "Description", "Deadline", "Achieved"]
-            print_header("ALL GOALS")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
-        else:
-            print_info("No goals found.")
-        cursor.close()
+        headers = ["Goal ID", "Habit", "Description", "Deadline", "Achieved", "Target"]
+        print_listing("ALL GOALS", habit_queries.iter_goals(connection), headers, "No goals found.")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -347,13 +307,10 @@ def add_goal(connection):
         habit_id = int(input("Enter Habit ID: "))
         description = input("Enter Goal Description: ")
         deadline = input("Enter Deadline (YYYY-MM-DD): ")
+        target = input("Enter Target Completions (blank for none): ").strip()
         
-        cursor = connection.cursor()
-        query = """INSERT INTO Goal (goal_id, habit_id, deadline, description) 
-                   VALUES (%s, %s, %s, %s)"""
-        cursor.execute(query, (goal_id, habit_id, deadline, description))
-        connection.commit()
-        cursor.close()
+        habit_queries.insert_goal(connection, goal_id, habit_id, deadline, description,
+                                  int(target) if target else None)
         
         print_success("Goal added successfully!")
     except Error as e:
@@ -365,16 +322,24 @@ def mark_goal_achieved(connection):
         print_header("MARK GOAL AS ACHIEVED")
         goal_id = int(input("Enter Goal ID to mark as achieved: "))
         
-        cursor = connection.cursor()
-        cursor.callproc('MarkGoalAchieved', [goal_id])
-        
-        for result in cursor.stored_results():
-            message = result.fetchone()
-            if message:
-                print_success(message[0])
-        
-        connection.commit()
-        cursor.close()
+        message = habit_queries.mark_goal_achieved(connection, goal_id)
+        if message:
+            print_success(message)
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def evaluate_goal_targets(connection):
+    """Mark every goal whose habit reached its target as achieved"""
+    import goal_evaluation
+    try:
+        print_header("EVALUATE GOAL TARGETS")
+        evaluation = goal_evaluation.evaluate_goals(connection)
+        print_info(f"Evaluated {evaluation.evaluated} open goals with targets.")
+        if evaluation.achieved:
+            print_success(f"{len(evaluation.achieved)} goals reached their target and were marked achieved: "
+                          + ", ".join(str(goal_id) for goal_id in evaluation.achieved))
+        else:
+            print_info("No goals reached their target.")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -385,6 +350,7 @@ def goal_menu(connection):
         print("1. View All Goals")
         print("2. Add New Goal")
         print("3. Mark Goal as Achieved")
+        print("4. Evaluate Goal Targets")
         print("0. Back to Main Menu")
         print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
         
@@ -396,6 +362,8 @@ def goal_menu(connection):
             add_goal(connection)
         elif choice == '3':
             mark_goal_achieved(connection)
+        elif choice == '4':
+            evaluate_goal_targets(connection)
         elif choice == '0':
             break
         else:
@@ -408,58 +376,125 @@ def goal_menu(connection):
 def view_all_logs(connection):
     """View recent logs"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT l.log_id, h.name, l.log_date, l.status, l.notes
-        FROM Logs l
-        JOIN Habit h ON l.habit_id = h.habit_id
-        ORDER BY l.log_date DESC
-        LIMIT 50
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_recent_logs(connection, 50)
         
         if results:
             headers = ["Log ID", "Habit", "Date", "Status", "Notes"]
             print_header("RECENT LOGS (50)")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
+        else:
+            print_info("No logs found.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def stream_all_logs(connection):
+    """Stream every log (optionally for one habit), newest first, a screen at a time"""
+    try:
+        print_header("ALL LOGS (STREAMING)")
+        raw_habit = input("Enter Habit ID (or press Enter for all habits): ").strip()
+        habit_id = int(raw_habit) if raw_habit else None
+        
+        shown = print_table(habit_queries.iter_logs(connection, habit_id), habit_queries.LOG_COLUMNS)
+        if shown:
+            print_info(f"Showed {shown:,} logs.")
         else:
             print_info("No logs found.")
-        cursor.close()
+    except ValueError:
+        print_error("Invalid Habit ID.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def parse_optional_date(text):
+    """Parse a YYYY-MM-DD string, returning None for blank input"""
+    text = text.strip()
+    return date.fromisoformat(text) if text else None
+
+def browse_logs(connection, habit_id=None, page_size=20):
+    """Page through logs (newest first) with keyset pagination and a date range"""
+    try:
+        print_header("BROWSE LOGS")
+        if habit_id is None:
+            raw_habit = input("Enter Habit ID (or press Enter for all habits): ").strip()
+            habit_id = int(raw_habit) if raw_habit else None
+        date_from = parse_optional_date(input("From date (YYYY-MM-DD) or press Enter: "))
+        date_to = parse_optional_date(input("To date (YYYY-MM-DD) or press Enter: "))
+        
+        def fetch(**position):
+            return habit_queries.fetch_log_page(
+                connection, habit_id, date_from, date_to, page_size=page_size, **position
+            )
+        
+        title = f"LOGS FOR HABIT {habit_id}" if habit_id is not None else "ALL LOGS"
+        rows = fetch()
+        page = 1
+        if not rows:
+            print_info("No logs found.")
+            return
+        
+        while True:
+            print_header(f"{title} - PAGE {page}")
+            print_table(rows, habit_queries.LOG_COLUMNS)
+            choice = input("[n]ext page, [p]revious page, [q]uit: ").strip().lower()
+            
+            if choice == 'n':
+                older = fetch(after=habit_queries.page_key(rows[-1]))
+                if older:
+                    rows = older
+                    page += 1
+                else:
+                    print_info("Already at the last page.")
+            elif choice == 'p':
+                newer = fetch(before=habit_queries.page_key(rows[0]))
+                if newer:
+                    rows = newer
+                    page -= 1
+                else:
+                    print_info("Already at the first page.")
+            elif choice == 'q':
+                break
+            else:
+                print_error("Invalid choice! Please try again.")
+    except ValueError:
+        print_error("Invalid Habit ID or date (use YYYY-MM-DD).")
     except Error as e:
         print_error(f"Error: {e}")
 
 def view_logs_by_habit(connection):
-    """View logs for a specific habit"""
+    """View logs for a specific habit, one page at a time"""
     try:
         print_header("VIEW LOGS BY HABIT")
         habit_id = int(input("Enter Habit ID: "))
+    except ValueError:
+        print_error("Invalid Habit ID.")
+        return
+    browse_logs(connection, habit_id)
+
+def export_logs_csv(connection):
+    """Export logs to a CSV file using an unbuffered server-side cursor"""
+    import csv
+    try:
+        print_header("EXPORT LOGS TO CSV")
+        raw_habit = input("Enter Habit ID (or press Enter for all habits): ").strip()
+        habit_id = int(raw_habit) if raw_habit else None
+        path = input("Enter output file name (e.g. logs.csv): ").strip() or "logs.csv"
         
-        cursor = connection.cursor()
-        query = """
-        SELECT l.log_id, l.log_date, l.status, l.notes
-        FROM Logs l
-        WHERE l.habit_id = %s
-        ORDER BY l.log_date DESC
-        """
-        cursor.execute(query, (habit_id,))
-        results = cursor.fetchall()
-        
-        if results:
-            headers = ["Log ID", "Date", "Status", "Notes"]
-            print_header(f"LOGS FOR HABIT {habit_id}")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
-        else:
-            print_info("No logs found for this habit.")
-        cursor.close()
-    except Error as e:
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(habit_queries.LOG_COLUMNS)
+            for row in habit_queries.iter_logs(connection, habit_id):
+                writer.writerow(row)
+                count += 1
+        print_success(f"Exported {count:,} logs to {path}")
+    except ValueError:
+        print_error("Invalid Habit ID.")
+    except (Error, OSError) as e:
         print_error(f"Error: {e}")
 
 def add_log(connection):
-    """Add a new log entry"""
+    """Add a habit's log for a day, or update the one already there"""
     try:
-        print_header("ADD NEW LOG")
-        log_id = int(input("Enter Log ID: "))
+        print_header("ADD / UPDATE LOG")
         habit_id = int(input("Enter Habit ID: "))
         log_date = input("Enter Log Date (YYYY-MM-DD) or press Enter for today: ").strip()
         
@@ -475,16 +510,14 @@ def add_log(connection):
         status_map = {'1': 'Completed', '2': 'Pending', '3': 'Skipped'}
         status = status_map.get(status_choice, 'Pending')
         
-        notes = input("Enter Notes: ")
+        notes = input("Enter Notes (blank = keep existing): ")
         
-        cursor = connection.cursor()
-        query = """INSERT INTO Logs (log_id, habit_id, log_date, notes, status) 
-                   VALUES (%s, %s, %s, %s, %s)"""
-        cursor.execute(query, (log_id, habit_id, log_date, notes, status))
-        connection.commit()
-        cursor.close()
+        log_id, created = habit_queries.upsert_log(connection, habit_id, log_date, status, notes or None)
         
-        print_success("Log added successfully!")
+        if created:
+            print_success(f"Log {log_id} added successfully!")
+        else:
+            print_success(f"Log {log_id} for that day updated successfully!")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -503,10 +536,7 @@ def update_log_status(connection):
         status_map = {'1': 'Completed', '2': 'Pending', '3': 'Skipped'}
         new_status = status_map.get(status_choice, 'Pending')
         
-        cursor = connection.cursor()
-        cursor.execute("UPDATE Logs SET status = %s WHERE log_id = %s", (new_status, log_id))
-        connection.commit()
-        cursor.close()
+        habit_queries.set_log_status(connection, log_id, new_status)
         
         print_success("Log status updated successfully!")
     except Error as e:
@@ -518,8 +548,11 @@ def log_menu(connection):
         print_header("LOG MANAGEMENT")
         print("1. View All Recent Logs")
         print("2. View Logs by Habit")
-        print("3. Add New Log")
+        print("3. Add / Update Log")
         print("4. Update Log Status")
+        print("5. Browse Logs (pages, date range)")
+        print("6. Export Logs to CSV")
+        print("7. Stream All Logs (paged)")
         print("0. Back to Main Menu")
         print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
         
@@ -533,6 +566,12 @@ def log_menu(connection):
             add_log(connection)
         elif choice == '4':
             update_log_status(connection)
+        elif choice == '5':
+            browse_logs(connection)
+        elif choice == '6':
+            export_logs_csv(connection)
+        elif choice == '7':
+            stream_all_logs(connection)
         elif choice == '0':
             break
         else:
@@ -543,65 +582,276 @@ def log_menu(connection):
 # --- Reports & Analytics ---
 
 def user_performance_summary(connection):
-    """Generate user performance summary"""
+    """Generate user performance summary (from the UserSummary table)"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT 
-            c.user_id,
-            c.name,
-            COUNT(DISTINCT h.habit_id) AS total_habits,
-            COUNT(l.log_id) AS total_logs,
-            SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END) AS completed_logs,
-            ROUND(AVG(CASE WHEN l.status = 'Completed' THEN 100 ELSE 0 END), 2) AS avg_completion_rate
-        FROM Customer c
-        LEFT JOIN Habit h ON c.user_id = h.user_id
-        LEFT JOIN Logs l ON h.habit_id = l.habit_id
-        GROUP BY c.user_id, c.name
-        HAVING COUNT(l.log_id) > 0
-        ORDER BY avg_completion_rate DESC
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_user_performance(connection)
         
         if results:
             headers = ["User ID", "Name", "Habits", "Total Logs", "Completed", "Completion %"]
             print_header("USER PERFORMANCE SUMMARY")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
         else:
             print_info("No performance data found.")
-        cursor.close()
     except Error as e:
         print_error(f"Error: {e}")
 
 def habit_performance_report(connection):
-    """Generate habit performance report"""
+    """Generate habit performance report (from the HabitSummary table)"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT 
-            h.name AS habit_name,
-            COUNT(l.log_id) AS total_logs,
-            SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END) AS completed,
-            SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END) AS skipped,
-            SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END) AS pending,
-            ROUND(AVG(CASE WHEN l.status = 'Completed' THEN 100 ELSE 0 END), 2) AS completion_rate
-        FROM Habit h
-        LEFT JOIN Logs l ON h.habit_id = l.habit_id
-        GROUP BY h.habit_id, h.name
-        HAVING COUNT(l.log_id) > 0
-        ORDER BY completion_rate DESC
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_habit_performance(connection)
         
         if results:
             headers = ["Habit", "Total Logs", "Completed", "Skipped", "Pending", "Completion %"]
             print_header("HABIT PERFORMANCE REPORT")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
         else:
             print_info("No performance data found.")
-        cursor.close()
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def habit_streaks_report(connection):
+    """Current and longest streaks for every habit (NumPy streak engine)"""
+    try:
+        import streaks
+    except ImportError:
+        print_error("The streak engine needs NumPy: pip install numpy")
+        return
+    try:
+        results = [
+            (s.habit_id, s.habit_name, s.frequency, s.current, s.current_breaks_on or "-",
+             s.longest, (s.longest_broke_on or "ongoing") if s.longest else "-")
+            for s in streaks.all_streaks(connection)
+        ]
+        
+        if results:
+            headers = ["Habit ID", "Habit", "Frequency", "Current", "Breaks On", "Longest", "Longest Broke On"]
+            print_header("HABIT STREAKS")
+            print_table(results, headers)
+            print_info("Streaks count consecutive days, weeks or months with a Completed log.")
+        else:
+            print_info("No habits found.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def check_summary_tables(connection):
+    """Rebuild the summaries from Logs and diff them against the live counters"""
+    try:
+        print_header("SUMMARY TABLE CONSISTENCY CHECK")
+        differences = habit_summary.check_summaries(connection)
+        
+        if not differences:
+            print_success("HabitSummary and UserSummary match the Logs table.")
+            return
+        
+        headers = ["Table", "ID", "Column", "Live", "Expected"]
+        print_table(differences, headers)
+        print_error(f"{len(differences)} difference(s) found.")
+        confirm = input("Rebuild the summary tables from Logs now? (yes/no): ")
+        if confirm.lower() == 'yes':
+            habit_summary.rebuild_summaries(connection)
+            print_success("Summary tables rebuilt.")
+        else:
+            print_info("Rebuild cancelled.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+# --- Analytics Snapshot ---
+
+def load_analytics_snapshot():
+    """Memory-map the current analytics snapshot, or None if there is none"""
+    try:
+        import analytics
+    except ImportError:
+        print_error("Snapshots need NumPy: pip install numpy")
+        return None
+    try:
+        return analytics.load_snapshot()
+    except FileNotFoundError:
+        print_info("No snapshot yet - create one first (option 1).")
+    except (OSError, ValueError) as e:
+        print_error(f"Error: {e}")
+    return None
+
+def create_analytics_snapshot(connection):
+    """Copy Logs, Habit, Customer and Goal into a new columnar snapshot"""
+    try:
+        import analytics
+    except ImportError:
+        print_error("Snapshots need NumPy: pip install numpy")
+        return None
+    try:
+        print_info("Creating snapshot...")
+        meta = analytics.create_snapshot(connection)
+        lengths = meta['lengths']
+        print_success(f"Snapshot written to {analytics.SNAPSHOT_DIR}: {lengths['log_day']} logs, "
+                      f"{lengths['habit_id']} habits, {lengths['user_id']} users, {lengths['goal_id']} goals.")
+        return analytics.load_snapshot()
+    except (Error, OSError) as e:
+        print_error(f"Error: {e}")
+        return None
+
+def snapshot_report(snapshot, name):
+    """Run one report on the snapshot without touching the database"""
+    import analytics
+    _, columns, title = habit_cli.REPORTS[name]
+    started = time.perf_counter()
+    results = analytics.REPORTS[name](snapshot)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if results:
+        print_header(f"{title} (SNAPSHOT)")
+        print_table(results, [header for _, header in columns])
+    else:
+        print_info("No rows.")
+    print_info(f"Snapshot taken {snapshot.created_at}, computed in {elapsed_ms:.1f} ms.")
+
+def analytics_menu(connection):
+    """Reports computed from a columnar snapshot instead of SQL"""
+    snapshot = None
+    reports = {'2': 'users', '3': 'habits', '4': 'streaks', '5': 'above-average', '6': 'goals', '7': 'overdue'}
+    while True:
+        print_header("ANALYTICS SNAPSHOT")
+        print("1. Create / Refresh Snapshot")
+        print("2. User Performance Summary")
+        print("3. Habit Performance Report")
+        print("4. Habit Streaks")
+        print("5. Users with Above Average Performance")
+        print("6. Habits with Goals")
+        print("7. Overdue Goals")
+        print("0. Back to Reports Menu")
+        print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
+        
+        choice = input("Enter your choice: ")
+        
+        if choice == '1':
+            snapshot = create_analytics_snapshot(connection) or snapshot
+        elif choice in reports:
+            snapshot = snapshot or load_analytics_snapshot()
+            if snapshot is not None:
+                snapshot_report(snapshot, reports[choice])
+        elif choice == '0':
+            break
+        else:
+            print_error("Invalid choice! Please try again.")
+        
+        input("\nPress Enter to continue...")
+
+# --- Leaderboard ---
+
+LEADERBOARD_HEADERS = ["Rank", "ID", "Name", "Total Logs", "Completed", "Completion %"]
+
+def show_leaderboard(connection, kind, metric, top=10):
+    """Top users or habits by completion rate or completed logs"""
+    import leaderboard
+    try:
+        rows = leaderboard.get(connection).top(kind, metric, top)
+        if rows:
+            by = "COMPLETION RATE" if metric == 'rate' else "COMPLETED LOGS"
+            print_header(f"TOP {top} {kind.upper()} BY {by}")
+            print_table(rows, LEADERBOARD_HEADERS)
+        else:
+            print_info("No logs yet.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def show_rank(connection, kind):
+    """Rank and percentile of one user or habit on both leaderboards"""
+    import leaderboard
+    try:
+        label = "User" if kind == 'users' else "Habit"
+        entity_id = int(input(f"Enter {label} ID: "))
+        board = leaderboard.get(connection)
+        rows = []
+        for metric, title in (('rate', "Completion Rate"), ('completed', "Completed Logs")):
+            entry = board.rank(kind, entity_id, metric)
+            if entry is not None:
+                rows.append((title, f"{entry.rank} of {board.stats()[kind]}",
+                             board.percentile(kind, entity_id, metric), entry.completion_rate, entry.completed_logs))
+        if rows:
+            print_header(f"{label.upper()} {entity_id} RANKING")
+            print_table(rows, ["Leaderboard", "Rank", "Percentile", "Completion %", "Completed"])
+        else:
+            print_info(f"{label} {entity_id} has no logs yet.")
+    except ValueError:
+        print_error("Invalid ID.")
+    except Error as e:
+        print_error(f"Error: {e}")
+
+def leaderboard_menu(connection):
+    """Leaderboards kept ranked as logs are added"""
+    while True:
+        print_header("LEADERBOARD")
+        print("1. Top Users by Completion Rate")
+        print("2. Top Users by Completed Logs")
+        print("3. Top Habits by Completion Rate")
+        print("4. Top Habits by Completed Logs")
+        print("5. Rank of a User")
+        print("6. Rank of a Habit")
+        print("0. Back to Reports Menu")
+        print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
+        
+        choice = input("Enter your choice: ")
+        
+        if choice == '1':
+            show_leaderboard(connection, 'users', 'rate')
+        elif choice == '2':
+            show_leaderboard(connection, 'users', 'completed')
+        elif choice == '3':
+            show_leaderboard(connection, 'habits', 'rate')
+        elif choice == '4':
+            show_leaderboard(connection, 'habits', 'completed')
+        elif choice == '5':
+            show_rank(connection, 'users')
+        elif choice == '6':
+            show_rank(connection, 'habits')
+        elif choice == '0':
+            break
+        else:
+            print_error("Invalid choice! Please try again.")
+        
+        input("\nPress Enter to continue...")
+
+def generate_user_reports(connection):
+    """Write one Markdown or HTML progress report per user over a process pool"""
+    import user_reports
+    try:
+        output_dir = input(f"Output directory [{user_reports.OUTPUT_DIR}]: ").strip() or user_reports.OUTPUT_DIR
+        fmt = input("Format (md/html) [md]: ").strip().lower() or 'md'
+        if fmt not in user_reports.FORMATS:
+            print_error("Invalid format.")
+            return
+        workers = input("Worker processes [one per CPU]: ").strip()
+        workers = int(workers) if workers else None
+        stats, results = user_reports.generate_reports(connection, output_dir, fmt, workers, db_backend.BACKEND)
+        print_success(f"Wrote {stats.users:,} reports ({stats.bytes / 1e6:.1f} MB) to {output_dir} "
+                      f"in {stats.seconds:.2f}s ({stats.users / max(stats.seconds, 1e-9):,.0f} users/s, "
+                      f"{stats.workers} workers)")
+        print_table(user_reports.worker_timings(results),
+                    ["Worker PID", "Shards", "Users", "Query s", "Render s"])
+    except ValueError:
+        print_error("Invalid number of workers.")
+    except (Error, OSError) as e:
+        print_error(f"Error: {e}")
+
+def habit_calendar_heatmap(connection):
+    """Completed days of one habit over the last year, from the day bitmaps"""
+    import day_bitmaps
+    try:
+        habit_id = int(input("Enter Habit ID: "))
+        bitmaps = day_bitmaps.get(connection)
+        if habit_id not in bitmaps:
+            print_error(f"Habit {habit_id} not found.")
+            return
+        date_to = date.today()
+        date_from = date_to - timedelta(days=364)
+        print_header(f"HABIT {habit_id} - COMPLETED DAYS {date_from} TO {date_to}")
+        for line in habit_cli.heatmap_lines(bitmaps.heatmap(habit_id, date_from, date_to)):
+            print(line)
+        print()
+        print_info(f"Completed: {bitmaps.count(habit_id, date_from, date_to)} days, "
+                   f"skipped: {bitmaps.count(habit_id, date_from, date_to, 'Skipped')} days")
+    except ValueError:
+        print_error("Invalid Habit ID.")
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -611,6 +861,12 @@ def reports_menu(connection):
         print_header("REPORTS & ANALYTICS")
         print("1. User Performance Summary")
         print("2. Habit Performance Report")
+        print("3. Check Summary Tables")
+        print("4. Habit Streaks")
+        print("5. Analytics Snapshot (columnar, no SQL)")
+        print("6. Leaderboard")
+        print("7. Generate Per-User Report Files")
+        print("8. Habit Calendar Heatmap")
         print("0. Back to Main Menu")
         print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
         
@@ -620,6 +876,18 @@ def reports_menu(connection):
             user_performance_summary(connection)
         elif choice == '2':
             habit_performance_report(connection)
+        elif choice == '3':
+            check_summary_tables(connection)
+        elif choice == '4':
+            habit_streaks_report(connection)
+        elif choice == '5':
+            analytics_menu(connection)
+        elif choice == '6':
+            leaderboard_menu(connection)
+        elif choice == '7':
+            generate_user_reports(connection)
+        elif choice == '8':
+            habit_calendar_heatmap(connection)
         elif choice == '0':
             break
         else:
@@ -632,97 +900,42 @@ def reports_menu(connection):
 def users_above_average(connection):
     """Nested query - Users with above average performance"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT 
-            c.user_id,
-            c.name,
-            COUNT(CASE WHEN l.status = 'Completed' THEN 1 END) AS completed_logs
-        FROM Customer c
-        JOIN Habit h ON c.user_id = h.user_id
-        JOIN Logs l ON h.habit_id = l.habit_id
-        GROUP BY c.user_id, c.name
-        HAVING COUNT(CASE WHEN l.status = 'Completed' THEN 1 END) > (
-            SELECT AVG(completed_count)
-            FROM (
-                SELECT COUNT(CASE WHEN status = 'Completed' THEN 1 END) AS completed_count
-                FROM Logs
-                GROUP BY habit_id
-            ) AS avg_table
-        )
-        ORDER BY completed_logs DESC
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_users_above_average(connection)
         
         if results:
             headers = ["User ID", "Name", "Completed Logs"]
             print_header("USERS WITH ABOVE AVERAGE PERFORMANCE")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
         else:
             print_info("No users found above average.")
-        cursor.close()
     except Error as e:
         print_error(f"Error: {e}")
 
 def habits_with_goals(connection):
     """Join query - Habits with their goals"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT 
-            c.name AS user_name,
-            h.name AS habit_name,
-            h.frequency,
-            g.description AS goal_description,
-            g.deadline,
-            g.is_achieved
-        FROM Customer c
-        JOIN Habit h ON c.user_id = h.user_id
-        LEFT JOIN Goal g ON h.habit_id = g.habit_id
-        ORDER BY c.name, h.name
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_habits_with_goals(connection)
         
         if results:
             headers = ["User", "Habit", "Frequency", "Goal", "Deadline", "Achieved"]
             print_header("HABITS WITH GOALS (JOIN QUERY)")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
         else:
             print_info("No data found.")
-        cursor.close()
     except Error as e:
         print_error(f"Error: {e}")
 
 def overdue_goals(connection):
     """Find users with overdue goals"""
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT DISTINCT
-            c.user_id,
-            c.name,
-            g.goal_id,
-            g.description,
-            g.deadline,
-            DATEDIFF(CURRENT_DATE, g.deadline) AS days_overdue
-        FROM Customer c
-        JOIN Habit h ON c.user_id = h.user_id
-        JOIN Goal g ON h.habit_id = g.habit_id
-        WHERE g.deadline < CURRENT_DATE AND g.is_achieved = FALSE
-        ORDER BY days_overdue DESC
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
+        results = habit_queries.fetch_overdue_goals(connection)
         
         if results:
             headers = ["User ID", "Name", "Goal ID", "Description", "Deadline", "Days Overdue"]
             print_header("OVERDUE GOALS")
-            print(tabulate(results, headers=headers, tablefmt="grid"))
+            print_table(results, headers)
         else:
             print_info("No overdue goals found.")
-        cursor.close()
     except Error as e:
         print_error(f"Error: {e}")
 
@@ -760,6 +973,7 @@ def test_single_function_trigger(connection):
         print(f"1. Test Function: {Colors.BOLD}GetHabitCompletionRate{Colors.END}")
         print(f"2. Test Trigger: {Colors.BOLD}before_log_insert{Colors.END} (Add Log)")
         print(f"3. Test Procedure: {Colors.BOLD}MarkGoalAchieved{Colors.END} (Goal Menu)")
+        print("4. Completion Rates for All Habits (batch)")
         print("0. Back to Main Menu")
         print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
         
@@ -780,6 +994,19 @@ def test_single_function_trigger(connection):
             elif choice == '3':
                 # Redirect to Goal Menu to test MarkGoalAchieved Procedure
                 goal_menu(connection)
+            elif choice == '4':
+                # Batch equivalent of GetHabitCompletionRate for every habit
+                counts = habit_queries.get_completion_counts(connection)
+                results = [
+                    (habit_id, total, completed, habit_queries.completion_rate(total, completed))
+                    for habit_id, (total, completed) in sorted(counts.items())
+                ]
+                if results:
+                    headers = ["Habit ID", "Total Logs", "Completed", "Completion %"]
+                    print_header("COMPLETION RATES (ALL HABITS)")
+                    print_table(results, headers)
+                else:
+                    print_info("No habits found.")
             elif choice == '0':
                 break
             else:
@@ -789,6 +1016,108 @@ def test_single_function_trigger(connection):
             
         input("\nPress Enter to continue...")
 
+# --- Diagnostics ---
+
+def show_query_stats(connection):
+    """Per-query latency, rows and bytes recorded by the instrumented connection"""
+    if not db_instrument.ENABLED:
+        print_info("Query instrumentation is disabled (HABIT_TRACKER_INSTRUMENT=0).")
+        return
+    stats = db_instrument.registry.snapshot()
+    if stats:
+        results = [
+            (stat['name'], stat['count'], stat['errors'], stat['avg_ms'], stat['p50_ms'],
+             stat['p95_ms'], stat['max_ms'], stat['rows'], stat['bytes'])
+            for stat in stats
+        ]
+        headers = ["Query", "Calls", "Errors", "Avg ms", "p50 ms", "p95 ms", "Max ms", "Rows", "Bytes"]
+        print_header("QUERY STATISTICS")
+        print_table(results, headers)
+        print_info("p50/p95 are histogram bucket upper bounds.")
+    else:
+        print_info("No queries recorded yet.")
+
+def show_slow_queries(connection):
+    """Recent statements slower than the threshold, with their EXPLAIN plans"""
+    slow = list(db_instrument.registry.slow_queries)
+    if not slow:
+        print_info(f"No queries slower than {db_instrument.SLOW_QUERY_MS:g} ms.")
+        return
+    print_header(f"SLOW QUERIES (>= {db_instrument.SLOW_QUERY_MS:g} ms)")
+    for entry in reversed(slow):
+        print(f"{Colors.BOLD}{entry['at']}  {entry['name']}  {entry['elapsed_ms']} ms{Colors.END}")
+        print(f"  {entry['sql']}")
+        plan = entry.get('plan')
+        if isinstance(plan, list) and plan:
+            print_table(plan)
+        elif plan:
+            print(f"  {plan}")
+        print()
+
+def show_report_cache_stats(connection):
+    """Hit / miss / eviction counters of the report cache"""
+    stats = report_cache.cache.stats()
+    print_header("REPORT CACHE")
+    print_table(list(stats.items()), ["Counter", "Value"])
+
+def dump_query_stats(connection):
+    """Write query stats and slow queries to a JSON file"""
+    path = input("Enter output file name (e.g. query_stats.json): ").strip() or "query_stats.json"
+    try:
+        db_instrument.registry.dump(path)
+        print_success(f"Query statistics written to {path}")
+    except OSError as e:
+        print_error(f"Error: {e}")
+
+def set_slow_query_threshold(connection):
+    """Change the slow-query threshold for this session"""
+    try:
+        threshold = float(input(f"Slow-query threshold in ms (current {db_instrument.SLOW_QUERY_MS:g}): "))
+    except ValueError:
+        print_error("Please enter a number.")
+        return
+    db_instrument.SLOW_QUERY_MS = threshold
+    print_success(f"Queries taking {threshold:g} ms or more will be logged to {db_instrument.SLOW_LOG_PATH}")
+
+def diagnostics_menu(connection):
+    """Diagnostics submenu"""
+    while True:
+        print_header("DIAGNOSTICS")
+        print("1. Query Statistics")
+        print("2. Slow Queries (with EXPLAIN plans)")
+        print("3. Dump Statistics to File")
+        print("4. Reset Statistics")
+        print("5. Set Slow-Query Threshold")
+        print("6. Report Cache Stats")
+        print("7. Clear Report Cache")
+        print("0. Back to Main Menu")
+        print(f"{Colors.CYAN}{'-'*70}{Colors.END}")
+        
+        choice = input("Enter your choice: ")
+        
+        if choice == '1':
+            show_query_stats(connection)
+        elif choice == '2':
+            show_slow_queries(connection)
+        elif choice == '3':
+            dump_query_stats(connection)
+        elif choice == '4':
+            db_instrument.registry.reset()
+            print_success("Statistics cleared.")
+        elif choice == '5':
+            set_slow_query_threshold(connection)
+        elif choice == '6':
+            show_report_cache_stats(connection)
+        elif choice == '7':
+            report_cache.cache.clear()
+            print_success("Report cache cleared.")
+        elif choice == '0':
+            break
+        else:
+            print_error("Invalid choice! Please try again.")
+        
+        input("\nPress Enter to continue...")
+
 # --- CLI Main Function ---
 
 def main_cli():
@@ -821,6 +1150,8 @@ def main_cli():
                 advanced_queries_menu(connection)
             elif choice == '7':
                 test_single_function_trigger(connection)
+            elif choice == '8':
+                diagnostics_menu(connection)
             elif choice == '0':
                 print_info("Thank you for using Personal Habit Tracker!")
                 break
@@ -836,94 +1167,69 @@ def main_cli():
             connection.close()
             print_success("Database connection closed.")
 
-# --- GUI Functions ---
+# --- Bulk Import ---
 
-def run_thread(func, conn):
-    """Run function in a separate thread"""
-    threading.Thread(target=func, args=(conn,), daemon=True).start()
+def import_logs_mode(args):
+    """Stream CSV / JSON Lines log files into the Logs table (--import-logs)"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="personal_habit_tracker.py --import-logs",
+        description="Bulk import log entries from CSV or JSON Lines files (.gz supported)."
+    )
+    parser.add_argument("files", nargs="+", help="CSV / JSONL files with habit_id, log_date, status, notes (log_id optional)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT batch and commit")
+    options = parser.parse_args(args)
 
-def main_gui():
-    """Main GUI function"""
-    conn = get_db_connection()
-    if not conn:
-        messagebox.showerror("Error", "Database connection failed")
-        return
-
-    root = tk.Tk()
-    root.title("Personal Habit Tracker")
-    root.geometry("500x600")
-    root.configure(bg="#1e1e2e")
-
-    tk.Label(
-        root,
-        text="Personal Habit Tracker",
-        font=("Helvetica", 20, "bold"),
-        fg="white",
-        bg="#1e1e2e"
-    ).pack(pady=20)
-
-    tk.Label(
-        root,
-        text="DBMS Project – Tkinter Interface",
-        fg="gray",
-        bg="#1e1e2e"
-    ).pack(pady=5)
-
-    btn = {
-        "width": 35,
-        "height": 2,
-        "bg": "#313244",
-        "fg": "white",
-        "font": ("Helvetica", 10),
-        "activebackground": "#45475a"
-    }
-
-    tk.Button(root, text="Customer Management",
-              command=lambda: run_thread(customer_menu, conn),
-              **btn).pack(pady=5)
-
-    tk.Button(root, text="Habit Management",
-              command=lambda: run_thread(habit_menu, conn),
-              **btn).pack(pady=5)
-
-    tk.Button(root, text="Goal Management",
-              command=lambda: run_thread(goal_menu, conn),
-              **btn).pack(pady=5)
+    connection = get_db_connection()
+    if not connection:
+        sys.exit(1)
 
-    tk.Button(root, text="Log Management",
-              command=lambda: run_thread(log_menu, conn),
-              **btn).pack(pady=5)
+    def show_progress(stats):
+        print(f"\r{Colors.CYAN}Imported {stats.inserted:,} rows "
+              f"({stats.rows_per_second:,.0f} rows/s), rejected {stats.rejected:,}{Colors.END}",
+              end="", flush=True)
 
-    tk.Button(root, text="Reports & Analytics",
-              command=lambda: run_thread(reports_menu, conn),
-              **btn).pack(pady=5)
+    print_header("IMPORT LOGS")
+    try:
+        stats = log_importer.import_logs(connection, options.files, options.batch_size, show_progress)
+    except (Error, OSError) as e:
+        print()
+        print_error(f"Import failed: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
 
-    tk.Button(root, text="Advanced Queries",
-              command=lambda: run_thread(advanced_queries_menu, conn),
-              **btn).pack(pady=5)
+    print()
+    print_success(f"Imported {stats.inserted:,} of {stats.read:,} rows in {stats.elapsed:.2f}s "
+                  f"({stats.rows_per_second:,.0f} rows/s, {stats.batches} batches)")
+    if stats.rejected:
+        print_error(f"Rejected {stats.rejected:,} rows. First {len(stats.reject_samples)}:")
+        print_table(stats.reject_samples, ["File", "Line", "Reason"])
 
-    tk.Button(root, text="Test Function / Trigger / Procedure",
-              command=lambda: run_thread(test_single_function_trigger, conn),
-              **btn).pack(pady=5)
+# --- GUI Functions ---
 
-    tk.Button(
-        root,
-        text="Exit",
-        command=root.destroy,
-        bg="#f38ba8",
-        fg="black",
-        width=35,
-        height=2,
-        font=("Helvetica", 10, "bold")
-    ).pack(pady=25)
+def main_gui():
+    """Main GUI function (native Tk views, see tk_views.py)"""
+    from tkinter import messagebox
+    import tk_views
+    pool = ConnectionPool(db_backend.connect)
+    try:
+        # Open the first connection up front so a bad configuration fails fast
+        pool.checkin(pool.checkout())
+    except Error as e:
+        messagebox.showerror("Error", f"Database connection failed: {e}")
+        return
 
-    root.mainloop()
-    conn.close()
+    try:
+        tk_views.run_app(pool)
+    finally:
+        pool.close()
 
 # --- Mode Selection GUI ---
 
 def select_mode_gui():
     """Show a GUI window to select between CLI and GUI mode"""
+    import tkinter as tk
     root = tk.Tk()
     root.title("Personal Habit Tracker - Mode Selection")
     root.geometry("400x300")
@@ -993,8 +1299,12 @@ if __name__ == "__main__":
             main_gui()
         elif sys.argv[1] == "--cli":
             main_cli()
+        elif sys.argv[1] == "--import-logs":
+            import_logs_mode(sys.argv[2:])
+        elif sys.argv[1] in habit_cli.COMMANDS:
+            sys.exit(habit_cli.main(sys.argv[1:]))
         else:
-            print("Usage: personal_habit_tracker.py [--cli|--gui]")
+            print("Usage: personal_habit_tracker.py [--cli|--gui|--import-logs FILE...|report|logs|goals ...]")
             sys.exit(1)
     else:
         # Check if stdin is available (running in console)
@@ -39,6 +39,7 @@ CREATE TABLE Goal (
     deadline DATE NOT NULL,
     description TEXT NOT NULL,
     is_achieved BOOLEAN DEFAULT FALSE,
+    target_count INT NULL,
     CONSTRAINT fk_goal_habit FOREIGN KEY (habit_id)
         REFERENCES Habit(habit_id)
         ON DELETE CASCADE
@@ -46,9 +47,9 @@ CREATE TABLE Goal (
 );
 
 CREATE TABLE Logs (
-    log_id INT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT PRIMARY KEY,
     habit_id INT NOT NULL,
-    log_date DATE DEFAULT (CURRENT_DATE),
+    log_date DATE NOT NULL DEFAULT (CURRENT_DATE),
     notes TEXT,
     status VARCHAR(20) NOT NULL DEFAULT 'Pending',
     CONSTRAINT fk_logs_habit FOREIGN KEY (habit_id)
@@ -58,6 +59,18 @@ CREATE TABLE Logs (
     CONSTRAINT chk_status CHECK (status IN ('Completed', 'Pending', 'Skipped'))
 );
 
+-- Composite index used by GetHabitCompletionRate and the completion-rate reports
+CREATE INDEX idx_logs_habit_status_date ON Logs (habit_id, status, log_date);
+
+-- Indexes for keyset pagination on (log_date, log_id); InnoDB appends the
+-- primary key (log_id) to every secondary index. A habit has at most one
+-- log per day, which UpsertLog / UpsertLogs rely on.
+CREATE UNIQUE INDEX idx_logs_habit_date ON Logs (habit_id, log_date);
+CREATE INDEX idx_logs_log_date ON Logs (log_date);
+
+-- Overdue goals: unachieved goals by deadline
+CREATE INDEX idx_goal_achieved_deadline ON Goal (is_achieved, deadline);
+
 -- ============================================================
 -- SAMPLE DATA INSERTION
 -- (Kept the sample data for testing the remaining logic)
@@ -107,7 +120,7 @@ INSERT INTO Logs (log_id, habit_id, log_date, notes, status) VALUES
 (416, 207, '2024-10-01', 'Completed dancing lesson on Salsa', 'Completed');
 
 -- ============================================================
--- STORED PROCEDURE (ONLY ONE)
+-- STORED PROCEDURES
 -- ============================================================
 
 DELIMITER //
@@ -124,6 +137,57 @@ BEGIN
     SELECT CONCAT('Goal ', p_goal_id, ' marked as achieved!') AS Message;
 END;
 //
+
+-- Stored Procedure 2: MarkGoalsAchieved
+-- Purpose: Marks many goals achieved in one UPDATE; p_goal_ids is a JSON array of goal IDs.
+CREATE PROCEDURE MarkGoalsAchieved(IN p_goal_ids JSON)
+BEGIN
+    -- Join the ID list as a table so each goal is a primary key lookup
+    UPDATE Goal g
+    JOIN JSON_TABLE(p_goal_ids, '$[*]' COLUMNS (goal_id INT PATH '$')) ids ON ids.goal_id = g.goal_id
+    SET g.is_achieved = TRUE
+    WHERE g.is_achieved = FALSE;
+
+    SELECT ROW_COUNT() AS goals_marked;
+END;
+//
+
+-- Stored Procedure 3: UpsertLog
+-- Purpose: Records a habit's log for a day in one call: inserts it with a new log_id,
+-- or updates the status and notes of the log already there. NULL notes keep the
+-- existing notes (a new log gets ''). Returns the log_id.
+CREATE PROCEDURE UpsertLog(IN p_habit_id INT, IN p_log_date DATE, IN p_status VARCHAR(20), IN p_notes TEXT)
+BEGIN
+    -- LAST_INSERT_ID(log_id) makes an update report the existing log's ID as well
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    VALUES (p_habit_id, p_log_date, p_status, COALESCE(p_notes, ''))
+    ON DUPLICATE KEY UPDATE log_id = LAST_INSERT_ID(log_id), status = VALUES(status),
+        notes = COALESCE(p_notes, notes);
+
+    -- ROW_COUNT() is 1 for a new row, 2 for an update and 0 when nothing changed
+    SELECT LAST_INSERT_ID() AS log_id, ROW_COUNT() = 1 AS created;
+END;
+//
+
+-- Stored Procedure 4: UpsertLogs
+-- Purpose: UpsertLog for many logs in one statement; p_logs is a JSON array of
+-- {"habit_id", "log_date", "status", "notes"} objects; an entry without notes keeps the
+-- existing notes. A later entry for the same habit and day wins.
+CREATE PROCEDURE UpsertLogs(IN p_logs JSON)
+BEGIN
+    INSERT INTO Logs (habit_id, log_date, status, notes)
+    SELECT entries.habit_id, entries.log_date, entries.status, COALESCE(entries.notes, '')
+    FROM JSON_TABLE(p_logs, '$[*]' COLUMNS (
+        habit_id INT PATH '$.habit_id',
+        log_date DATE PATH '$.log_date',
+        status VARCHAR(20) PATH '$.status',
+        notes TEXT PATH '$.notes'
+    )) AS entries
+    ON DUPLICATE KEY UPDATE status = VALUES(status), notes = COALESCE(entries.notes, Logs.notes);
+
+    SELECT JSON_LENGTH(p_logs) AS logs_written;
+END;
+//
 DELIMITER ;
 
 -- ============================================================
@@ -144,11 +208,11 @@ BEGIN
     DECLARE completed_logs INT DEFAULT 0;
     DECLARE completion_rate DECIMAL(5,2) DEFAULT 0.00;
 
-    -- Get total number of logs for the habit
-    SELECT COUNT(*) INTO total_logs FROM Logs WHERE habit_id = p_habit_id;
-    
-    -- Get number of completed logs for the habit
-    SELECT COUNT(*) INTO completed_logs FROM Logs WHERE habit_id = p_habit_id AND status = 'Completed';
+    -- Count total and completed logs in one range scan of idx_logs_habit_status_date
+    SELECT COUNT(*), COALESCE(SUM(status = 'Completed'), 0)
+    INTO total_logs, completed_logs
+    FROM Logs
+    WHERE habit_id = p_habit_id;
 
     -- Check to prevent division by zero
     IF total_logs = 0 THEN
@@ -188,6 +252,176 @@ END;
 //
 DELIMITER ;
 
+-- ============================================================
+-- SUMMARY TABLES
+-- (Per-habit / per-user log counters kept current by triggers;
+--  read by the performance reports instead of regrouping Logs)
+-- ============================================================
+
+CREATE TABLE HabitSummary (
+    habit_id INT PRIMARY KEY,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_habitsummary_habit FOREIGN KEY (habit_id)
+        REFERENCES Habit(habit_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+CREATE TABLE UserSummary (
+    user_id INT PRIMARY KEY,
+    habit_count INT NOT NULL DEFAULT 0,
+    total_logs INT NOT NULL DEFAULT 0,
+    completed_logs INT NOT NULL DEFAULT 0,
+    skipped_logs INT NOT NULL DEFAULT 0,
+    pending_logs INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_usersummary_customer FOREIGN KEY (user_id)
+        REFERENCES Customer(user_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+DELIMITER //
+
+-- Every customer and habit gets a zeroed summary row
+CREATE TRIGGER after_customer_insert
+AFTER INSERT ON Customer
+FOR EACH ROW
+BEGIN
+    INSERT INTO UserSummary (user_id) VALUES (NEW.user_id);
+END;
+//
+
+CREATE TRIGGER after_habit_insert
+AFTER INSERT ON Habit
+FOR EACH ROW
+BEGIN
+    INSERT INTO HabitSummary (habit_id) VALUES (NEW.habit_id);
+    UPDATE UserSummary SET habit_count = habit_count + 1 WHERE user_id = NEW.user_id;
+END;
+//
+
+-- Cascaded deletes of Logs do not fire triggers, so take the habit's
+-- totals off its owner before the habit (and its HabitSummary row) goes.
+CREATE TRIGGER before_habit_delete
+BEFORE DELETE ON Habit
+FOR EACH ROW
+BEGIN
+    UPDATE UserSummary us
+    LEFT JOIN HabitSummary hs ON hs.habit_id = OLD.habit_id
+    SET us.habit_count = us.habit_count - 1,
+        us.total_logs = us.total_logs - COALESCE(hs.total_logs, 0),
+        us.completed_logs = us.completed_logs - COALESCE(hs.completed_logs, 0),
+        us.skipped_logs = us.skipped_logs - COALESCE(hs.skipped_logs, 0),
+        us.pending_logs = us.pending_logs - COALESCE(hs.pending_logs, 0)
+    WHERE us.user_id = OLD.user_id;
+END;
+//
+
+CREATE TRIGGER after_log_insert
+AFTER INSERT ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE habit_id = NEW.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs + 1,
+        completed_logs = completed_logs + (NEW.status = 'Completed'),
+        skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+        pending_logs = pending_logs + (NEW.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+END;
+//
+
+CREATE TRIGGER after_log_update
+AFTER UPDATE ON Logs
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.status <=> NEW.status AND OLD.habit_id <=> NEW.habit_id) THEN
+        UPDATE HabitSummary
+        SET total_logs = total_logs - 1,
+            completed_logs = completed_logs - (OLD.status = 'Completed'),
+            skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+            pending_logs = pending_logs - (OLD.status = 'Pending')
+        WHERE habit_id = OLD.habit_id;
+
+        UPDATE UserSummary
+        SET total_logs = total_logs - 1,
+            completed_logs = completed_logs - (OLD.status = 'Completed'),
+            skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+            pending_logs = pending_logs - (OLD.status = 'Pending')
+        WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+
+        UPDATE HabitSummary
+        SET total_logs = total_logs + 1,
+            completed_logs = completed_logs + (NEW.status = 'Completed'),
+            skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+            pending_logs = pending_logs + (NEW.status = 'Pending')
+        WHERE habit_id = NEW.habit_id;
+
+        UPDATE UserSummary
+        SET total_logs = total_logs + 1,
+            completed_logs = completed_logs + (NEW.status = 'Completed'),
+            skipped_logs = skipped_logs + (NEW.status = 'Skipped'),
+            pending_logs = pending_logs + (NEW.status = 'Pending')
+        WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = NEW.habit_id);
+    END IF;
+END;
+//
+
+CREATE TRIGGER after_log_delete
+AFTER DELETE ON Logs
+FOR EACH ROW
+BEGIN
+    UPDATE HabitSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE habit_id = OLD.habit_id;
+
+    UPDATE UserSummary
+    SET total_logs = total_logs - 1,
+        completed_logs = completed_logs - (OLD.status = 'Completed'),
+        skipped_logs = skipped_logs - (OLD.status = 'Skipped'),
+        pending_logs = pending_logs - (OLD.status = 'Pending')
+    WHERE user_id = (SELECT user_id FROM Habit WHERE habit_id = OLD.habit_id);
+END;
+//
+DELIMITER ;
+
+-- Backfill the summaries from the rows that already exist
+INSERT INTO UserSummary (user_id, habit_count, total_logs, completed_logs, skipped_logs, pending_logs)
+SELECT
+    c.user_id,
+    COUNT(DISTINCT h.habit_id),
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Customer c
+LEFT JOIN Habit h ON c.user_id = h.user_id
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY c.user_id;
+
+INSERT INTO HabitSummary (habit_id, total_logs, completed_logs, skipped_logs, pending_logs)
+SELECT
+    h.habit_id,
+    COUNT(l.log_id),
+    COALESCE(SUM(CASE WHEN l.status = 'Completed' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Skipped' THEN 1 ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN l.status = 'Pending' THEN 1 ELSE 0 END), 0)
+FROM Habit h
+LEFT JOIN Logs l ON h.habit_id = l.habit_id
+GROUP BY h.habit_id;
+
 -- ============================================================
 -- COMPLEX QUERIES
 -- (Kept complex queries as they are standard SQL and not functions/procedures)
@@ -0,0 +1,132 @@
+"""
+Personal Habit Tracker - Report Cache
+Bounded in-process read-through cache for report results. Each cached report
+declares the tables it reads; write paths call invalidate() with the tables
+they changed, which drops exactly the reports depending on them. Entries
+also expire after a TTL so writes made by other processes are picked up.
+
+Environment:
+    HABIT_TRACKER_CACHE_SIZE=64       maximum cached results (0 disables the cache)
+    HABIT_TRACKER_CACHE_TTL=300       seconds before a cached result expires
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+MAX_ENTRIES = int(os.environ.get('HABIT_TRACKER_CACHE_SIZE', '64'))
+TTL_SECONDS = float(os.environ.get('HABIT_TRACKER_CACHE_TTL', '300'))
+
+# Every table a cached report can depend on; invalidate() with no tables clears all
+TABLES = ('Customer', 'Habit', 'Goal', 'Logs')
+
+
+class ReportCache:
+    """Thread-safe LRU cache with a TTL and per-table invalidation"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, tables, rows)
+        self._entries = OrderedDict()
+        # Bumped on every invalidation so a result computed across a write is not stored
+        self._versions = dict.fromkeys(TABLES, 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, tables, compute):
+        """Cached rows for key, or compute() them and cache the result"""
+        if self.max_entries <= 0:
+            return compute()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[2])
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            versions = [self._versions[table] for table in tables]
+
+        rows = tuple(compute())
+
+        with self._lock:
+            if versions == [self._versions[table] for table in tables]:
+                self._entries[key] = (self._clock() + self.ttl, tables, rows)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return list(rows)
+
+    def invalidate(self, *tables):
+        """Drop every cached result that reads any of the given tables"""
+        tables = set(tables or TABLES)
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if tables.intersection(entry[1])]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits * 100 / lookups, 1) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+            }
+
+
+cache = ReportCache()
+
+
+def invalidate(*tables):
+    """Call after committing a write to the given tables"""
+    cache.invalidate(*tables)
+
+
+def database_key(connection):
+    """Identifies the database behind a connection so results are never shared across databases"""
+    if getattr(connection, 'backend', 'mysql') == 'sqlite':
+        return ('sqlite', os.path.abspath(connection.path))
+    return ('mysql', getattr(connection, 'host', None), getattr(connection, 'port', None),
+            getattr(connection, 'db', None))
+
+
+def cached_report(*tables, per_day=False):
+    """Decorator caching a report function of (connection, *args) that reads `tables`.
+
+    per_day adds today's date to the key for reports that use CURRENT_DATE.
+    The uncached function stays available as `__wrapped__`.
+    """
+    def decorator(fetch):
+        name = f"{fetch.__module__}.{fetch.__qualname__}"
+
+        @functools.wraps(fetch)
+        def report(connection, *args):
+            key = (name, database_key(connection), args, date.today() if per_day else None)
+            return cache.get_or_compute(key, tables, lambda: fetch(connection, *args))
+        return report
+    return decorator
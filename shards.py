@@ -0,0 +1,449 @@
+"""
+Personal Habit Tracker - User Shards
+Spreads customers over several databases ("shards") with the usual schema and
+routes every per-user operation to the shard that owns the user: shard
+user_id % number of shards. A user's habits, goals and logs live on the
+user's shard, so the functions of habit_queries run unchanged on that
+shard's connection.
+
+Habit and goal IDs are chosen by the caller, so a ShardSet keeps a directory
+of the shard holding each one, filled on insert and by asking every shard on
+a miss; inserts refuse IDs and emails already used on another shard. Log IDs
+are assigned by the shards from disjoint ranges (shard k: k * LOG_ID_SPAN + 1
+up to (k + 1) * LOG_ID_SPAN), so a log_id alone names its shard.
+
+Global reports run on every shard at once, one worker thread and connection
+per shard, and the results are merged: per-user and per-habit rows are
+concatenated and sorted again, and users_above_average adds up every shard's
+habit and completed-log totals to compare users with the global average.
+
+Shards are SQLite files or MySQL schemas created from project.sql; split()
+copies an existing database into empty shards. Changing the number of shards
+means splitting again.
+
+Environment:
+    HABIT_TRACKER_SHARDS=shard0.db,shard1.db    SQLite files or MySQL schemas (per HABIT_TRACKER_BACKEND)
+"""
+
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+import day_bitmaps
+import db_backend
+import goal_scheduler
+import habit_queries
+import leaderboard
+import report_cache
+from db_backend import Error
+
+SHARDS = [name.strip() for name in os.environ.get('HABIT_TRACKER_SHARDS', '').split(',') if name.strip()]
+
+# Logs.log_id is an INT, which leaves room for 21 ranges
+LOG_ID_SPAN = 100000000
+MAX_SHARDS = 21
+
+SPLIT_BATCH_SIZE = 5000
+
+# habit_cli report names -> ShardSet methods
+REPORTS = {
+    'users': 'fetch_user_performance',
+    'habits': 'fetch_habit_performance',
+    'above-average': 'fetch_users_above_average',
+    'goals': 'fetch_habits_with_goals',
+    'overdue': 'fetch_overdue_goals',
+}
+
+# Rows copied by split(); the last column of Goal and Logs rows is the owner's user_id
+_SPLIT_TABLES = (
+    ('Customer',
+     "SELECT user_id, email, name, password, phone_no, created_at, user_id FROM Customer",
+     "INSERT INTO Customer (user_id, email, name, password, phone_no, created_at) VALUES (%s, %s, %s, %s, %s, %s)"),
+    ('Habit',
+     "SELECT habit_id, user_id, name, start_date, frequency, is_active, user_id FROM Habit",
+     "INSERT INTO Habit (habit_id, user_id, name, start_date, frequency, is_active) VALUES (%s, %s, %s, %s, %s, %s)"),
+    ('Goal',
+     "SELECT g.goal_id, g.habit_id, g.deadline, g.description, g.is_achieved, g.target_count, h.user_id "
+     "FROM Goal g JOIN Habit h ON h.habit_id = g.habit_id",
+     "INSERT INTO Goal (goal_id, habit_id, deadline, description, is_achieved, target_count) "
+     "VALUES (%s, %s, %s, %s, %s, %s)"),
+    ('Logs',
+     "SELECT l.log_id, l.habit_id, l.log_date, l.notes, l.status, h.user_id "
+     "FROM Logs l JOIN Habit h ON h.habit_id = l.habit_id",
+     "INSERT INTO Logs (log_id, habit_id, log_date, notes, status) VALUES (%s, %s, %s, %s, %s)"),
+)
+
+
+def _exists(connection, query, args):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, args)
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def _table_counts(connection):
+    cursor = connection.cursor()
+    try:
+        counts = []
+        for table in ('Customer', 'Habit', 'Goal', 'Logs'):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts.append(cursor.fetchone()[0])
+        return counts
+    finally:
+        cursor.close()
+
+
+class ShardSet:
+    """Connections to every shard, per-user routing and scatter-gather reports.
+
+    Like a connection, a ShardSet is used by one thread at a time; scatter()
+    gives each shard its own worker thread.
+    """
+
+    def __init__(self, shards=None, backend=None):
+        self.shards = list(shards if shards is not None else SHARDS)
+        if not self.shards:
+            raise Error("No shards configured (set HABIT_TRACKER_SHARDS)")
+        if len(self.shards) > MAX_SHARDS:
+            raise Error(f"At most {MAX_SHARDS} shards are supported")
+        self.backend = (backend or db_backend.BACKEND).lower()
+        self._connections = [None] * len(self.shards)
+        self._executor = None
+        # habit_id / goal_id -> shard index
+        self._habit_shards = {}
+        self._goal_shards = {}
+
+    def __len__(self):
+        return len(self.shards)
+
+    def connection(self, index):
+        """The connection to one shard, opened on first use"""
+        if self._connections[index] is None:
+            self._connections[index] = db_backend.connect(self.backend, self.shards[index], index * LOG_ID_SPAN)
+        return self._connections[index]
+
+    def prepare(self):
+        """Open every shard; MySQL shards start their log_ids in their own range"""
+        for index in range(len(self)):
+            connection = self.connection(index)
+            if self.backend == 'mysql' and index:
+                # Only raises the counter: InnoDB keeps it above the largest log_id
+                habit_queries._execute_write(
+                    connection, f"ALTER TABLE Logs AUTO_INCREMENT = {index * LOG_ID_SPAN + 1}", None)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for index, connection in enumerate(self._connections):
+            if connection is not None:
+                connection.close()
+                self._connections[index] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def scatter(self, func, *args):
+        """func(connection, *args) on every shard in parallel; the results in shard order"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self), thread_name_prefix='shard')
+        connections = [self.connection(index) for index in range(len(self))]
+        futures = [self._executor.submit(func, connection, *args) for connection in connections]
+        return [future.result() for future in futures]
+
+    # --- Routing ---
+
+    def shard_of_user(self, user_id):
+        return int(user_id) % len(self)
+
+    def shard_of_log(self, log_id):
+        """The shard whose range holds a log_id, or None"""
+        index = (int(log_id) - 1) // LOG_ID_SPAN
+        return index if 0 <= index < len(self) else None
+
+    def _locate(self, directory, query, entity_id):
+        index = directory.get(entity_id)
+        if index is None:
+            found = self.scatter(_exists, query, (entity_id,))
+            index = found.index(True) if True in found else None
+            if index is not None:
+                directory[entity_id] = index
+        return index
+
+    def shard_of_habit(self, habit_id):
+        """The shard holding a habit, or None"""
+        return self._locate(self._habit_shards, "SELECT 1 FROM Habit WHERE habit_id = %s", habit_id)
+
+    def shard_of_goal(self, goal_id):
+        """The shard holding a goal, or None"""
+        return self._locate(self._goal_shards, "SELECT 1 FROM Goal WHERE goal_id = %s", goal_id)
+
+    def _habit_connection(self, habit_id):
+        index = self.shard_of_habit(habit_id)
+        if index is None:
+            raise Error(f"Habit {habit_id} does not exist")
+        return self.connection(index)
+
+    def _user_connection(self, user_id):
+        return self.connection(self.shard_of_user(user_id))
+
+    def _forget(self, index):
+        """Drop the directory entries of one shard after a cascading delete there"""
+        for directory in (self._habit_shards, self._goal_shards):
+            for entity_id in [key for key, value in directory.items() if value == index]:
+                del directory[entity_id]
+
+    def _check_unused(self, query, value, what, skip=None):
+        used = self.scatter(_exists, query, (value,))
+        if any(found for index, found in enumerate(used) if index != skip):
+            raise Error(f"{what} already exists")
+
+    # --- Customers, habits and goals (see habit_queries) ---
+
+    def fetch_customers(self, user_id=None):
+        if user_id is not None:
+            return habit_queries.fetch_customers(self._user_connection(user_id), user_id)
+        return sorted(chain.from_iterable(self.scatter(habit_queries.fetch_customers)), key=lambda row: row[0])
+
+    def insert_customer(self, user_id, email, name, password, phone_no):
+        self._check_unused("SELECT 1 FROM Customer WHERE email = %s", email, f"Email {email}")
+        return habit_queries.insert_customer(self._user_connection(user_id), user_id, email, name, password, phone_no)
+
+    def update_customer(self, user_id, field, value):
+        if field == 'email':
+            self._check_unused("SELECT 1 FROM Customer WHERE email = %s", value, f"Email {value}",
+                               skip=self.shard_of_user(user_id))
+        return habit_queries.update_customer(self._user_connection(user_id), user_id, field, value)
+
+    def delete_customer(self, user_id):
+        affected = habit_queries.delete_customer(self._user_connection(user_id), user_id)
+        self._forget(self.shard_of_user(user_id))
+        return affected
+
+    def fetch_habits(self, user_id=None):
+        if user_id is not None:
+            return habit_queries.fetch_habits(self._user_connection(user_id), user_id)
+        return sorted(chain.from_iterable(self.scatter(habit_queries.fetch_habits)), key=lambda row: row[0])
+
+    def insert_habit(self, habit_id, user_id, name, start_date, frequency):
+        if self.shard_of_habit(habit_id) is not None:
+            raise Error(f"Habit {habit_id} already exists")
+        index = self.shard_of_user(user_id)
+        affected = habit_queries.insert_habit(self.connection(index), habit_id, user_id, name, start_date, frequency)
+        self._habit_shards[habit_id] = index
+        return affected
+
+    def delete_habit(self, habit_id):
+        index = self.shard_of_habit(habit_id)
+        if index is None:
+            return 0
+        affected = habit_queries.delete_habit(self.connection(index), habit_id)
+        self._forget(index)
+        return affected
+
+    def fetch_goals(self, habit_id=None):
+        if habit_id is not None:
+            index = self.shard_of_habit(habit_id)
+            return habit_queries.fetch_goals(self.connection(index), habit_id) if index is not None else []
+        return sorted(chain.from_iterable(self.scatter(habit_queries.fetch_goals)), key=lambda row: row[0])
+
+    def insert_goal(self, goal_id, habit_id, deadline, description, target_count=None):
+        if self.shard_of_goal(goal_id) is not None:
+            raise Error(f"Goal {goal_id} already exists")
+        connection = self._habit_connection(habit_id)
+        affected = habit_queries.insert_goal(connection, goal_id, habit_id, deadline, description, target_count)
+        self._goal_shards[goal_id] = self._habit_shards[habit_id]
+        return affected
+
+    def mark_goal_achieved(self, goal_id):
+        """The procedure's status message, or None for an unknown goal"""
+        index = self.shard_of_goal(goal_id)
+        if index is None:
+            return None
+        return habit_queries.mark_goal_achieved(self.connection(index), goal_id)
+
+    def mark_goals_achieved(self, goal_ids):
+        """One MarkGoalsAchieved call per shard; returns how many goals changed"""
+        groups = {}
+        for goal_id in {int(goal_id) for goal_id in goal_ids}:
+            index = self.shard_of_goal(goal_id)
+            if index is not None:
+                groups.setdefault(index, []).append(goal_id)
+        return sum(habit_queries.mark_goals_achieved(self.connection(index), group) for index, group in groups.items())
+
+    # --- Logs ---
+
+    def fetch_recent_logs(self, limit=50):
+        rows = chain.from_iterable(self.scatter(habit_queries.fetch_recent_logs, limit))
+        return sorted(rows, key=habit_queries.page_key, reverse=True)[:limit]
+
+    def fetch_log_page(self, habit_id=None, date_from=None, date_to=None, after=None, before=None, page_size=50):
+        """habit_queries.fetch_log_page over every shard: each shard's page, merged and cut to one page"""
+        if habit_id is not None:
+            index = self.shard_of_habit(habit_id)
+            if index is None:
+                return []
+            return habit_queries.fetch_log_page(self.connection(index), habit_id, date_from, date_to,
+                                                after, before, page_size)
+        pages = self.scatter(habit_queries.fetch_log_page, None, date_from, date_to, after, before, page_size)
+        rows = sorted(chain.from_iterable(pages), key=habit_queries.page_key, reverse=True)
+        # A previous page is the one nearest to `before`, i.e. the oldest rows
+        return rows[-page_size:] if after is None and before is not None else rows[:page_size]
+
+    def iter_logs(self, habit_id=None, date_from=None, date_to=None, batch_size=1000):
+        """Logs newest first, merging one stream per shard"""
+        if habit_id is not None:
+            index = self.shard_of_habit(habit_id)
+            if index is not None:
+                yield from habit_queries.iter_logs(self.connection(index), habit_id, date_from, date_to, batch_size)
+            return
+        streams = [habit_queries.iter_logs(self.connection(index), None, date_from, date_to, batch_size)
+                   for index in range(len(self))]
+        try:
+            yield from heapq.merge(*streams, key=habit_queries.page_key, reverse=True)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def insert_log(self, log_id, habit_id, log_date, status, notes):
+        """Insert a log with a caller-chosen log_id, which must be in the range of the habit's shard"""
+        connection = self._habit_connection(habit_id)
+        index = self._habit_shards[habit_id]
+        if self.shard_of_log(log_id) != index:
+            raise Error(f"log_id {log_id} is outside the range of shard {index} "
+                        f"({index * LOG_ID_SPAN + 1}-{(index + 1) * LOG_ID_SPAN})")
+        return habit_queries.insert_log(connection, log_id, habit_id, log_date, status, notes)
+
+    def upsert_log(self, habit_id, log_date, status='Pending', notes=''):
+        return habit_queries.upsert_log(self._habit_connection(habit_id), habit_id, log_date, status, notes)
+
+    def upsert_logs(self, logs):
+        """One UpsertLogs call (and commit) per shard; returns how many logs were written"""
+        groups = {}
+        for log in logs:
+            self._habit_connection(log[0])
+            groups.setdefault(self._habit_shards[log[0]], []).append(log)
+        return sum(habit_queries.upsert_logs(self.connection(index), group) for index, group in groups.items())
+
+    def set_log_status(self, log_id, status):
+        index = self.shard_of_log(log_id)
+        if index is None:
+            return 0
+        return habit_queries.set_log_status(self.connection(index), log_id, status)
+
+    def get_completion_rates(self, habit_ids=None):
+        if habit_ids is None:
+            rates = {}
+            for shard_rates in self.scatter(habit_queries.get_completion_rates):
+                rates.update(shard_rates)
+            return rates
+        groups = {}
+        for habit_id in habit_ids:
+            index = self.shard_of_habit(habit_id)
+            if index is not None:
+                groups.setdefault(index, []).append(habit_id)
+        rates = {}
+        for index, group in groups.items():
+            rates.update(habit_queries.get_completion_rates(self.connection(index), group))
+        return rates
+
+    # --- Global reports (scatter-gather) ---
+
+    def fetch_user_performance(self):
+        rows = chain.from_iterable(self.scatter(habit_queries.fetch_user_performance))
+        return sorted(rows, key=lambda row: (-row[5], row[0]))
+
+    def fetch_habit_performance(self):
+        rows = chain.from_iterable(self.scatter(habit_queries.fetch_habit_performance))
+        return sorted(rows, key=lambda row: row[5], reverse=True)
+
+    def fetch_users_above_average(self):
+        """Users above the average per-habit completed count of all shards together"""
+        users, habits_with_logs, completed_sum = [], 0, 0
+        for shard_users, shard_habits, shard_completed in self.scatter(habit_queries.fetch_completed_totals):
+            users.extend(shard_users)
+            habits_with_logs += shard_habits
+            completed_sum += shard_completed
+        return habit_queries.filter_above_average(users, habits_with_logs, completed_sum)
+
+    def fetch_habits_with_goals(self):
+        rows = chain.from_iterable(self.scatter(habit_queries.fetch_habits_with_goals))
+        return sorted(rows, key=lambda row: (row[0], row[1]))
+
+    def fetch_overdue_goals(self):
+        rows = chain.from_iterable(self.scatter(habit_queries.fetch_overdue_goals))
+        return sorted(rows, key=lambda row: (-row[5], row[2]))
+
+    def report(self, name):
+        """Rows of a habit_cli report by name (see REPORTS)"""
+        if name not in REPORTS:
+            raise Error(f"Report '{name}' is not available over shards")
+        return getattr(self, REPORTS[name])()
+
+    def table_counts(self):
+        """(shard, customers, habits, goals, logs) per shard"""
+        return [(name, *counts) for name, counts in zip(self.shards, self.scatter(_table_counts))]
+
+
+# --- Splitting one database into shards ---
+
+def split(source, shard_set, batch_size=SPLIT_BATCH_SIZE, progress=None):
+    """Copy every customer, habit, goal and log of `source` to its shard.
+
+    The shards must be empty. Log IDs move into their shard's range (the old
+    log_id plus the range start). Archived logs stay in the source's archive.
+    Commits every `batch_size` rows per shard; returns {table: rows copied}.
+    """
+    shard_set.prepare()
+    for name, *counts in shard_set.table_counts():
+        if any(counts):
+            raise Error(f"Shard {name} is not empty")
+    counts = {}
+    for table, select, insert in _SPLIT_TABLES:
+        buffers = [[] for _ in range(len(shard_set))]
+        counts[table] = 0
+
+        def flush(index):
+            connection = shard_set.connection(index)
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(insert, buffers[index])
+                connection.commit()
+            finally:
+                cursor.close()
+            counts[table] += len(buffers[index])
+            buffers[index].clear()
+            if progress:
+                progress(counts)
+
+        cursor = db_backend.streaming_cursor(source)
+        try:
+            cursor.execute(select)
+            for row in cursor:
+                index = shard_set.shard_of_user(row[-1])
+                row = list(row[:-1])
+                if table == 'Logs':
+                    if row[0] > LOG_ID_SPAN:
+                        raise Error(f"log_id {row[0]} is too large to move into a shard's range")
+                    row[0] += index * LOG_ID_SPAN
+                buffers[index].append(row)
+                if len(buffers[index]) >= batch_size:
+                    flush(index)
+        finally:
+            cursor.close()
+        for index in range(len(shard_set)):
+            if buffers[index]:
+                flush(index)
+    report_cache.invalidate()
+    for index in range(len(shard_set)):
+        connection = shard_set.connection(index)
+        goal_scheduler.goals_changed(connection)
+        leaderboard.leaderboards_changed(connection)
+        day_bitmaps.bitmaps_changed(connection)
+    return counts
@@ -0,0 +1,188 @@
+"""
+Personal Habit Tracker - Streak Engine
+Computes current and longest streaks for every habit in one vectorized pass.
+Completed log dates are loaded as integer day numbers (days since
+1970-01-01) and bucketed into periods by Habit.frequency: one period per
+day (Daily), per Monday-based week (Weekly) or per calendar month (Monthly).
+A streak is a run of consecutive periods with at least one Completed log.
+"""
+
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+import db_backend
+import log_archive
+
+EPOCH = date(1970, 1, 1)
+
+FREQUENCY_CODES = {'Daily': 0, 'Weekly': 1, 'Monthly': 2}
+
+# current / longest are in periods of the habit's frequency. current_breaks_on
+# is the first day on which the current streak is lost if nothing more is
+# completed; longest_broke_on is the first day of the period that ended the
+# longest streak (None while that streak is still running).
+Streak = namedtuple('Streak', [
+    'habit_id', 'user_id', 'habit_name', 'frequency',
+    'current', 'longest', 'current_breaks_on', 'longest_broke_on',
+])
+
+
+def day_number(value):
+    """Days since 1970-01-01 for a date"""
+    return (value - EPOCH).days
+
+
+def _day_to_date(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def to_periods(days, freq_codes):
+    """Map day numbers to period numbers according to each row's frequency code"""
+    days = np.asarray(days, dtype=np.int64)
+    freq_codes = np.asarray(freq_codes)
+    # 1970-01-01 was a Thursday; shifting by 3 makes weeks start on Monday
+    weeks = (days + 3) // 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return np.select([freq_codes == 1, freq_codes == 2], [weeks, months], default=days)
+
+
+def period_start_days(periods, freq_codes):
+    """Inverse of to_periods: the first day number of each period"""
+    periods = np.asarray(periods, dtype=np.int64)
+    freq_codes = np.asarray(freq_codes)
+    week_starts = periods * 7 - 3
+    month_starts = periods.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    return np.select([freq_codes == 1, freq_codes == 2], [week_starts, month_starts], default=periods)
+
+
+def compute_streaks(log_habits, log_days, habit_ids, habit_freq_codes, today=None):
+    """Vectorized streaks for many habits.
+
+    log_habits / log_days: one entry per Completed log (any order, duplicates ok).
+    habit_ids / habit_freq_codes: every habit to report, with its frequency code.
+    Returns arrays (current, longest, current_breaks_on, longest_broke_on)
+    aligned with habit_ids; the two date arrays hold day numbers or -1.
+    """
+    habit_ids = np.asarray(habit_ids, dtype=np.int64)
+    habit_freq_codes = np.asarray(habit_freq_codes, dtype=np.int64)
+    log_habits = np.asarray(log_habits, dtype=np.int64)
+    log_days = np.asarray(log_days, dtype=np.int64)
+    today_day = day_number(today or date.today())
+
+    n = len(habit_ids)
+    current = np.zeros(n, dtype=np.int64)
+    longest = np.zeros(n, dtype=np.int64)
+    current_breaks = np.full(n, -1, dtype=np.int64)
+    longest_broke = np.full(n, -1, dtype=np.int64)
+    if n == 0 or len(log_habits) == 0:
+        return current, longest, current_breaks, longest_broke
+
+    # Position of each log's habit in habit_ids; drop logs of unknown habits
+    order = np.argsort(habit_ids, kind='stable')
+    found = np.searchsorted(habit_ids, log_habits, sorter=order)
+    found = np.minimum(found, n - 1)
+    index = order[found]
+    known = habit_ids[index] == log_habits
+    index = index[known]
+    freq = habit_freq_codes[index]
+    periods = to_periods(log_days[known], freq)
+
+    if len(index) == 0:
+        return current, longest, current_breaks, longest_broke
+
+    # Unique (habit, period) pairs, sorted by habit then period; packing each
+    # pair into one integer key and sorting is much faster than a row-wise unique
+    first_period = periods.min()
+    span = periods.max() - first_period + 1
+    keys = np.sort(index * span + (periods - first_period))
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    idx, per = keys // span, keys % span + first_period
+
+    # A run starts where the habit changes or a period was skipped
+    starts = np.ones(len(idx), dtype=bool)
+    starts[1:] = (idx[1:] != idx[:-1]) | (per[1:] != per[:-1] + 1)
+    run_first = np.flatnonzero(starts)
+    run_last = np.append(run_first[1:] - 1, len(idx) - 1)
+    run_habit = idx[run_first]
+    run_len = run_last - run_first + 1
+    run_end = per[run_last]
+    run_freq = habit_freq_codes[run_habit]
+
+    # Runs are grouped by habit; the last run of each habit may be the current one
+    habit_first_run = np.flatnonzero(np.r_[True, run_habit[1:] != run_habit[:-1]])
+    habit_last_run = np.append(habit_first_run[1:] - 1, len(run_habit) - 1)
+    habits_with_runs = run_habit[habit_first_run]
+
+    today_period = to_periods(np.full(len(run_habit), today_day), run_freq)
+    # Alive if completed in this period or the previous one (this one isn't over yet)
+    alive = run_end >= today_period - 1
+
+    last = habit_last_run
+    is_current = alive[last]
+    current[habits_with_runs] = np.where(is_current, run_len[last], 0)
+    breaks = period_start_days(run_end[last] + 2, run_freq[last])
+    current_breaks[habits_with_runs] = np.where(is_current, breaks, -1)
+
+    # Longest run per habit (ties go to the most recent run)
+    longest[habits_with_runs] = np.maximum.reduceat(run_len, habit_first_run)
+    run_rank = np.lexsort((np.arange(len(run_len)), run_len, run_habit))
+    best_run = run_rank[np.append(np.flatnonzero(np.diff(run_habit[run_rank])), len(run_rank) - 1)]
+    best_alive = alive[best_run] & np.isin(best_run, last)
+    broke = period_start_days(run_end[best_run] + 1, run_freq[best_run])
+    longest_broke[run_habit[best_run]] = np.where(best_alive, -1, broke)
+
+    return current, longest, current_breaks, longest_broke
+
+
+def load_completed_days(connection, batch_size=100000):
+    """Arrays (habit_ids, day_numbers) of every Completed log (hot and archived)"""
+    cursor = db_backend.streaming_cursor(connection)
+    habits, days = [], []
+    try:
+        cursor.execute(
+            "SELECT l.habit_id, DATEDIFF(l.log_date, '1970-01-01') "
+            "FROM Logs l WHERE l.status = 'Completed'"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.int64).reshape(-1, 2)
+            habits.append(chunk[:, 0])
+            days.append(chunk[:, 1])
+    finally:
+        cursor.close()
+    archived_habits, archived_days = log_archive.completed_days(connection)
+    habits.append(np.array(archived_habits, dtype=np.int64))
+    days.append(np.array(archived_days, dtype=np.int64))
+    return np.concatenate(habits), np.concatenate(days)
+
+
+def all_streaks(connection, today=None):
+    """Streaks for every habit of every user, as a list of Streak tuples"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT habit_id, user_id, name, frequency FROM Habit ORDER BY habit_id")
+        habits = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not habits:
+        return []
+
+    log_habits, log_days = load_completed_days(connection)
+    habit_ids = [habit[0] for habit in habits]
+    freq_codes = [FREQUENCY_CODES.get(habit[3], 0) for habit in habits]
+    current, longest, current_breaks, longest_broke = compute_streaks(
+        log_habits, log_days, habit_ids, freq_codes, today
+    )
+    return [
+        Streak(
+            habit_id, user_id, name, frequency,
+            int(current[i]), int(longest[i]),
+            _day_to_date(current_breaks[i]) if current_breaks[i] >= 0 else None,
+            _day_to_date(longest_broke[i]) if longest_broke[i] >= 0 else None,
+        )
+        for i, (habit_id, user_id, name, frequency) in enumerate(habits)
+    ]
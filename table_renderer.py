@@ -0,0 +1,161 @@
+"""
+Personal Habit Tracker - Streaming Table Renderer
+Prints rows in the layout of tabulate(tablefmt="grid") as they arrive,
+instead of collecting the whole result to measure every column first.
+Column widths come from the headers and the first `sample_size` rows; later
+values that do not fit are truncated, and free-text columns (notes,
+descriptions, SQL) are capped so one long value cannot stretch the table.
+On a terminal the table is also narrowed to the terminal width. Numbers are
+right-aligned, everything else left-aligned.
+
+The built-in pager stops after every screenful: Enter shows the next page,
+'a' prints the rest and 'q' stops reading rows. Stopping closes the row
+iterator, which releases a streaming cursor such as habit_queries.iter_logs.
+"""
+
+import shutil
+import sys
+from decimal import Decimal
+from itertools import chain, islice
+
+# Rows read before the first line is printed
+SAMPLE_SIZE = 50
+# Widest a free-text column may be, and the narrowest any column is squeezed to
+TEXT_COLUMN_WIDTH = 40
+MIN_COLUMN_WIDTH = 6
+ELLIPSIS = '...'
+# Headers (lowercase) of free-text columns
+TEXT_COLUMNS = ('notes', 'description', 'goal', 'query', 'reason')
+
+PAGER_PROMPT = "-- More -- [Enter] next page, [a] show all, [q] quit: "
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    return str(value).replace('\r', ' ').replace('\n', ' ').replace('\t', ' ')
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def fit(text, width):
+    """text cut to `width` characters, ending in '...' when it was cut"""
+    if len(text) <= width:
+        return text
+    if width <= len(ELLIPSIS):
+        return text[:width]
+    return text[:width - len(ELLIPSIS)] + ELLIPSIS
+
+
+def column_widths(headers, sample, max_width=None):
+    """Widths fitting the headers and sample rows (of strings), capped as described above"""
+    columns = len(headers) if headers else max((len(row) for row in sample), default=0)
+    widths = [len(header) for header in headers] if headers else [0] * columns
+    for row in sample:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(cell))
+    for i, header in enumerate(headers or ()):
+        if header.lower() in TEXT_COLUMNS:
+            widths[i] = min(widths[i], max(TEXT_COLUMN_WIDTH, len(header)))
+    if max_width:
+        # '| ' + ' | '.join(cells) + ' |'
+        excess = sum(widths) + 3 * columns + 1 - max_width
+        while excess > 0:
+            widest = max(range(columns), key=widths.__getitem__)
+            if widths[widest] <= MIN_COLUMN_WIDTH:
+                break
+            widths[widest] -= 1
+            excess -= 1
+    return widths
+
+
+class Pager:
+    """Writes lines to a terminal, pausing after every screenful"""
+
+    def __init__(self, out=None, lines=None, prompt=input):
+        self.out = out or sys.stdout
+        self.lines = lines or max(shutil.get_terminal_size().lines - 1, 5)
+        self.prompt = prompt
+        self.paging = True
+        self._shown = 0
+
+    def write_line(self, text):
+        """Write one line; returns False once the user quits"""
+        if self.paging and self._shown >= self.lines:
+            self.out.flush()
+            answer = self.prompt(PAGER_PROMPT).strip().lower()
+            # Erase the prompt so pages join up seamlessly
+            self.out.write('\033[1A\033[2K')
+            self._shown = 0
+            if answer == 'q':
+                return False
+            if answer == 'a':
+                self.paging = False
+        self.out.write(text + '\n')
+        self._shown += 1
+        return True
+
+
+def pager_for(out=None):
+    """A Pager when `out` is an interactive terminal, else None"""
+    out = out or sys.stdout
+    return Pager(out) if out.isatty() else None
+
+
+def render_table(rows, headers=None, out=None, pager=None, sample_size=SAMPLE_SIZE):
+    """Print rows (any iterable of sequences) as a grid table while reading them.
+
+    Returns the number of rows printed; prints nothing when there are no rows.
+    """
+    out = out or sys.stdout
+    rows = iter(rows)
+    try:
+        sample = list(islice(rows, sample_size))
+        if not sample:
+            return 0
+        max_width = shutil.get_terminal_size().columns if out.isatty() else None
+        widths = column_widths(headers, [[_cell(value) for value in row] for row in sample], max_width)
+        numeric = [
+            any(_is_number(row[i]) for row in sample)
+            and all(row[i] is None or _is_number(row[i]) for row in sample)
+            for i in range(len(widths))
+        ]
+
+        def line(cells):
+            padded = [
+                fit(cell, width).rjust(width) if right else fit(cell, width).ljust(width)
+                for cell, width, right in zip(cells, widths, numeric)
+            ]
+            return '| ' + ' | '.join(padded) + ' |'
+
+        def rule(char):
+            return '+' + '+'.join(char * (width + 2) for width in widths) + '+'
+
+        if pager:
+            write = pager.write_line
+        else:
+            def write(text):
+                out.write(text + '\n')
+                return True
+
+        border = rule('-')
+        if not write(border):
+            return 0
+        if headers:
+            if not (write(line(headers)) and write(rule('='))):
+                return 0
+        printed = 0
+        for row in chain(sample, rows):
+            if printed and not write(border):
+                return printed
+            if not write(line([_cell(value) for value in row])):
+                return printed
+            printed += 1
+        write(border)
+        return printed
+    finally:
+        close = getattr(rows, 'close', None)
+        if close:
+            close()
@@ -0,0 +1,471 @@
+"""
+Personal Habit Tracker - Tk Views
+Native Tk screens for the GUI mode. Every database call runs on a background
+executor with its own pooled connection; results are queued and handed to
+the Tk main loop by an after() poller, so the window never blocks on a query.
+The log browser is a virtualized ttk.Treeview that keeps a bounded window of
+rows and fetches keyset pages as the user scrolls in either direction.
+"""
+
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from tkinter import messagebox, ttk
+
+import db_instrument
+import habit_cli
+import habit_queries
+import leaderboard
+import report_cache
+
+BG = "#1e1e2e"
+BUTTON = {
+    "width": 24,
+    "height": 1,
+    "bg": "#313244",
+    "fg": "white",
+    "font": ("Helvetica", 10),
+    "activebackground": "#45475a",
+}
+
+
+class TkExecutor:
+    """Runs database calls on worker threads and delivers results on the Tk thread"""
+
+    def __init__(self, root, pool, workers=4, poll_ms=25):
+        self.root = root
+        self.pool = pool
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='habit-gui')
+        # Tk is not thread-safe: workers only put (callback, value) here
+        self._results = queue.SimpleQueue()
+        self._closed = False
+        root.after(poll_ms, self._poll)
+
+    def submit(self, func, on_success, on_error=None):
+        """Call func(connection) in the background, then on_success(result) on the Tk thread"""
+        def job():
+            try:
+                with self.pool.connection() as connection:
+                    result = func(connection)
+            except Exception as e:
+                self._results.put((on_error or show_error, e))
+            else:
+                self._results.put((on_success, result))
+        self._executor.submit(job)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    callback, value = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(value)
+                except tk.TclError:
+                    # The window the result was meant for has been closed
+                    pass
+                except Exception as e:
+                    # A failing callback must not stop delivery of later results
+                    show_error(e)
+        finally:
+            if not self._closed:
+                self.root.after(self.poll_ms, self._poll)
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def show_error(error):
+    messagebox.showerror("Error", f"Error: {error}")
+
+
+def _make_tree(master, headers, height=20):
+    """Treeview with a vertical scrollbar packed into master; returns (tree, scrollbar)"""
+    tree = ttk.Treeview(master, columns=list(range(len(headers))), show='headings', height=height)
+    for index, header in enumerate(headers):
+        tree.heading(index, text=header)
+        tree.column(index, width=max(80, len(header) * 9), stretch=True)
+    scrollbar = ttk.Scrollbar(master, orient='vertical', command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side='right', fill='y')
+    tree.pack(side='left', fill='both', expand=True)
+    return tree, scrollbar
+
+
+def _display(value):
+    return "" if value is None else value
+
+
+class TableWindow(tk.Toplevel):
+    """Loads a complete (small) result set in the background and shows it in a table"""
+
+    def __init__(self, master, executor, title, headers, fetch):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("900x480")
+        self.executor = executor
+        self.fetch = fetch
+        self.status = tk.StringVar(value="Loading...")
+
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill='x', padx=5, pady=5)
+        ttk.Button(toolbar, text="Refresh", command=self.refresh).pack(side='left')
+        ttk.Label(toolbar, textvariable=self.status).pack(side='left', padx=10)
+        body = ttk.Frame(self)
+        body.pack(fill='both', expand=True, padx=5, pady=5)
+        self.tree, _ = _make_tree(body, headers)
+        self.refresh()
+
+    def refresh(self):
+        self.status.set("Loading...")
+        self.executor.submit(self.fetch, self._show, self._failed)
+
+    def _show(self, rows):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert('', 'end', values=[_display(value) for value in row])
+        self.status.set(f"{len(rows):,} rows")
+
+    def _failed(self, error):
+        if self.winfo_exists():
+            self.status.set("Failed")
+        show_error(error)
+
+
+class VirtualLogTable(ttk.Frame):
+    """Log table that holds at most `max_rows` rows and pages in more on scroll.
+
+    Rows come from habit_queries.fetch_log_page (newest first). Scrolling near
+    the bottom appends the next older page and drops rows from the top once
+    the window is full; scrolling back to the top re-fetches the newer page.
+    Each fetch is one index range scan, so the table stays responsive however
+    many logs exist.
+    """
+
+    def __init__(self, master, executor, page_size=200, max_rows=2000):
+        super().__init__(master)
+        self.executor = executor
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.filters = (None, None, None)
+        self.status = tk.StringVar()
+        self._keys = {}           # tree item -> (log_date, log_id)
+        self._generation = 0      # bumped on reset so late pages for old filters are dropped
+        self._loading = False
+        self._has_older = False
+        self._has_newer = False
+
+        self.tree, self.scrollbar = _make_tree(self, habit_queries.LOG_COLUMNS)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def reset(self, habit_id=None, date_from=None, date_to=None):
+        """Show the newest logs matching the filters"""
+        self._generation += 1
+        self.filters = (habit_id, date_from, date_to)
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._has_older = True
+        self._has_newer = False
+        self._request(after=None)
+
+    def _request(self, **position):
+        self._loading = True
+        self.status.set("Loading...")
+        generation = self._generation
+        habit_id, date_from, date_to = self.filters
+
+        def fetch(connection):
+            return habit_queries.fetch_log_page(
+                connection, habit_id, date_from, date_to, page_size=self.page_size, **position
+            )
+
+        at_top = 'before' in position
+        self.executor.submit(fetch, lambda rows: self._received(generation, rows, at_top),
+                             lambda error: self._failed(generation, error))
+
+    def _received(self, generation, rows, at_top):
+        if generation != self._generation or not self.winfo_exists():
+            return
+        self._loading = False
+        children = self.tree.get_children()
+        anchor = children[min(int(self.tree.yview()[0] * len(children)), len(children) - 1)] if children else ''
+        if at_top:
+            for index, row in enumerate(rows):
+                self._insert(index, row)
+            self._has_newer = len(rows) == self.page_size
+            self._trim(from_top=False)
+        else:
+            for row in rows:
+                self._insert('end', row)
+            self._has_older = len(rows) == self.page_size
+            self._trim(from_top=True)
+        self._restore_view(anchor)
+        self._update_status()
+
+    def _insert(self, index, row):
+        item = self.tree.insert('', index, values=[_display(value) for value in row])
+        self._keys[item] = habit_queries.page_key(row)
+
+    def _trim(self, from_top):
+        """Drop rows beyond max_rows from the end opposite to where rows were added"""
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return
+        dropped = children[:excess] if from_top else children[-excess:]
+        self.tree.delete(*dropped)
+        for item in dropped:
+            del self._keys[item]
+        if from_top:
+            self._has_newer = True
+        else:
+            self._has_older = True
+
+    def _restore_view(self, anchor):
+        """Keep the row that was at the top of the view in place after inserts / trims"""
+        if anchor and self.tree.exists(anchor):
+            children = self.tree.get_children()
+            self.tree.yview_moveto(children.index(anchor) / len(children))
+
+    def _update_status(self):
+        count = len(self._keys)
+        if not count:
+            self.status.set("No logs found.")
+            return
+        more = " - scroll for more" if self._has_older else " - end of logs"
+        self.status.set(f"{count:,} rows in view window{more}")
+
+    def _failed(self, generation, error):
+        if generation == self._generation and self.winfo_exists():
+            self._loading = False
+            self.status.set("Failed to load logs")
+        show_error(error)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        children = self.tree.get_children()
+        if float(last) >= 0.95 and self._has_older and children:
+            self._request(after=self._keys[children[-1]])
+        elif float(first) <= 0.05 and self._has_newer and children:
+            self._request(before=self._keys[children[0]])
+
+
+class LogBrowser(tk.Toplevel):
+    """Filterable, virtualized view over the Logs table"""
+
+    def __init__(self, master, executor):
+        super().__init__(master)
+        self.title("Logs")
+        self.geometry("900x560")
+
+        filters = ttk.Frame(self)
+        filters.pack(fill='x', padx=5, pady=5)
+        self.habit_id = tk.StringVar()
+        self.date_from = tk.StringVar()
+        self.date_to = tk.StringVar()
+        for label, variable in (("Habit ID", self.habit_id), ("From (YYYY-MM-DD)", self.date_from),
+                                ("To (YYYY-MM-DD)", self.date_to)):
+            ttk.Label(filters, text=label).pack(side='left', padx=(5, 2))
+            ttk.Entry(filters, textvariable=variable, width=12).pack(side='left')
+        ttk.Button(filters, text="Apply", command=self.apply).pack(side='left', padx=10)
+
+        self.table = VirtualLogTable(self, executor)
+        ttk.Label(self, textvariable=self.table.status).pack(fill='x', padx=5)
+        self.table.pack(fill='both', expand=True, padx=5, pady=5)
+        self.table.reset()
+
+    def apply(self):
+        try:
+            habit_id = int(self.habit_id.get()) if self.habit_id.get().strip() else None
+            date_from = date.fromisoformat(self.date_from.get().strip()) if self.date_from.get().strip() else None
+            date_to = date.fromisoformat(self.date_to.get().strip()) if self.date_to.get().strip() else None
+        except ValueError as e:
+            messagebox.showerror("Invalid filter", str(e), parent=self)
+            return
+        self.table.reset(habit_id, date_from, date_to)
+
+
+class FormWindow(tk.Toplevel):
+    """Small input form whose submit action runs in the background.
+
+    fields: (key, label, choices) tuples; choices is None for a free-text entry.
+    submit(connection, values) returns the message shown on success.
+    """
+
+    def __init__(self, master, executor, title, fields, submit):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+        self.executor = executor
+        self.submit_action = submit
+        self.values = {}
+
+        form = ttk.Frame(self, padding=10)
+        form.pack(fill='both', expand=True)
+        for row, (key, label, choices) in enumerate(fields):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky='w', pady=3)
+            variable = tk.StringVar(value=choices[0] if choices else "")
+            if choices:
+                widget = ttk.Combobox(form, textvariable=variable, values=choices, state='readonly', width=28)
+            else:
+                widget = ttk.Entry(form, textvariable=variable, width=30)
+            widget.grid(row=row, column=1, pady=3)
+            self.values[key] = variable
+        self.button = ttk.Button(form, text="Save", command=self.submit)
+        self.button.grid(row=len(fields), column=1, sticky='e', pady=(10, 0))
+
+    def submit(self):
+        values = {key: variable.get().strip() for key, variable in self.values.items()}
+        self.button.state(['disabled'])
+        self.executor.submit(lambda connection: self.submit_action(connection, values),
+                             self._done, self._failed)
+
+    def _done(self, message):
+        messagebox.showinfo("Success", message, parent=self.master)
+        self.destroy()
+
+    def _failed(self, error):
+        if self.winfo_exists():
+            self.button.state(['!disabled'])
+        messagebox.showerror("Error", f"Error: {error}", parent=self)
+
+
+# --- Form actions (run on worker threads) ---
+
+def _optional_date(text):
+    return date.fromisoformat(text) if text else date.today()
+
+
+def _add_customer(connection, values):
+    habit_queries.insert_customer(connection, int(values['user_id']), values['email'], values['name'],
+                                  values['password'], values['phone_no'])
+    return "Customer added successfully!"
+
+
+def _add_habit(connection, values):
+    habit_queries.insert_habit(connection, int(values['habit_id']), int(values['user_id']), values['name'],
+                               date.fromisoformat(values['start_date']), values['frequency'])
+    return "Habit added successfully!"
+
+
+def _add_goal(connection, values):
+    habit_queries.insert_goal(connection, int(values['goal_id']), int(values['habit_id']),
+                              date.fromisoformat(values['deadline']), values['description'],
+                              int(values['target_count']) if values['target_count'] else None)
+    return "Goal added successfully!"
+
+
+def _mark_goal_achieved(connection, values):
+    return habit_queries.mark_goal_achieved(connection, int(values['goal_id'])) or "Done."
+
+
+def _add_log(connection, values):
+    log_id, created = habit_queries.upsert_log(connection, int(values['habit_id']),
+                                               _optional_date(values['log_date']), values['status'],
+                                               values['notes'] or None)
+    return f"Log {log_id} {'added' if created else 'updated'} successfully!"
+
+
+def _update_log_status(connection, values):
+    if not habit_queries.set_log_status(connection, int(values['log_id']), values['status']):
+        raise ValueError(f"Log {values['log_id']} not found")
+    return "Log status updated successfully!"
+
+
+FORMS = [
+    ("Add Customer", [('user_id', "User ID", None), ('name', "Name", None), ('email', "Email", None),
+                      ('password', "Password", None), ('phone_no', "Phone (10 digits)", None)], _add_customer),
+    ("Add Habit", [('habit_id', "Habit ID", None), ('user_id', "User ID", None), ('name', "Habit Name", None),
+                   ('start_date', "Start Date (YYYY-MM-DD)", None),
+                   ('frequency', "Frequency", habit_queries.FREQUENCIES)], _add_habit),
+    ("Add Goal", [('goal_id', "Goal ID", None), ('habit_id', "Habit ID", None),
+                  ('description', "Description", None), ('deadline', "Deadline (YYYY-MM-DD)", None),
+                  ('target_count', "Target Completions (optional)", None)], _add_goal),
+    ("Mark Goal Achieved", [('goal_id', "Goal ID", None)], _mark_goal_achieved),
+    ("Add / Update Log", [('habit_id', "Habit ID", None),
+                 ('log_date', "Date (blank = today)", None), ('status', "Status", habit_cli.STATUSES),
+                 ('notes', "Notes (blank = keep)", None)], _add_log),
+    ("Update Log Status", [('log_id', "Log ID", None), ('status', "New Status", habit_cli.STATUSES)],
+     _update_log_status),
+]
+
+# (button text, window title, headers, fetch(connection))
+TABLES = [
+    ("Customers", "All Customers", ["User ID", "Name", "Email", "Phone", "Created At"],
+     habit_queries.fetch_customers),
+    ("Habits", "All Habits", ["Habit ID", "User", "Habit Name", "Start Date", "Frequency", "Active"],
+     habit_queries.fetch_habits),
+    ("Goals", "All Goals", ["Goal ID", "Habit", "Description", "Deadline", "Achieved", "Target"],
+     habit_queries.fetch_goals),
+] + [
+    (title.title(), title.title(), [header for _, header in columns], fetch)
+    for fetch, columns, title in habit_cli.REPORTS.values()
+] + [
+    (f"Top {kind.title()} by {label}", f"Top {kind.title()} by {label}",
+     [header for _, header in habit_cli.LEADERBOARD_COLUMNS],
+     lambda connection, kind=kind, metric=metric: leaderboard.get(connection).top(kind, metric, 100))
+    for kind in leaderboard.KINDS for metric, label in (('rate', "Rate"), ('completed', "Completed"))
+]
+
+
+def _stats_text(pool):
+    lines = ["Connection pool:"]
+    lines += [f"  {key.replace('_', ' ')}: {value}" for key, value in pool.stats().items()]
+    lines.append("Report cache:")
+    lines += [f"  {key.replace('_', ' ')}: {value}" for key, value in report_cache.cache.stats().items()]
+    slowest = db_instrument.registry.snapshot()[:5]
+    if slowest:
+        lines.append("Slowest queries (total time):")
+        lines += [f"  {stat['name']}: {stat['count']} calls, p95 {stat['p95_ms']} ms" for stat in slowest]
+    return "\n".join(lines)
+
+
+def run_app(pool):
+    """Build the main window and run the Tk main loop until it is closed"""
+    root = tk.Tk()
+    root.title("Personal Habit Tracker")
+    root.geometry("560x700")
+    root.configure(bg=BG)
+    executor = TkExecutor(root, pool)
+
+    tk.Label(root, text="Personal Habit Tracker", font=("Helvetica", 20, "bold"),
+             fg="white", bg=BG).pack(pady=(20, 5))
+    tk.Label(root, text="DBMS Project – Tkinter Interface", fg="gray", bg=BG).pack(pady=(0, 15))
+
+    columns = tk.Frame(root, bg=BG)
+    columns.pack()
+    views = tk.Frame(columns, bg=BG)
+    views.grid(row=0, column=0, padx=10, sticky='n')
+    actions = tk.Frame(columns, bg=BG)
+    actions.grid(row=0, column=1, padx=10, sticky='n')
+
+    tk.Label(views, text="View", fg="gray", bg=BG).pack()
+    tk.Button(views, text="Logs", command=lambda: LogBrowser(root, executor), **BUTTON).pack(pady=3)
+    for text, title, headers, fetch in TABLES:
+        tk.Button(views, text=text, **BUTTON,
+                  command=lambda title=title, headers=headers, fetch=fetch:
+                  TableWindow(root, executor, title, headers, fetch)).pack(pady=3)
+
+    tk.Label(actions, text="Edit", fg="gray", bg=BG).pack()
+    for title, fields, submit in FORMS:
+        tk.Button(actions, text=title, **BUTTON,
+                  command=lambda title=title, fields=fields, submit=submit:
+                  FormWindow(root, executor, title, fields, submit)).pack(pady=3)
+    tk.Button(actions, text="Diagnostics", **BUTTON,
+              command=lambda: messagebox.showinfo("Diagnostics", _stats_text(pool))).pack(pady=(15, 3))
+
+    tk.Button(root, text="Exit", command=root.destroy, bg="#f38ba8", fg="black",
+              width=35, height=2, font=("Helvetica", 10, "bold")).pack(pady=25)
+
+    try:
+        root.mainloop()
+    finally:
+        executor.close()
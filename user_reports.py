@@ -0,0 +1,346 @@
+"""
+Personal Habit Tracker - Per-User Report Files
+Renders one progress report per user (habits with completion rates, goals
+and recent logs) as Markdown or HTML, for mailing or publishing.
+
+Users are split into shards of consecutive user_ids and the shards are spread
+over a process pool; every worker process opens its own database connection
+once. A shard is read with four range queries (users, habit counts, goals and
+logs of the last RECENT_DAYS days) whatever its size, so the work per user
+stays flat and the job scales with the number of workers until the database
+is the bottleneck.
+
+Usage:
+    python habit_cli.py user-reports --output reports --workers 8 --format html
+"""
+
+import html
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+import db_backend
+
+FORMATS = ('md', 'html')
+SHARD_SIZE = 500
+# Recent logs: the newest RECENT_LOGS of the last RECENT_DAYS days
+RECENT_LOGS = 10
+RECENT_DAYS = 30
+OUTPUT_DIR = 'user_reports'
+
+UserReport = namedtuple('UserReport', ['user_id', 'name', 'email', 'habits', 'goals', 'recent_logs'])
+# One row per habit: (name, frequency, total, completed, skipped, pending)
+# One row per goal: (description, habit, deadline, target_count, is_achieved)
+# One row per log: (log_date, habit, status, notes)
+ShardResult = namedtuple('ShardResult', ['worker', 'first_user_id', 'last_user_id', 'users', 'bytes',
+                                         'query_seconds', 'render_seconds'])
+JobStats = namedtuple('JobStats', ['users', 'shards', 'bytes', 'seconds', 'workers'])
+
+_USERS_QUERY = """
+SELECT user_id, name, email FROM Customer
+WHERE user_id {users}
+ORDER BY user_id
+"""
+
+_HABITS_QUERY = """
+SELECT h.user_id, h.habit_id, h.name, h.frequency,
+       hs.total_logs, hs.completed_logs, hs.skipped_logs, hs.pending_logs
+FROM Habit h
+JOIN HabitSummary hs ON hs.habit_id = h.habit_id
+WHERE h.user_id {users}
+ORDER BY h.user_id, h.habit_id
+"""
+
+_GOALS_QUERY = """
+SELECT h.user_id, g.description, h.name, g.deadline, g.target_count, g.is_achieved
+FROM Goal g
+JOIN Habit h ON h.habit_id = g.habit_id
+WHERE h.user_id {users}
+ORDER BY h.user_id, g.deadline, g.goal_id
+"""
+
+# The newest logs since a date of every user in the range; the date bound keeps
+# each habit's part a short range scan of idx_logs_habit_date
+_RECENT_LOGS_QUERY = """
+SELECT user_id, log_date, name, status, notes
+FROM (
+    SELECT h.user_id, l.log_date, h.name, l.status, l.notes,
+           ROW_NUMBER() OVER (PARTITION BY h.user_id ORDER BY l.log_date DESC, l.log_id DESC) AS position
+    FROM Logs l
+    JOIN Habit h ON h.habit_id = l.habit_id
+    WHERE h.user_id {users} AND l.log_date >= %s
+) recent
+WHERE position <= %s
+ORDER BY user_id, position
+"""
+
+
+def _rate(total, completed):
+    if not total:
+        return Decimal('0.00')
+    return (Decimal(completed * 100) / Decimal(total)).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+def _as_date(value):
+    # Subquery and joined DATE columns can come back as strings on SQLite
+    return value if isinstance(value, date) or value is None else date.fromisoformat(str(value)[:10])
+
+
+# --- Reading ---
+
+def shard_user_ids(connection, shard_size=SHARD_SIZE, user_ids=None):
+    """(first_user_id, last_user_id, user_ids) shards of at most shard_size users each.
+
+    Shards of all users are ranges (user_ids None); shards of the given
+    user_ids list them, as other users may lie between them.
+    """
+    if user_ids is None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT user_id FROM Customer ORDER BY user_id")
+            all_ids = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        return [
+            (all_ids[i], all_ids[min(i + shard_size, len(all_ids)) - 1], None)
+            for i in range(0, len(all_ids), shard_size)
+        ]
+    user_ids = sorted(set(user_ids))
+    return [
+        (chunk[0], chunk[-1], chunk)
+        for chunk in (user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size))
+    ]
+
+
+def _user_filter(first_user_id, last_user_id, user_ids):
+    """SQL condition on a user_id column for one shard, and its arguments"""
+    if user_ids is None:
+        return "BETWEEN %s AND %s", (first_user_id, last_user_id)
+    return f"IN ({', '.join(['%s'] * len(user_ids))})", tuple(user_ids)
+
+
+def _grouped(cursor, query, args):
+    """Rows of a query ordered by user_id, grouped as user_id -> [rest of row]"""
+    cursor.execute(query, args)
+    groups = {}
+    for row in cursor.fetchall():
+        groups.setdefault(row[0], []).append(row[1:])
+    return groups
+
+
+def read_shard(connection, first_user_id, last_user_id, archived=None, today=None, user_ids=None):
+    """UserReport for every user with first_user_id <= user_id <= last_user_id, or only user_ids"""
+    users_sql, args = _user_filter(first_user_id, last_user_id, user_ids)
+    since = (today or date.today()) - timedelta(days=RECENT_DAYS)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_USERS_QUERY.format(users=users_sql), args)
+        users = cursor.fetchall()
+        habits = _grouped(cursor, _HABITS_QUERY.format(users=users_sql), args)
+        goals = _grouped(cursor, _GOALS_QUERY.format(users=users_sql), args)
+        recent = _grouped(cursor, _RECENT_LOGS_QUERY.format(users=users_sql), args + (since, RECENT_LOGS))
+    finally:
+        cursor.close()
+    archived = archived or {}
+    reports = []
+    for user_id, name, email in users:
+        habit_rows = []
+        for habit_id, habit_name, frequency, *counts in habits.get(user_id, ()):
+            old = archived.get(habit_id)
+            if old:
+                counts = [count + extra for count, extra in zip(counts, old)]
+            habit_rows.append((habit_name, frequency, *counts))
+        goal_rows = [
+            (description, habit, _as_date(deadline), target, bool(achieved))
+            for description, habit, deadline, target, achieved in goals.get(user_id, ())
+        ]
+        log_rows = [(_as_date(log_date), habit, status, notes) for log_date, habit, status, notes
+                    in recent.get(user_id, ())]
+        reports.append(UserReport(user_id, name, email, habit_rows, goal_rows, log_rows))
+    return reports
+
+
+# --- Rendering ---
+
+def _goal_status(goal, today):
+    _, _, deadline, _, achieved = goal
+    if achieved:
+        return "Achieved"
+    return "Overdue" if deadline < today else "Open"
+
+
+def _summary(report):
+    total = sum(habit[2] for habit in report.habits)
+    completed = sum(habit[3] for habit in report.habits)
+    return total, completed, _rate(total, completed)
+
+
+def render_markdown(report, today=None):
+    today = today or date.today()
+    total, completed, rate = _summary(report)
+
+    def cell(value):
+        return str('' if value is None else value).replace('|', '\\|').replace('\n', ' ')
+
+    def table(headers, rows):
+        lines = ['| ' + ' | '.join(headers) + ' |', '|' + '---|' * len(headers)]
+        lines += ['| ' + ' | '.join(cell(value) for value in row) + ' |' for row in rows]
+        return lines
+
+    lines = [
+        f"# Progress report for {report.name}",
+        "",
+        f"User ID {report.user_id} - generated {today.isoformat()}",
+        "",
+        f"**{len(report.habits)} habits, {total} logs, {completed} completed ({rate}%)**",
+        "",
+        "## Habits",
+        "",
+    ]
+    lines += table(["Habit", "Frequency", "Logs", "Completed", "Skipped", "Pending", "Completion %"],
+                   [habit + (_rate(habit[2], habit[3]),) for habit in report.habits]) if report.habits \
+        else ["No habits yet."]
+    lines += ["", "## Goals", ""]
+    lines += table(["Goal", "Habit", "Deadline", "Target", "Status"],
+                   [(goal[0], goal[1], goal[2], goal[3], _goal_status(goal, today)) for goal in report.goals]) \
+        if report.goals else ["No goals yet."]
+    lines += ["", f"## Recent logs (last {RECENT_DAYS} days)", ""]
+    lines += table(["Date", "Habit", "Status", "Notes"], report.recent_logs) if report.recent_logs \
+        else ["No recent logs."]
+    return "\n".join(lines) + "\n"
+
+
+def render_html(report, today=None):
+    today = today or date.today()
+    total, completed, rate = _summary(report)
+
+    def table(headers, rows, empty):
+        if not rows:
+            return f"<p>{empty}</p>"
+        head = "".join(f"<th>{html.escape(header)}</th>" for header in headers)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str('' if value is None else value))}</td>" for value in row) + "</tr>"
+            for row in rows
+        )
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+    name = html.escape(report.name)
+    return "\n".join([
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset=\"utf-8\"><title>Progress report for {name}</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}</style></head><body>",
+        f"<h1>Progress report for {name}</h1>",
+        f"<p>User ID {report.user_id} - generated {today.isoformat()}</p>",
+        f"<p><strong>{len(report.habits)} habits, {total} logs, {completed} completed ({rate}%)</strong></p>",
+        "<h2>Habits</h2>",
+        table(["Habit", "Frequency", "Logs", "Completed", "Skipped", "Pending", "Completion %"],
+              [habit + (_rate(habit[2], habit[3]),) for habit in report.habits], "No habits yet."),
+        "<h2>Goals</h2>",
+        table(["Goal", "Habit", "Deadline", "Target", "Status"],
+              [(goal[0], goal[1], goal[2], goal[3], _goal_status(goal, today)) for goal in report.goals],
+              "No goals yet."),
+        f"<h2>Recent logs (last {RECENT_DAYS} days)</h2>",
+        table(["Date", "Habit", "Status", "Notes"], report.recent_logs, "No recent logs."),
+        "</body></html>",
+    ]) + "\n"
+
+
+RENDERERS = {'md': render_markdown, 'html': render_html}
+
+
+def report_path(output_dir, user_id, fmt):
+    return os.path.join(output_dir, f"user_{user_id}.{fmt}")
+
+
+def write_shard(connection, first_user_id, last_user_id, output_dir, fmt='md', archived=None, today=None,
+                user_ids=None):
+    """Read, render and write one shard; returns a ShardResult"""
+    started = time.perf_counter()
+    reports = read_shard(connection, first_user_id, last_user_id, archived, today, user_ids)
+    queried = time.perf_counter()
+    render = RENDERERS[fmt]
+    written = 0
+    for report in reports:
+        path = report_path(output_dir, report.user_id, fmt)
+        with open(path, 'w', encoding='utf-8') as handle:
+            written += handle.write(render(report, today))
+    return ShardResult(os.getpid(), first_user_id, last_user_id, len(reports), written,
+                       queried - started, time.perf_counter() - queried)
+
+
+# --- Process pool ---
+
+_worker = {}
+
+
+def _init_worker(backend, output_dir, fmt):
+    """Open this worker process's connection once"""
+    import log_archive
+    connection = db_backend.connect(backend)
+    _worker.update(
+        connection=connection, output_dir=output_dir, fmt=fmt,
+        archived=log_archive.habit_totals(connection), today=date.today(),
+    )
+
+
+def _run_shard(shard):
+    first_user_id, last_user_id, user_ids = shard
+    return write_shard(_worker['connection'], first_user_id, last_user_id, _worker['output_dir'],
+                       _worker['fmt'], _worker['archived'], _worker['today'], user_ids)
+
+
+def generate_reports(connection, output_dir=OUTPUT_DIR, fmt='md', workers=None, backend=None,
+                     shard_size=SHARD_SIZE, user_ids=None, progress=None):
+    """Write one report file per user; returns (JobStats, [ShardResult]).
+
+    `connection` only lists the users; each of the `workers` processes
+    (default: one per CPU) connects to `backend` itself. With workers=1
+    the shards run in this process on `connection`. progress, if given, is
+    called with every finished ShardResult.
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"unknown report format {fmt!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    shards = shard_user_ids(connection, shard_size, user_ids)
+    started = time.perf_counter()
+    results = []
+    if workers == 1 or len(shards) <= 1:
+        import log_archive
+        archived = log_archive.habit_totals(connection)
+        for first_user_id, last_user_id, shard_ids in shards:
+            result = write_shard(connection, first_user_id, last_user_id, output_dir, fmt, archived,
+                                 user_ids=shard_ids)
+            results.append(result)
+            if progress:
+                progress(result)
+        workers = 1
+    else:
+        with ProcessPoolExecutor(min(workers, len(shards)), initializer=_init_worker,
+                                 initargs=(backend, output_dir, fmt)) as pool:
+            for future in as_completed([pool.submit(_run_shard, shard) for shard in shards]):
+                result = future.result()
+                results.append(result)
+                if progress:
+                    progress(result)
+        workers = min(workers, len(shards))
+    stats = JobStats(sum(result.users for result in results), len(shards),
+                     sum(result.bytes for result in results), time.perf_counter() - started, workers)
+    return stats, results
+
+
+def worker_timings(results):
+    """(worker pid, shards, users, query seconds, render seconds) per worker"""
+    workers = {}
+    for result in results:
+        worker = workers.setdefault(result.worker, [0, 0, 0.0, 0.0])
+        worker[0] += 1
+        worker[1] += result.users
+        worker[2] += result.query_seconds
+        worker[3] += result.render_seconds
+    return [(pid, shards, users, round(query, 3), round(render, 3))
+            for pid, (shards, users, query, render) in sorted(workers.items())]